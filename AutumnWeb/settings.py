@@ -123,6 +123,12 @@ SPECTACULAR_SETTINGS = {
     "TITLE": "Autumn API v2",
     "VERSION": "2.0.0",
     "PREPROCESSING_HOOKS": ["core.api_v2.schema.v2_endpoints_only"],
+    # Several serializers have a "status" field; pin the component names so
+    # adding one does not rename the others.
+    "ENUM_NAME_OVERRIDES": {
+        "StatusEnum": ["active", "paused", "complete", "archived"],
+        "SessionBulkStatusEnum": ["created", "existing", "error"],
+    },
 }
 
 
@@ -142,6 +148,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "allauth.account.middleware.AccountMiddleware",
     "users.middleware.UserTimezoneMiddleware",
+    "core.middleware.ActiveContextMiddleware",
     "core.api_v2.middleware.V2ErrorEnvelopeMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -158,12 +165,59 @@ CORS_ALLOWED_ORIGINS = env.list(
 CORS_ALLOW_CREDENTIALS = env.bool("CORS_ALLOW_CREDENTIALS", default=True)
 CSRF_TRUSTED_ORIGINS = env.list("CSRF_TRUSTED_ORIGINS", default=CORS_ALLOWED_ORIGINS)
 
+# Cache backend as a django-environ cache URL. Local memory is private to each
+# process, so under several workers every one of them re-scans static versions,
+# refetches backgrounds and builds its own report cache. Point CACHE_URL at a
+# backend the workers share instead:
+#   filecache:///var/tmp/autumn-cache   (a directory all workers can write)
+#   dbcache://autumn_cache              (run `manage.py createcachetable` once)
+#   redis://127.0.0.1:6379/1            (needs the optional `redis` package)
+# Without the `redis` package a Redis URL falls back to a file cache under
+# CACHE_FALLBACK_DIR rather than failing at the first cache access.
+CACHE_URL = env("CACHE_URL", default="") or "locmemcache://unique-snowflake"
+CACHE_FALLBACK_DIR = env(
+    "CACHE_FALLBACK_DIR", default=os.path.join(BASE_DIR, ".cache")
+)
+_cache_config = env.cache_url_config(CACHE_URL)
+if _cache_config["BACKEND"].endswith(".RedisCache"):
+    import importlib.util
+
+    if importlib.util.find_spec("redis") is None:
+        import warnings
+
+        warnings.warn(
+            "CACHE_URL names Redis but the redis package is not installed; "
+            f"using a file cache in {CACHE_FALLBACK_DIR}."
+        )
+        _cache_config = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_FALLBACK_DIR,
+        }
+
+
+def _report_cache_config(config):
+    """The report cache on the same backend, kept apart from the default one."""
+    backend = config["BACKEND"]
+    config = {**config, "TIMEOUT": 300, "KEY_PREFIX": "reports"}
+    if backend.endswith(".LocMemCache"):
+        config["LOCATION"] = "report-responses"
+    elif backend.endswith(".FileBasedCache"):
+        # Culling and clear() work on the whole directory.
+        config["LOCATION"] = os.path.join(config["LOCATION"], "reports")
+    if not backend.endswith(".RedisCache"):
+        # Redis evicts by its own maxmemory policy and rejects this option.
+        config["OPTIONS"] = {**config.get("OPTIONS", {}), "MAX_ENTRIES": 2000}
+    return config
+
+
 CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",  # was running into issues with PickleCache due to thread locking
-        "LOCATION": "unique-snowflake",
-    }
+    "default": _cache_config,
+    # Report payloads (core.report_cache) and session frames
+    # (core.session_frame). Local memory evicts least recently
+    # used entries past MAX_ENTRIES; TIMEOUT bounds clock-relative staleness.
+    "reports": _report_cache_config(_cache_config),
 }
+REPORT_CACHE_ALIAS = "reports"
 
 ROOT_URLCONF = "AutumnWeb.urls"
 
@@ -357,6 +411,9 @@ MEDIA_URL = "/media/"
 SERVE_MEDIA = env.bool("SERVE_MEDIA", default=False)
 
 # Static Versioning
+# collectstatic writes content-hash versions here; without the file, versions
+# fall back to a cached scan of modification times.
+STATIC_VERSION_MANIFEST = os.path.join(STATIC_ROOT, "core", "versions.json")
 STATIC_VERSION_CACHE_TIMEOUT = {
     "debug": 0,  # always refresh in debug mode
     "production": 3600,  # 1 hour
@@ -413,6 +470,32 @@ if GITHUB_AUTH_ENABLED:
         "key": "",
     }
 
+# Commitment ledgers are replayed by `manage.py commitments_worker` instead of
+# inside page/API reads; reads serve the last reconciled state marked stale.
+COMMITMENTS_BACKGROUND_RECONCILE = env.bool(
+    "COMMITMENTS_BACKGROUND_RECONCILE", default=False
+)
+
+# Timers past their auto_stop_at are stopped by `manage.py auto_stop_worker`
+# instead of by whichever page or API read notices them first.
+TIMERS_BACKGROUND_AUTO_STOP = env.bool("TIMERS_BACKGROUND_AUTO_STOP", default=False)
+
+# Active-timer long-poll (core.views.timers.active_timers_wait). Hold each
+# request up to TIMER_WAIT_SECONDS for a change; leave at 0 under WSGI, where a
+# held request pins a worker thread, and raise it (e.g. 25) when served by ASGI.
+TIMER_WAIT_SECONDS = env.int("TIMER_WAIT_SECONDS", default=0)
+TIMER_WAIT_CHECK_SECONDS = 2
+
+# Format-2 imports with at least IMPORT_VALIDATION_PARALLEL_SESSIONS sessions
+# validate their projects on a pool of IMPORT_VALIDATION_WORKERS processes,
+# that many sessions at a time; 0 keeps validation in-process.
+IMPORT_VALIDATION_PARALLEL_SESSIONS = env.int(
+    "IMPORT_VALIDATION_PARALLEL_SESSIONS", default=20000
+)
+IMPORT_VALIDATION_WORKERS = env.int(
+    "IMPORT_VALIDATION_WORKERS", default=os.cpu_count() or 1
+)
+
 # AUDIT Settings
 RUN_AUDIT_SCHEDULER = env.bool(
     "RUN_AUDIT_SCHEDULER", False
@@ -426,3 +509,8 @@ import sys
 TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
 if TESTING:
     PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    # Fixtures write rows without bumping the data generation and recycle
+    # user ids, so a shared report cache would leak payloads and session
+    # frames between tests.
+    # Tests of the cache itself override CACHES.
+    CACHES["reports"] = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
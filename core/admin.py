@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.db.models import Count
 
+from . import changelog, rollups, session_frame
 from .models import (
     Commitment,
     Context,
@@ -25,27 +26,37 @@ from .services.sessions import (
 from .totals import annotate_project_totals, annotate_subproject_totals
 
 
+def _set_project_status(queryset, status):
+    rows = list(queryset.values_list("user_id", "pk"))
+    updated = queryset.update(status=status)
+    for user_id in {user_id for user_id, _ in rows}:
+        changelog.record(
+            user_id, projects=[pk for owner, pk in rows if owner == user_id]
+        )
+    return updated
+
+
 @admin.action(description="Mark selected projects as active")
 def mark_projects_active(modeladmin, request, queryset):
-    updated = queryset.update(status="active")
+    updated = _set_project_status(queryset, "active")
     modeladmin.message_user(request, f"Updated {updated} project(s) to active.", messages.SUCCESS)
 
 
 @admin.action(description="Mark selected projects as paused")
 def mark_projects_paused(modeladmin, request, queryset):
-    updated = queryset.update(status="paused")
+    updated = _set_project_status(queryset, "paused")
     modeladmin.message_user(request, f"Updated {updated} project(s) to paused.", messages.SUCCESS)
 
 
 @admin.action(description="Mark selected projects as complete")
 def mark_projects_complete(modeladmin, request, queryset):
-    updated = queryset.update(status="complete")
+    updated = _set_project_status(queryset, "complete")
     modeladmin.message_user(request, f"Updated {updated} project(s) to complete.", messages.SUCCESS)
 
 
 @admin.action(description="Mark selected projects as archived")
 def mark_projects_archived(modeladmin, request, queryset):
-    updated = queryset.update(status="archived")
+    updated = _set_project_status(queryset, "archived")
     modeladmin.message_user(request, f"Updated {updated} project(s) to archived.", messages.SUCCESS)
 
 
@@ -85,6 +96,10 @@ class ProjectsAdmin(admin.ModelAdmin):
         if update_fields:
             obj.save(update_fields=update_fields)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        changelog.record(form.instance.user_id, projects=[form.instance.pk])
+
     def get_queryset(self, request):
         queryset = super().get_queryset(request).select_related("user", "context").prefetch_related("tags").annotate(
             _user_project_count=Count("user__projects", distinct=True),
@@ -150,14 +165,16 @@ class SubProjectsAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         if not change:
-            return super().save_model(request, obj, form, change)
-        update_fields = [
-            field
-            for field in form.changed_data
-            if field not in {"total_time", "last_updated"}
-        ]
-        if update_fields:
-            obj.save(update_fields=update_fields)
+            super().save_model(request, obj, form, change)
+        else:
+            update_fields = [
+                field
+                for field in form.changed_data
+                if field not in {"total_time", "last_updated"}
+            ]
+            if update_fields:
+                obj.save(update_fields=update_fields)
+        changelog.record(obj.user_id, subprojects=[obj.pk])
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request).select_related("user", "parent_project").annotate(
@@ -238,7 +255,10 @@ class SessionsAdmin(admin.ModelAdmin):
         obj.auto_stop_at = _floor_instant(obj.auto_stop_at)
         obj.version = (obj.version or 1) + 1
         super().save_model(request, obj, form, change)
+        rollups.invalidate(obj.user_id)
+        session_frame.invalidate(obj.user_id)
         _mark_commitments_dirty(obj.user_id)
+        changelog.record(obj.user_id, sessions=[obj.pk], projects=[obj.project_id])
 
     def save_formset(self, request, form, formset, change):
         super().save_formset(request, form, formset, change)
@@ -254,6 +274,8 @@ class SessionsAdmin(admin.ModelAdmin):
         session = form.instance
         session.version = (session.version or 1) + 1
         session.save(update_fields=["version"])
+        rollups.invalidate(session.user_id)
+        session_frame.invalidate(session.user_id)
         _mark_commitments_dirty(session.user_id)
         # Validate the resulting allocation set; raising rolls back the whole
         # admin edit (save_formset runs inside admin's transaction).
@@ -262,6 +284,13 @@ class SessionsAdmin(admin.ModelAdmin):
             for link in session.subproject_links.select_related("subproject")
         ]
         _validate_allocations(session, allocations)
+        changelog.record(
+            session.user_id,
+            sessions=[session.pk],
+            projects=[session.project_id],
+            subprojects=[subproject.pk for subproject, _ in allocations]
+            + [link.subproject_id for link in formset.deleted_objects],
+        )
 
     def delete_model(self, request, obj):
         SessionMutationService.delete_session(obj.pk, user=obj.user)
@@ -12,6 +12,8 @@ from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from core import generation
+from core.api_v2.conditional import conditional_get
 from core.api_v2.exceptions import V2APIView, _envelope
 from core.api_v2.serializers import (
     CommitmentAdjustmentRequestSerializer,
@@ -27,8 +29,10 @@ from core.api_v2.serializers import (
 from core.commitments import (
     _revision_accrual,
     calculate_commitment_streak,
+    commitment_is_stale,
     get_commitment_progress,
     reconcile_commitment,
+    reconcile_for_read,
 )
 from core.api_helpers import _iso_value
 from core.models import (
@@ -122,7 +126,7 @@ def _service_validation(exc):
 
 def _prepare_for_read(commitment):
     if commitment.active:
-        reconcile_commitment(commitment)
+        reconcile_for_read(commitment)
         commitment.refresh_from_db()
     return commitment
 
@@ -280,6 +284,8 @@ def serialize_commitment(commitment, *, reconcile=True, include_streak=False):
         "current_period": _current_period_payload(commitment, revision),
         "pending_revision": _pending_payload(commitment, revision),
         "ledger_start_at": _iso(commitment.ledger_start_at),
+        "last_reconciled": _iso(commitment.last_reconciled),
+        "stale": commitment_is_stale(commitment),
         **(
             {"streak": _iso_value(calculate_commitment_streak(commitment))}
             if include_streak
@@ -382,6 +388,7 @@ class CommitmentsView(V2APIView):
         operation_id="commitments_list",
         responses=CommitmentListResponseSerializer,
     )
+    @conditional_get(time_bucket=60)
     def get(self, request):
         include_streak = request.query_params.get("include") == "streak"
         commitments = list(_commitment_queryset(request.user).order_by("pk"))
@@ -434,6 +441,7 @@ class CommitmentDetailView(V2APIView):
         operation_id="commitments_retrieve",
         responses=CommitmentResourceSerializer,
     )
+    @conditional_get(time_bucket=60)
     def get(self, request, commitment_id):
         return Response(
             serialize_commitment(
@@ -503,6 +511,7 @@ class CommitmentDetailView(V2APIView):
             ):
                 return _version_conflict(commitment)
             commitment.delete()
+            generation.bump(request.user.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -590,6 +599,7 @@ class CommitmentAdjustmentsView(V2APIView):
         commitment.needs_recompute = True
         commitment.version += 1
         commitment.save(update_fields=["needs_recompute", "version"])
+        generation.bump(request.user.pk)
         reconcile_commitment(commitment, force=True)
         commitment.refresh_from_db()
         return Response(
@@ -614,6 +624,7 @@ class CommitmentPeriodsView(V2APIView):
         parameters=[CommitmentPeriodsQuerySerializer],
         responses=CommitmentPeriodListResponseSerializer,
     )
+    @conditional_get(time_bucket=60)
     def get(self, request, commitment_id):
         serializer = CommitmentPeriodsQuerySerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
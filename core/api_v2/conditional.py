@@ -0,0 +1,80 @@
+"""Weak ETags and 304 responses for v2 read endpoints.
+
+The ETag combines the user's data generation (see ``core.generation``) with
+everything else a payload depends on: the path, the query parameters, the
+negotiated media type, the active timezone (changing the profile timezone does
+not bump the generation) and the web session's active context. A matching
+``If-None-Match`` returns 304 after a single generation lookup, before the
+view runs any report or list query.
+
+Payloads that drift with the clock (commitment periods rolling over, "days
+since" figures in reports) pass ``time_bucket``; the ETag then also changes
+every that many seconds.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from core import generation
+from core.utils import ACTIVE_CONTEXT_SESSION_KEY
+
+
+def _etag(request, time_bucket):
+    session = getattr(request, "session", None)
+    parts = [
+        str(request.user.pk),
+        request.path,
+        "&".join(
+            f"{key}={value}"
+            for key, values in sorted(request.query_params.lists())
+            for value in values
+        ),
+        request.accepted_media_type or "",
+        timezone.get_current_timezone_name(),
+        str(session.get(ACTIVE_CONTEXT_SESSION_KEY, "")) if session else "",
+        str(int(time.time() // time_bucket)) if time_bucket else "",
+    ]
+    digest = hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+    return "W/" + quote_etag(f"{generation.for_request(request)}-{digest}")
+
+
+def _matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    # If-None-Match always uses weak comparison (RFC 9110 13.1.2).
+    return "*" in candidates or etag.removeprefix("W/") in {
+        candidate.removeprefix("W/") for candidate in candidates
+    }
+
+
+def conditional_get(*, time_bucket=None):
+    """Serve a GET handler with a generation ETag and 304 short-circuit."""
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            etag = _etag(request, time_bucket)
+            if _matches(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = handler(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+            response["ETag"] = etag
+            # Per-user payloads: browsers may keep them, shared caches not,
+            # and every reuse must revalidate.
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -4,14 +4,33 @@ from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema
+from rest_framework.renderers import JSONRenderer
+from rest_framework.compat import (
+    INDENT_SEPARATORS,
+    LONG_SEPARATORS,
+    SHORT_SEPARATORS,
+)
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_field
 
 from core.api_v2.exceptions import V2APIView, _envelope
 from core.api_v2.filters import SessionFilterSpec
-from core.export2 import build_format2_export
-from core.importer import run_import
+from core.archive3 import (
+    ARCHIVE_CONTENT_TYPE,
+    ARCHIVE_SUFFIX,
+    is_format3_archive,
+    iter_format3_archive,
+)
+from core.export2 import (
+    build_format2_export,
+    export_response,
+    iter_format2_compressed,
+    iter_format2_json,
+)
+from core.importer import run_import, run_import_file
 from core.importer2 import Format2ConflictError, Format2ValidationError
 from core.models import Context, Sessions
+from core.temp_uploads import discard_upload, store_upload
 from core.utils import build_project_json_from_sessions, json_compress, json_decompress
 
 
@@ -29,25 +48,36 @@ class ExportQuerySerializer(serializers.Serializer):
     note_snippet = serializers.CharField(required=False)
     compress = serializers.BooleanField(required=False, default=False)
     # "format" collides with DRF's renderer-override query param.
-    export_format = serializers.ChoiceField(required=False, choices=("1", "2"), default="2")
+    # "3" is the binary archive; ``compress`` does not apply to it.
+    export_format = serializers.ChoiceField(
+        required=False, choices=("1", "2", "3"), default="2"
+    )
     # format-1 only: emit the Autumn-CLI-compatible variant of the heritage doc
     autumn_compatible = serializers.BooleanField(required=False, default=False)
 
 
+@extend_schema_field(OpenApiTypes.BINARY)
+class ArchiveUploadField(serializers.FileField):
+    """An uploaded file, documented as its bytes rather than a URL."""
+
+
 class ImportRequestSerializer(serializers.Serializer):
     data = serializers.JSONField(required=False)
     data_compressed = serializers.CharField(required=False)
+    # A format-3 archive (``export_format=3``), sent as multipart/form-data.
+    archive = ArchiveUploadField(required=False)
     force = serializers.BooleanField(required=False, default=False)
-    # Heritage format-1 options (rejected for format-2 payloads)
+    # Heritage format-1 options (rejected for format-2 and format-3 payloads)
     merge = serializers.BooleanField(required=False, default=False)
     tolerance = serializers.IntegerField(required=False, default=2, min_value=0)
     autumn_import = serializers.BooleanField(required=False, default=False)
     context = serializers.CharField(required=False, allow_blank=True)
 
     def validate(self, attrs):
-        if ("data" in attrs) == ("data_compressed" in attrs):
+        sources = [key for key in ("data", "data_compressed", "archive") if key in attrs]
+        if len(sources) != 1:
             raise serializers.ValidationError(
-                "Provide exactly one of 'data' or 'data_compressed'."
+                "Provide exactly one of 'data', 'data_compressed' or 'archive'."
             )
         return attrs
 
@@ -94,6 +124,27 @@ class Format2DocumentSerializer(serializers.Serializer):
     projects = Format2ProjectSerializer(many=True)
 
 
+def _rendered_chunks(request, queryset, *, compress):
+    """Stream the format-2 export exactly as ``JSONRenderer`` would render it."""
+    renderer = request.accepted_renderer
+    indent = renderer.get_indent(request.accepted_media_type, {})
+    if indent is not None:
+        separators = INDENT_SEPARATORS
+    else:
+        separators = SHORT_SEPARATORS if renderer.compact else LONG_SEPARATORS
+    dumps_kwargs = {
+        "indent": indent,
+        "ensure_ascii": renderer.ensure_ascii,
+        "allow_nan": not renderer.strict,
+        "separators": separators,
+    }
+    if compress:
+        yield from iter_format2_compressed(queryset, **dumps_kwargs)
+        return
+    for chunk in iter_format2_json(queryset, **dumps_kwargs):
+        yield chunk.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+
 class ExportView(V2APIView):
     permission_classes = [IsAuthenticated]
 
@@ -116,6 +167,13 @@ class ExportView(V2APIView):
         queryset = spec.apply(
             Sessions.objects.filter(user=request.user, end_time__isnull=False)
         )
+        if request.query_params.get("export_format") == "3":
+            return export_response(
+                request,
+                iter_format3_archive(queryset),
+                filename=f"export{ARCHIVE_SUFFIX}",
+                content_type=ARCHIVE_CONTENT_TYPE,
+            )
         if request.query_params.get("export_format") == "1":
             autumn_compatible = serializers.BooleanField(
                 required=False, default=False
@@ -123,6 +181,10 @@ class ExportView(V2APIView):
             document = build_project_json_from_sessions(
                 queryset.order_by("-end_time", "id"), autumn_compatible
             )
+        elif isinstance(request.accepted_renderer, JSONRenderer):
+            return export_response(
+                request, _rendered_chunks(request, queryset, compress=compress)
+            )
         else:
             document = build_format2_export(queryset)
         return Response(json_compress(document) if compress else document)
@@ -141,7 +203,16 @@ class ImportView(V2APIView):
         serializer.is_valid(raise_exception=True)
         validated = serializer.validated_data
 
-        if "data_compressed" in validated:
+        archive_path = None
+        if "archive" in validated:
+            # The archive is read from disk in two passes, like the import
+            # command and the web import do with uploads.
+            archive_path = store_upload(validated["archive"])
+            if not is_format3_archive(archive_path):
+                discard_upload(archive_path)
+                raise ValidationError({"archive": ["Expected a format-3 archive."]})
+            import_data = None
+        elif "data_compressed" in validated:
             try:
                 import_data = json_decompress(validated["data_compressed"])
             except Exception as exc:
@@ -151,11 +222,14 @@ class ImportView(V2APIView):
         else:
             import_data = validated["data"]
 
-        is_format2 = isinstance(import_data, dict) and import_data.get("format") == 2
+        is_format2 = archive_path is not None or (
+            isinstance(import_data, dict) and import_data.get("format") == 2
+        )
         legacy_args_sent = any(
             key in request.data for key in ("merge", "tolerance", "autumn_import", "context")
         )
         if is_format2 and legacy_args_sent:
+            discard_upload(archive_path)
             raise ValidationError(
                 {
                     "non_field_errors": [
@@ -186,11 +260,14 @@ class ImportView(V2APIView):
             )
 
         try:
-            summary = run_import(
-                request.user,
-                import_data,
-                **import_kwargs,
-            )
+            if archive_path is None:
+                summary = run_import(
+                    request.user,
+                    import_data,
+                    **import_kwargs,
+                )
+            else:
+                summary = run_import_file(request.user, archive_path, **import_kwargs)
         except Format2ConflictError as exc:
             return Response(
                 _envelope(
@@ -210,7 +287,10 @@ class ImportView(V2APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         except Exception as exc:
-            raise ValidationError({"data": [str(exc)]}) from exc
+            field = "data" if archive_path is None else "archive"
+            raise ValidationError({field: [str(exc)]}) from exc
+        finally:
+            discard_upload(archive_path)
 
         payload = {
             "projects_created": summary.get("projects_created", 0),
@@ -1,26 +1,47 @@
 from __future__ import annotations
 
+from functools import wraps
+
 from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.utils import timezone as dj_timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from core import generation, report_cache
+from core import rollups as day_rollups
 from core.api_helpers import _apply_exclude_filters, _apply_tag_filters
+from core.api_v2.conditional import conditional_get
 from core.api_v2.exceptions import V2APIView
 from core.api_v2.filters import SessionFilterSpec
 from core.api_v2.serializers import (
     ChartPayloadRowSerializer,
+    ReportCacheStatsSerializer,
+    ReportChartsBatchSerializer,
     ReportHierarchySerializer,
     ReportTalliesSerializer,
     ReportTotalsSerializer,
 )
 from core.attribution import BASIS_POINTS, hierarchy_child_credit, report_attribution
-from core.chart_reports import SUPPORTED_CHARTS, build_chart_payload
+from core.chart_reports import (
+    DAILY_SERIES_CHARTS,
+    DAILY_TOTAL_CHARTS,
+    INTERVAL_CHARTS,
+    SESSION_POINT_CHARTS,
+    SUPPORTED_CHARTS,
+    build_chart_payload,
+)
 from core.models import Context, Projects, Sessions
+from core.session_frame import SessionFrame
 from core.totals import annotate_project_totals, rounded_session_minutes
-from core.utils import filter_by_active_context, filter_sessions_by_params
+from core.utils import (
+    ACTIVE_CONTEXT_SESSION_KEY,
+    filter_by_active_context,
+    filter_projects_by_params,
+    filter_sessions_by_params,
+)
 
 # Chart types the web page renders from legacy-shaped tallies/hierarchies.
 # They moved under this endpoint when the v1 API was removed (S12); the
@@ -28,6 +49,18 @@ from core.utils import filter_by_active_context, filter_sessions_by_params
 # already consumes.
 LEGACY_TALLY_CHARTS = {"pie", "bar", "context", "status", "bubble"}
 LEGACY_TREE_CHARTS = {"treemap", "radar"}
+# Charts whose payloads only need per-day/project/subproject credit, so they
+# can be summed from core.rollups instead of raw session rows.
+ROLLUP_CHARTS = DAILY_SERIES_CHARTS | DAILY_TOTAL_CHARTS | LEGACY_TALLY_CHARTS | {"treemap"}
+# Charts built from per-session rows, read from the cached SessionFrame. The
+# daily ones only fall back to it when the rollup cannot serve the filters.
+FRAME_CHARTS = (
+    SESSION_POINT_CHARTS
+    | INTERVAL_CHARTS
+    | DAILY_SERIES_CHARTS
+    | DAILY_TOTAL_CHARTS
+    | {"histogram"}
+)
 
 
 TALLY_KINDS = ("project", "subproject", "context", "status", "tag")
@@ -72,18 +105,61 @@ def _numerator_minutes(numerator):
 
 
 def _session_filter(request):
-    return SessionFilterSpec.from_query_params(request.query_params, request.user)
+    # Parsed once per request: the report cache keys on it before the view runs.
+    try:
+        return request._report_filter_spec
+    except AttributeError:
+        request._report_filter_spec = SessionFilterSpec.from_query_params(
+            request.query_params, request.user
+        )
+        return request._report_filter_spec
+
+
+def cached_report(handler):
+    """Serve a report GET from ``core.report_cache`` when nothing changed."""
+
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        session = getattr(request, "session", None)
+        key = report_cache.make_key(
+            user_id=request.user.pk,
+            spec=_session_filter(request),
+            query_params=request.query_params,
+            data_generation=generation.for_request(request),
+            zone=dj_timezone.get_current_timezone_name(),
+            active_context=(
+                session.get(ACTIVE_CONTEXT_SESSION_KEY) if session else None
+            ),
+        )
+        payload = report_cache.lookup(key)
+        if payload is not None:
+            response = Response(payload)
+            response["X-Report-Cache"] = "hit"
+            return response
+        response = handler(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            report_cache.store(key, response.data)
+        response["X-Report-Cache"] = "miss"
+        return response
 
+    return wrapper
 
-def _filtered_completed_sessions(request):
+
+def _filtered_completed_sessions(request, spec=None):
     sessions = Sessions.objects.filter(
         user=request.user,
         end_time__isnull=False,
     )
-    sessions = _session_filter(request).apply(sessions)
+    sessions = (spec or _session_filter(request)).apply(sessions)
     return Sessions.objects.filter(pk__in=sessions.order_by().values("pk")).order_by()
 
 
+def _attribution(sessions, rollups=None):
+    if rollups is not None:
+        return day_rollups.rollup_attribution(rollups)
+    return report_attribution(sessions)
+
+
 def _ordered(entries):
     return sorted(
         entries,
@@ -99,11 +175,18 @@ class ReportTotalsView(V2APIView):
     permission_classes = [IsAuthenticated]
 
     @extend_schema(parameters=FILTER_PARAMETERS, responses=ReportTotalsSerializer)
+    @conditional_get(time_bucket=60)
+    @cached_report
     def get(self, request):
-        aggregate = _filtered_completed_sessions(request).aggregate(
-            total=Sum(_duration_expression()),
-            session_count=Count("pk"),
-        )
+        spec = _session_filter(request)
+        rollups = day_rollups.scoped_rollups(request.user, spec)
+        if rollups is not None:
+            aggregate = day_rollups.rollup_totals(rollups)
+        else:
+            aggregate = _filtered_completed_sessions(request, spec).aggregate(
+                total=Sum(_duration_expression()),
+                session_count=Count("pk"),
+            )
         return Response(
             {
                 "total_minutes": _minutes(aggregate["total"]),
@@ -128,6 +211,8 @@ class ReportTalliesView(V2APIView):
         ],
         responses=ReportTalliesSerializer,
     )
+    @conditional_get(time_bucket=60)
+    @cached_report
     def get(self, request):
         tally_kind = (request.query_params.get("by") or "").strip().lower()
         if tally_kind not in TALLY_KINDS:
@@ -135,17 +220,21 @@ class ReportTalliesView(V2APIView):
                 {"by": ["Choose project, subproject, context, status, or tag."]}
             )
 
-        sessions = _filtered_completed_sessions(request)
+        spec = _session_filter(request)
+        rollups = day_rollups.scoped_rollups(request.user, spec)
+        sessions = _filtered_completed_sessions(request, spec)
         if tally_kind == "subproject":
-            entries = self._subproject_entries(sessions)
+            entries = self._subproject_entries(_attribution(sessions, rollups))
         else:
-            entries = self._full_duration_entries(sessions, tally_kind)
+            entries = self._full_duration_entries(
+                sessions, tally_kind, rollups=rollups
+            )
         return Response({"by": tally_kind, "entries": _ordered(entries)})
 
     @staticmethod
-    def _subproject_entries(sessions):
+    def _subproject_entries(attribution):
         entries = []
-        for project in report_attribution(sessions).values():
+        for project in attribution.values():
             for child in project["children"].values():
                 entry = {
                     "kind": "subproject",
@@ -171,7 +260,7 @@ class ReportTalliesView(V2APIView):
         return entries
 
     @staticmethod
-    def _full_duration_entries(sessions, tally_kind):
+    def _full_duration_entries(sessions, tally_kind, *, rollups=None):
         fields = {
             "project": ("project_id", "project__name"),
             "context": ("project__context_id", "project__context__name"),
@@ -179,16 +268,19 @@ class ReportTalliesView(V2APIView):
             "tag": ("project__tags__id", "project__tags__name"),
         }
         id_field, name_field = fields[tally_kind]
-        source = sessions
+        source = sessions if rollups is None else rollups
         if tally_kind == "tag":
             source = source.filter(project__tags__isnull=False)
         value_fields = [name_field]
         if id_field:
             value_fields.insert(0, id_field)
-        rows = source.values(*value_fields).annotate(
-            total=Sum(_duration_expression()),
-            session_count=Count("pk"),
-        )
+        if rollups is not None:
+            rows = day_rollups.duration_rows(source, *value_fields)
+        else:
+            rows = source.values(*value_fields).annotate(
+                total=Sum(_duration_expression()),
+                session_count=Count("pk"),
+            )
         entries = []
         for row in rows:
             entry_id = row[id_field] if id_field else None
@@ -210,11 +302,16 @@ class ReportHierarchyView(V2APIView):
     permission_classes = [IsAuthenticated]
 
     @extend_schema(parameters=FILTER_PARAMETERS, responses=ReportHierarchySerializer)
+    @conditional_get(time_bucket=60)
+    @cached_report
     def get(self, request):
+        spec = _session_filter(request)
+        rollups = day_rollups.scoped_rollups(request.user, spec)
+        attribution = _attribution(
+            _filtered_completed_sessions(request, spec), rollups
+        )
         projects = []
-        for project in report_attribution(
-            _filtered_completed_sessions(request)
-        ).values():
+        for project in attribution.values():
             children = [
                 {
                     "kind": "subproject",
@@ -253,6 +350,29 @@ class ReportHierarchyView(V2APIView):
         return Response({"projects": projects})
 
 
+CHART_PARAMETERS = [
+    OpenApiParameter("project_name", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("context", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("tags", OpenApiTypes.INT, OpenApiParameter.QUERY, many=True),
+    OpenApiParameter(
+        "include_projects",
+        OpenApiTypes.INT,
+        OpenApiParameter.QUERY,
+        many=True,
+    ),
+    OpenApiParameter(
+        "exclude_projects",
+        OpenApiTypes.INT,
+        OpenApiParameter.QUERY,
+        many=True,
+    ),
+]
+ALL_CHARTS = SUPPORTED_CHARTS | LEGACY_TALLY_CHARTS | LEGACY_TREE_CHARTS
+# Above this many matching sessions the batch endpoint keeps the id subquery
+# rather than binding a huge IN list into every chart query.
+BATCH_MATERIALIZED_ID_LIMIT = 5000
+
+
 class ReportChartsView(V2APIView):
     permission_classes = [IsAuthenticated]
 
@@ -266,34 +386,55 @@ class ReportChartsView(V2APIView):
                 location=OpenApiParameter.QUERY,
                 required=True,
             ),
-            OpenApiParameter("project_name", OpenApiTypes.STR, OpenApiParameter.QUERY),
-            OpenApiParameter("context", OpenApiTypes.INT, OpenApiParameter.QUERY),
-            OpenApiParameter("tags", OpenApiTypes.INT, OpenApiParameter.QUERY, many=True),
-            OpenApiParameter(
-                "include_projects",
-                OpenApiTypes.INT,
-                OpenApiParameter.QUERY,
-                many=True,
-            ),
-            OpenApiParameter(
-                "exclude_projects",
-                OpenApiTypes.INT,
-                OpenApiParameter.QUERY,
-                many=True,
-            ),
+            *CHART_PARAMETERS,
         ],
         responses=ChartPayloadRowSerializer(many=True),
     )
+    @conditional_get(time_bucket=60)
+    @cached_report
     def get(self, request):
         chart_type = (request.query_params.get("chart_type") or "").strip().lower()
-        if chart_type not in SUPPORTED_CHARTS | LEGACY_TALLY_CHARTS | LEGACY_TREE_CHARTS:
+        if chart_type not in ALL_CHARTS:
             raise ValidationError({"chart_type": ["Unsupported chart_type."]})
 
-        sessions = Sessions.objects.filter(
+        spec = _session_filter(request)
+        sessions, narrowed = self._filtered_sessions(request, spec)
+        rollups = None
+        if chart_type in ROLLUP_CHARTS:
+            rollups = day_rollups.scoped_rollups(
+                request.user, spec, projects=self._legacy_project_scope(request)
+            )
+        frame = None
+        if self._needs_frame(chart_type, rollups, narrowed):
+            frame = self._session_frame(request)
+        return Response(self._payload(request, chart_type, sessions, rollups, frame))
+
+    @staticmethod
+    def _needs_frame(chart_type, rollups, narrowed):
+        # Frames hold whole histories; narrowed charts stay on indexed queries.
+        return (
+            not narrowed
+            and chart_type in FRAME_CHARTS
+            and (rollups is None or chart_type not in ROLLUP_CHARTS)
+        )
+
+    @staticmethod
+    def _session_frame(request):
+        return SessionFrame.for_user(request.user, generation.for_request(request))
+
+    @staticmethod
+    def _filtered_sessions(request, spec):
+        """Return ``(sessions, narrowed)``.
+
+        ``narrowed`` is false when no filter applied, so the queryset holds every
+        completed session of the user. Each filter helper hands back the very
+        queryset it was given when it has nothing to apply.
+        """
+        base = Sessions.objects.filter(
             user=request.user,
             end_time__isnull=False,
         )
-        sessions = _session_filter(request).apply(sessions)
+        sessions = spec.apply(base)
 
         # The web page still selects projects by name and uses its established
         # context/tag/exclusion controls. Dates are deliberately omitted here:
@@ -323,36 +464,69 @@ class ReportChartsView(V2APIView):
             sessions,
             params_override=legacy_params,
         )
-        sessions = Sessions.objects.filter(
-            pk__in=sessions.order_by().values("pk")
-        ).order_by()
+        narrowed = sessions is not base
+        return (
+            Sessions.objects.filter(pk__in=sessions.order_by().values("pk")).order_by(),
+            narrowed,
+        )
 
+    @classmethod
+    def _payload(cls, request, chart_type, sessions, rollups=None, frame=None):
         want_subprojects = bool(
             (request.query_params.get("project_name") or "").strip()
         )
         if chart_type in LEGACY_TALLY_CHARTS:
-            return Response(
-                self._legacy_tally_payload(
-                    chart_type, sessions, want_subprojects, request.user
-                )
+            return cls._legacy_tally_payload(
+                chart_type, sessions, want_subprojects, request.user, rollups
             )
         if chart_type == "treemap":
-            return Response(self._legacy_hierarchy_payload(request, sessions))
+            return cls._legacy_hierarchy_payload(request, sessions, rollups)
         if chart_type == "radar":
-            return Response(self._legacy_radar_payload(request, sessions))
+            return cls._legacy_radar_payload(request, sessions)
 
-        payload = build_chart_payload(
+        return build_chart_payload(
             chart_type,
             sessions,
             use_subprojects=want_subprojects,
+            rollups=rollups,
+            frame=frame,
+        )
+
+    @staticmethod
+    def _legacy_project_scope(request):
+        """The page's context/tag/name/project filters as a project set.
+
+        Every legacy filter except dates and note snippets selects whole
+        projects, so the same pipeline run over ``Projects`` scopes the day
+        rollup; ``SessionFilterSpec`` still owns the dates and note snippets.
+        """
+        projects = Projects.objects.filter(user=request.user)
+        projects = filter_by_active_context(
+            projects,
+            request,
+            override_context_id=request.query_params.get("context"),
         )
-        return Response(payload)
+        projects = _apply_tag_filters(
+            request.query_params,
+            projects,
+            kind="projects",
+            user=request.user,
+        )
+        projects = _apply_exclude_filters(
+            request.query_params,
+            projects,
+            kind="projects",
+            user=request.user,
+        )
+        return filter_projects_by_params(projects, request.query_params)
 
     @staticmethod
-    def _legacy_tally_payload(chart_type, sessions, want_subprojects, user):
+    def _legacy_tally_payload(chart_type, sessions, want_subprojects, user, rollups=None):
         """[{"name", "total_time"}] rows exactly as the removed v1 tallies."""
         if chart_type in ("pie", "bar") and want_subprojects:
-            entries = ReportTalliesView._subproject_entries(sessions)
+            entries = ReportTalliesView._subproject_entries(
+                _attribution(sessions, rollups)
+            )
             buckets: dict[str, float] = {}
             for entry in entries:
                 name = entry["name"] if entry["kind"] != "residual" else "no subproject"
@@ -372,11 +546,15 @@ class ReportChartsView(V2APIView):
                 .annotate(count=Count("pk", distinct=True), first=Min("name"))
                 .order_by("first", "status")
             )
-            status_times = {
-                row["project__status"]: _minutes(row["total"])
-                for row in sessions.values("project__status").annotate(
+            if rollups is not None:
+                status_rows = day_rollups.duration_rows(rollups, "project__status")
+            else:
+                status_rows = sessions.values("project__status").annotate(
                     total=Sum(_duration_expression())
                 )
+            status_times = {
+                row["project__status"]: _minutes(row["total"])
+                for row in status_rows
             }
             return [
                 {
@@ -388,6 +566,28 @@ class ReportChartsView(V2APIView):
             ]
         if chart_type == "bubble":
             # v1 shape: tag rows with project counts and colors.
+            tag_fields = (
+                "project__tags__id",
+                "project__tags__name",
+                "project__tags__color",
+            )
+            if rollups is not None:
+                tag_rows = day_rollups.duration_rows(
+                    rollups.filter(project__tags__isnull=False),
+                    *tag_fields,
+                    ordering=["project__tags__name"],
+                    project_count=Count("project_id", distinct=True),
+                )
+            else:
+                tag_rows = (
+                    sessions.filter(project__tags__isnull=False)
+                    .values(*tag_fields)
+                    .annotate(
+                        total=Sum(_duration_expression()),
+                        project_count=Count("project_id", distinct=True),
+                    )
+                    .order_by("project__tags__name")
+                )
             return [
                 {
                     "name": row["project__tags__name"],
@@ -396,38 +596,35 @@ class ReportChartsView(V2APIView):
                     "project_count": row["project_count"],
                     "color": row["project__tags__color"] or None,
                 }
-                for row in sessions.filter(project__tags__isnull=False)
-                .values(
-                    "project__tags__id",
-                    "project__tags__name",
-                    "project__tags__color",
-                )
-                .annotate(
-                    total=Sum(_duration_expression()),
-                    project_count=Count("project_id", distinct=True),
-                )
-                .order_by("project__tags__name")
+                for row in tag_rows
             ]
         kind = {"pie": "project", "bar": "project", "context": "context"}[chart_type]
-        entries = ReportTalliesView._full_duration_entries(sessions, kind)
+        entries = ReportTalliesView._full_duration_entries(
+            sessions, kind, rollups=rollups
+        )
         return [
             {"name": entry["name"], "total_time": entry["total_minutes"]}
             for entry in entries
         ]
 
     @staticmethod
-    def _legacy_hierarchy_payload(request, sessions):
+    def _legacy_hierarchy_payload(request, sessions, rollups=None):
         """The removed v1 hierarchy shape consumed by the treemap chart."""
         user = request.user
-        project_times = {
-            row["project_id"]: _minutes(row["total"])
-            for row in sessions.values("project_id").annotate(
+        if rollups is not None:
+            project_rows = day_rollups.duration_rows(rollups, "project_id")
+            child_rows = day_rollups.child_credit(rollups)
+        else:
+            project_rows = sessions.values("project_id").annotate(
                 total=Sum(_duration_expression())
             )
+            child_rows = hierarchy_child_credit(sessions)
+        project_times = {
+            row["project_id"]: _minutes(row["total"]) for row in project_rows
         }
         subproject_times = {
             row["subproject_id"]: _numerator_minutes(row["total_numerator"])
-            for row in hierarchy_child_credit(sessions)
+            for row in child_rows
         }
 
         projects = Projects.objects.filter(user=user)
@@ -480,8 +677,6 @@ class ReportChartsView(V2APIView):
     @staticmethod
     def _legacy_radar_payload(request, sessions):
         """The removed v1 projects_with_stats rows the radar chart reads."""
-        from django.utils import timezone as dj_timezone
-
         user = request.user
         projects = Projects.objects.filter(user=user)
         include_ids = request.query_params.getlist("include_projects")
@@ -525,3 +720,95 @@ class ReportChartsView(V2APIView):
                 }
             )
         return payload
+
+
+class ReportChartsBatchView(V2APIView):
+    """Several chart payloads over one resolved filter pipeline.
+
+    The charts page used to pay for the whole filter pipeline (spec parsing,
+    active context, tags, exclusions, legacy params) once per chart type.
+    Here it runs once, the matching session ids are materialized, and every
+    requested payload is built from that set.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            *FILTER_PARAMETERS,
+            OpenApiParameter(
+                name="chart_types",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description=(
+                    "Comma-separated chart types: "
+                    + ", ".join(sorted(ALL_CHARTS))
+                    + "."
+                ),
+            ),
+            *CHART_PARAMETERS,
+        ],
+        responses=ReportChartsBatchSerializer,
+    )
+    @conditional_get(time_bucket=60)
+    @cached_report
+    def get(self, request):
+        raw_types = request.query_params.get("chart_types") or ""
+        chart_types = list(
+            dict.fromkeys(
+                part.strip().lower() for part in raw_types.split(",") if part.strip()
+            )
+        )
+        if not chart_types:
+            raise ValidationError(
+                {"chart_types": ["Provide one or more comma-separated chart types."]}
+            )
+        unsupported = [chart_type for chart_type in chart_types if chart_type not in ALL_CHARTS]
+        if unsupported:
+            raise ValidationError(
+                {"chart_types": [f"Unsupported chart_type: {', '.join(unsupported)}."]}
+            )
+
+        spec = _session_filter(request)
+        sessions, narrowed = ReportChartsView._filtered_sessions(request, spec)
+        session_ids = list(
+            sessions.values_list("pk", flat=True)[: BATCH_MATERIALIZED_ID_LIMIT + 1]
+        )
+        if len(session_ids) <= BATCH_MATERIALIZED_ID_LIMIT:
+            sessions = Sessions.objects.filter(pk__in=session_ids).order_by()
+
+        rollups = None
+        if ROLLUP_CHARTS.intersection(chart_types):
+            rollups = day_rollups.scoped_rollups(
+                request.user,
+                spec,
+                projects=ReportChartsView._legacy_project_scope(request),
+            )
+        frame = None
+        if any(
+            ReportChartsView._needs_frame(chart_type, rollups, narrowed)
+            for chart_type in chart_types
+        ):
+            frame = ReportChartsView._session_frame(request)
+        return Response(
+            {
+                "charts": {
+                    chart_type: ReportChartsView._payload(
+                        request, chart_type, sessions, rollups, frame
+                    )
+                    for chart_type in chart_types
+                }
+            }
+        )
+
+
+class ReportCacheStatsView(V2APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        operation_id="reports_cache_stats",
+        responses=ReportCacheStatsSerializer,
+    )
+    def get(self, request):
+        return Response(report_cache.stats())
@@ -1,4 +1,5 @@
-from datetime import timezone as datetime_timezone
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta, timezone as datetime_timezone
 
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
@@ -166,6 +167,39 @@ class SessionTrackRequestSerializer(serializers.Serializer):
     )
 
 
+class SessionBulkRequestSerializer(serializers.Serializer):
+    MAX_ITEMS = 5000
+
+    # Each item is validated on its own as a SessionTrackRequest, so one bad
+    # item is reported in its result instead of rejecting the batch.
+    sessions = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_ITEMS,
+        help_text=f"Up to {MAX_ITEMS} track payloads (`POST /sessions/` bodies).",
+    )
+
+
+class SessionBulkErrorSerializer(serializers.Serializer):
+    code = serializers.CharField()
+    message = serializers.CharField()
+    details = serializers.JSONField(allow_null=True)
+
+
+class SessionBulkResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=["created", "existing", "error"])
+    session = SessionResourceSerializer(allow_null=True)
+    error = SessionBulkErrorSerializer(allow_null=True)
+
+
+class SessionBulkResponseSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    existing = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    results = SessionBulkResultSerializer(many=True)
+
+
 class SessionPatchRequestSerializer(serializers.Serializer):
     project_id = serializers.IntegerField(required=False, min_value=1)
     start = UTCDateTimeField(required=False)
@@ -184,9 +218,36 @@ class TimerListResponseSerializer(serializers.Serializer):
     timers = SessionResourceSerializer(many=True)
 
 
+@extend_schema_field({"type": "string"})
+class SessionCursorField(serializers.Field):
+    """An opaque keyset position: the ``(end_time, id)`` of a page's last session."""
+
+    default_error_messages = {"invalid": "Invalid cursor."}
+    EPOCH = datetime(1970, 1, 1, tzinfo=datetime_timezone.utc)
+
+    def to_representation(self, value):
+        end_time, pk = value
+        microseconds = (end_time - self.EPOCH) // timedelta(microseconds=1)
+        token = urlsafe_b64encode(f"{microseconds}:{pk}".encode())
+        return token.decode().rstrip("=")
+
+    def to_internal_value(self, value):
+        try:
+            raw = urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+            microseconds, pk = (int(part) for part in raw.split(":"))
+            return self.EPOCH + timedelta(microseconds=microseconds), pk
+        except (TypeError, ValueError, OverflowError):
+            self.fail("invalid")
+
+
 class SessionListResponseSerializer(serializers.Serializer):
     count = serializers.IntegerField()
-    total = serializers.IntegerField()
+    # Null when the request passed total=false.
+    total = serializers.IntegerField(allow_null=True)
+    next_cursor = SessionCursorField(
+        allow_null=True,
+        help_text="Pass as `cursor` to fetch the next page; null on the last page.",
+    )
     sessions = SessionResourceSerializer(many=True)
 
 
@@ -197,6 +258,15 @@ class CommitmentHistoryWarningSerializer(serializers.Serializer):
 class SessionListQuerySerializer(serializers.Serializer):
     limit = serializers.IntegerField(required=False, default=100, min_value=1, max_value=500)
     offset = serializers.IntegerField(required=False, default=0, min_value=0)
+    cursor = SessionCursorField(
+        required=False,
+        help_text="A previous page's `next_cursor`; seeks instead of skipping `offset` rows.",
+    )
+    total = serializers.BooleanField(
+        required=False,
+        default=True,
+        help_text="Set false to skip counting all matches; `total` is then null.",
+    )
     include = serializers.ChoiceField(required=False, choices=("note",))
     project_ids = serializers.CharField(required=False)
     subproject_ids = serializers.CharField(required=False)
@@ -211,6 +281,13 @@ class SessionListQuerySerializer(serializers.Serializer):
     note_snippet = serializers.CharField(required=False)
     uuid = serializers.UUIDField(required=False)
 
+    def validate(self, attrs):
+        if "cursor" in attrs and attrs["offset"]:
+            raise serializers.ValidationError(
+                {"offset": ["Cannot be combined with cursor."]}
+            )
+        return attrs
+
 
 COMMITMENT_AGGREGATION_CHOICES = ("project", "subproject", "context", "tag")
 COMMITMENT_TYPE_CHOICES = ("time", "sessions")
@@ -380,6 +457,10 @@ class CommitmentResourceSerializer(serializers.Serializer):
     current_period = CommitmentCurrentPeriodSerializer()
     pending_revision = CommitmentPendingRevisionSerializer(allow_null=True)
     ledger_start_at = UTCDateTimeField()
+    last_reconciled = UTCDateTimeField(allow_null=True)
+    # True while the ledger awaits commitments_worker; balance and streak then
+    # reflect last_reconciled rather than the latest sessions.
+    stale = serializers.BooleanField()
     # Present on detail responses and list responses with ?include=streak.
     streak = serializers.DictField(required=False)
 
@@ -668,6 +749,40 @@ class SubprojectListResponseSerializer(serializers.Serializer):
     subprojects = SubprojectResourceSerializer(many=True)
 
 
+class ChangeFeedQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text=(
+            "The `next_since` of the previous response. Omit to read the current "
+            "sequence without changes, e.g. just before a full list pull."
+        ),
+    )
+    limit = serializers.IntegerField(
+        required=False, default=500, min_value=1, max_value=1000
+    )
+
+
+class ChangeFeedTombstonesSerializer(serializers.Serializer):
+    sessions = serializers.ListField(child=serializers.IntegerField())
+    projects = serializers.ListField(child=serializers.IntegerField())
+    subprojects = serializers.ListField(child=serializers.IntegerField())
+
+
+class ChangeFeedResponseSerializer(serializers.Serializer):
+    since = serializers.IntegerField()
+    next_since = serializers.IntegerField(
+        help_text="Pass as `since` on the next poll."
+    )
+    has_more = serializers.BooleanField(
+        help_text="More changes are already waiting; poll again immediately."
+    )
+    sessions = SessionResourceSerializer(many=True)
+    projects = ProjectResourceSerializer(many=True)
+    subprojects = SubprojectResourceSerializer(many=True)
+    deleted = ChangeFeedTombstonesSerializer()
+
+
 class MeUserSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     username = serializers.CharField()
@@ -685,6 +800,11 @@ class ReportTotalsSerializer(serializers.Serializer):
     session_count = serializers.IntegerField()
 
 
+class ReportCacheStatsSerializer(serializers.Serializer):
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+
+
 class ReportTallyEntrySerializer(serializers.Serializer):
     kind = serializers.ChoiceField(
         choices=("subproject", "residual"), required=False
@@ -734,3 +854,8 @@ class ChartPayloadRowSerializer(serializers.Serializer):
     count = serializers.IntegerField(required=False)
     text = serializers.CharField(required=False)
     weight = serializers.IntegerField(required=False)
+
+
+class ReportChartsBatchSerializer(serializers.Serializer):
+    # Keyed by chart_type; each value has that chart's single-chart shape.
+    charts = serializers.DictField(child=serializers.JSONField())
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from core.api_v2.views import (
+    ChangesView,
     ContextDetailView,
     ContextsView,
     MeView,
@@ -8,6 +9,7 @@ from core.api_v2.views import (
     ProjectMergeView,
     ProjectsView,
     ProjectSubprojectsView,
+    SessionBulkView,
     SessionDetailView,
     SessionsView,
     TimerDetailView,
@@ -27,6 +29,8 @@ from core.api_v2.commitments import (
     CommitmentsView,
 )
 from core.api_v2.reports import (
+    ReportCacheStatsView,
+    ReportChartsBatchView,
     ReportChartsView,
     ReportHierarchyView,
     ReportTalliesView,
@@ -39,6 +43,7 @@ app_name = "api_v2"
 
 urlpatterns = [
     path("me/", MeView.as_view(), name="me"),
+    path("changes/", ChangesView.as_view(), name="changes"),
     path("export/", ExportView.as_view(), name="export"),
     path("import/", ImportView.as_view(), name="import"),
     path("commitments/", CommitmentsView.as_view(), name="commitments"),
@@ -71,6 +76,11 @@ urlpatterns = [
     path("tags/", TagsView.as_view(), name="tags"),
     path("tags/<int:tag_id>", TagDetailView.as_view(), name="tag-detail"),
     path("reports/totals/", ReportTotalsView.as_view(), name="report-totals"),
+    path(
+        "reports/cache/",
+        ReportCacheStatsView.as_view(),
+        name="report-cache-stats",
+    ),
     path("reports/tallies/", ReportTalliesView.as_view(), name="report-tallies"),
     path(
         "reports/hierarchy/",
@@ -78,6 +88,11 @@ urlpatterns = [
         name="report-hierarchy",
     ),
     path("reports/charts/", ReportChartsView.as_view(), name="report-charts"),
+    path(
+        "reports/charts/batch/",
+        ReportChartsBatchView.as_view(),
+        name="report-charts-batch",
+    ),
     path("timers/", TimersView.as_view(), name="timers"),
     path("timers/<int:session_id>", TimerDetailView.as_view(), name="timer-detail"),
     path(
@@ -91,6 +106,7 @@ urlpatterns = [
         name="timer-restart",
     ),
     path("sessions/", SessionsView.as_view(), name="sessions"),
+    path("sessions/bulk/", SessionBulkView.as_view(), name="sessions-bulk"),
     path(
         "sessions/<int:session_id>",
         SessionDetailView.as_view(),
@@ -1,22 +1,36 @@
+from collections import Counter
 from datetime import datetime, time, timedelta, timezone as datetime_timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
-from django.db.models import Count, FloatField, Prefetch, Q, Sum, Value
+from django.db.models import (
+    Count,
+    FloatField,
+    Prefetch,
+    Q,
+    Sum,
+    Value,
+    prefetch_related_objects,
+)
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import serializers, status
-from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.exceptions import APIException, NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from core.api_v2.exceptions import V2APIView, _envelope
+from core import changelog, generation
+from core.api_v2.conditional import conditional_get
+from core.api_v2.exceptions import V2APIView, _envelope, v2_exception_handler
 from core.api_v2.filters import SessionFilterSpec
 from core.api_v2.serializers import (
+    ChangeFeedQuerySerializer,
+    ChangeFeedResponseSerializer,
     ContextListResponseSerializer,
     ContextResourceSerializer,
     ContextWriteRequestSerializer,
@@ -29,6 +43,9 @@ from core.api_v2.serializers import (
     ProjectMergeRequestSerializer,
     ProjectPatchRequestSerializer,
     ProjectResourceSerializer,
+    SessionBulkRequestSerializer,
+    SessionBulkResponseSerializer,
+    SessionCursorField,
     SessionListQuerySerializer,
     SessionListResponseSerializer,
     SessionPatchRequestSerializer,
@@ -49,7 +66,15 @@ from core.api_v2.serializers import (
     TimerStopRequestSerializer,
 )
 from core.commitments import mutation_affects_ledger
-from core.models import Commitment, Context, Projects, Sessions, SubProjects, Tag
+from core.models import (
+    ChangeLogEntry,
+    Commitment,
+    Context,
+    Projects,
+    Sessions,
+    SubProjects,
+    Tag,
+)
 from core.services import (
     DestructiveMutationService,
     DestructiveOperationError,
@@ -60,7 +85,6 @@ from core.services import (
 )
 from core.session_canonical import (
     canonical_existing_session,
-    canonical_instant,
     canonical_session_content,
 )
 from core.totals import (
@@ -152,14 +176,27 @@ def _resolve_project(user, project_id):
         raise NotFound(f"Project {project_id} not found.") from exc
 
 
-def _resolve_subprojects(user, project, subproject_ids):
+def _resolve_subprojects(user, project, subproject_ids, candidates=None):
+    """``subproject_ids`` as rows of ``project``, ordered by id.
+
+    ``candidates`` (id -> ``SubProjects``, already scoped to ``user``) lets a
+    batch resolve every item from one query instead of one per item.
+    """
     requested_ids = set(subproject_ids)
-    subprojects = list(
-        SubProjects.objects.filter(
+    if candidates is None:
+        candidates = SubProjects.objects.filter(
             user=user,
             parent_project=project,
             id__in=requested_ids,
-        ).order_by("id")
+        ).in_bulk()
+    subprojects = sorted(
+        (
+            candidates[subproject_id]
+            for subproject_id in requested_ids
+            if subproject_id in candidates
+            and candidates[subproject_id].parent_project_id == project.id
+        ),
+        key=lambda subproject: subproject.id,
     )
     resolved_ids = {subproject.id for subproject in subprojects}
     if resolved_ids != requested_ids:
@@ -175,10 +212,6 @@ def _resolve_subprojects(user, project, subproject_ids):
     return subprojects
 
 
-def _canonical_instant(value):
-    return canonical_instant(value)
-
-
 def _canonical_existing(session):
     return canonical_existing_session(session)
 
@@ -193,13 +226,13 @@ def _canonical_track_payload(project, allocations, data):
     )
 
 
-def _explicit_allocation_pairs(user, project, items):
+def _explicit_allocation_pairs(user, project, items, candidates=None):
     ids = [item["subproject_id"] for item in items]
     if len(ids) != len(set(ids)):
         raise ValidationError(
             {"subproject_allocations": ["Subprojects must be unique."]}
         )
-    subprojects = _resolve_subprojects(user, project, ids)
+    subprojects = _resolve_subprojects(user, project, ids, candidates)
     by_id = {subproject.id: subproject for subproject in subprojects}
     allocations = [
         (by_id[item["subproject_id"]], item["allocation_bp"])
@@ -221,6 +254,49 @@ def _even_allocation_pairs(subprojects):
     return [(subproject, split[subproject.id]) for subproject in subprojects]
 
 
+def _track_target(user, data, *, projects=None, candidates=None):
+    """Validate a track payload; return its ``(project, allocations)``.
+
+    ``projects`` and ``candidates`` (id -> row maps scoped to ``user``) let
+    the bulk endpoint resolve a whole batch from two queries.
+    """
+    if projects is None:
+        project = _resolve_project(user, data["project_id"])
+    elif data["project_id"] in projects:
+        project = projects[data["project_id"]]
+    else:
+        raise NotFound(f"Project {data['project_id']} not found.")
+    if "subproject_allocations" in data:
+        allocations = _explicit_allocation_pairs(
+            user, project, data["subproject_allocations"], candidates
+        )
+    else:
+        allocations = _even_allocation_pairs(
+            _resolve_subprojects(
+                user, project, data.get("subproject_ids", []), candidates
+            )
+        )
+    if data["end"] < data["start"]:
+        raise ValidationError({"end": ["End must be on or after start."]})
+    _validate_not_future(data["end"], "end")
+    return project, allocations
+
+
+def _track_fields(project, allocations, data):
+    """``create_session`` keywords (without ``user``) for a track payload."""
+    fields = {
+        "project": project,
+        "allocations": allocations,
+        "start_time": data["start"],
+        "end_time": data["end"],
+        "is_active": False,
+        "note": data.get("note"),
+    }
+    if "uuid" in data:
+        fields["uuid"] = data["uuid"]
+    return fields
+
+
 def _subproject_queryset(user):
     return annotate_subproject_totals(
         SubProjects.objects.filter(user=user).annotate(
@@ -370,6 +446,8 @@ class MeView(V2APIView):
                     "commitments",
                     "export",
                     "import",
+                    "changes",
+                    "sessions_bulk",
                 ],
                 "user": {
                     "id": request.user.id,
@@ -411,6 +489,13 @@ def _apply_named_write(target, validated, *, extra_field):
         setattr(target, extra_field, validated[extra_field])
         update_fields.append(extra_field)
     target.save(update_fields=update_fields)
+    generation.bump(target.user_id)
+    if "name" in validated:
+        # Project payloads embed their context and tag names.
+        changelog.record(
+            target.user_id,
+            projects=target.projects.values_list("pk", flat=True),
+        )
 
 
 def _named_count_queryset(model, user):
@@ -461,6 +546,7 @@ class ContextsView(V2APIView):
         operation_id="contexts_list",
         responses=ContextListResponseSerializer,
     )
+    @conditional_get()
     def get(self, request):
         contexts = list(_named_count_queryset(Context, request.user))
         return Response(
@@ -492,6 +578,7 @@ class ContextsView(V2APIView):
             name=name,
             description=serializer.validated_data.get("description"),
         )
+        generation.bump(request.user.pk)
         return Response(
             {
                 "id": context.id,
@@ -563,6 +650,7 @@ class TagsView(V2APIView):
         operation_id="tags_list",
         responses=TagListResponseSerializer,
     )
+    @conditional_get()
     def get(self, request):
         tags = list(_named_count_queryset(Tag, request.user))
         return Response(
@@ -592,6 +680,7 @@ class TagsView(V2APIView):
             name=name,
             color=serializer.validated_data.get("color"),
         )
+        generation.bump(request.user.pk)
         return Response(
             {
                 "id": tag.id,
@@ -881,25 +970,43 @@ class SessionsView(V2APIView):
         pagination = SessionListQuerySerializer(
             data={
                 key: request.query_params[key]
-                for key in ("limit", "offset", "include")
+                for key in ("limit", "offset", "cursor", "total", "include")
                 if key in request.query_params
             }
         )
         pagination.is_valid(raise_exception=True)
         limit = pagination.validated_data["limit"]
         offset = pagination.validated_data["offset"]
+        cursor = pagination.validated_data.get("cursor")
         include_note = pagination.validated_data.get("include") == "note"
 
         spec = SessionFilterSpec.from_query_params(request.query_params, request.user)
         queryset = spec.apply(
             _session_queryset(request.user).filter(end_time__isnull=False)
         ).order_by("-end_time", "-id")
-        total = queryset.count()
-        sessions = list(queryset[offset : offset + limit])
+        total = queryset.count() if pagination.validated_data["total"] else None
+        if cursor is not None:
+            # Seek past the cursor in (-end_time, -id) order. The end_time
+            # bound is a range scan on sess_completed_user_end_idx; the id
+            # tie-break only applies within that one instant.
+            end_time, pk = cursor
+            queryset = queryset.filter(
+                Q(end_time__lt=end_time) | Q(end_time=end_time, id__lt=pk),
+                end_time__lte=end_time,
+            )
+        # One extra row tells whether a next page exists without counting.
+        sessions = list(queryset[offset : offset + limit + 1])
+        next_cursor = None
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            next_cursor = SessionCursorField().to_representation(
+                (sessions[-1].end_time, sessions[-1].pk)
+            )
         return Response(
             {
                 "count": len(sessions),
                 "total": total,
+                "next_cursor": next_cursor,
                 "sessions": [
                     _serialize(session, include_note=include_note)
                     for session in sessions
@@ -918,20 +1025,7 @@ class SessionsView(V2APIView):
         serializer = SessionTrackRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
-        project = _resolve_project(request.user, data["project_id"])
-        if "subproject_allocations" in data:
-            allocations = _explicit_allocation_pairs(
-                request.user, project, data["subproject_allocations"]
-            )
-            subprojects = [subproject for subproject, _ in allocations]
-        else:
-            subprojects = _resolve_subprojects(
-                request.user, project, data.get("subproject_ids", [])
-            )
-            allocations = _even_allocation_pairs(subprojects)
-        if data["end"] < data["start"]:
-            raise ValidationError({"end": ["End must be on or after start."]})
-        _validate_not_future(data["end"], "end")
+        project, allocations = _track_target(request.user, data)
 
         if "uuid" in data:
             existing = _session_queryset(request.user).filter(uuid=data["uuid"]).first()
@@ -949,21 +1043,174 @@ class SessionsView(V2APIView):
                     status=status.HTTP_409_CONFLICT,
                 )
 
-        fields = {
-            "user": request.user,
-            "project": project,
-            "allocations": allocations,
-            "start_time": data["start"],
-            "end_time": data["end"],
-            "is_active": False,
-            "note": data.get("note"),
-        }
-        if "uuid" in data:
-            fields["uuid"] = data["uuid"]
-        session = SessionMutationService.create_session(**fields)
+        session = SessionMutationService.create_session(
+            user=request.user, **_track_fields(project, allocations, data)
+        )
         return Response(_serialize(session), status=status.HTTP_201_CREATED)
 
 
+def _bulk_result(index, status_name, session):
+    return {
+        "index": index,
+        "status": status_name,
+        "session": _serialize(session),
+        "error": None,
+    }
+
+
+def _bulk_failure(index, exc):
+    """The error body the single-item endpoint would answer ``exc`` with."""
+    if isinstance(exc, DjangoValidationError):
+        exc = ValidationError(
+            exc.message_dict if hasattr(exc, "error_dict") else exc.messages
+        )
+    return {
+        "index": index,
+        "status": "error",
+        "session": None,
+        "error": v2_exception_handler(exc, None).data["error"],
+    }
+
+
+class SessionBulkView(V2APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=SessionBulkRequestSerializer,
+        responses=SessionBulkResponseSerializer,
+    )
+    def post(self, request):
+        """Track many completed sessions in one transaction.
+
+        Each item is a ``POST /sessions/`` body with the same validation and
+        UUID idempotency, and gets its own result: ``created``, ``existing``
+        (an identical replay) or ``error`` with the envelope the single
+        endpoint would return. Failed items do not stop the others. Projects,
+        subprojects and UUIDs are resolved with one query each per batch.
+        """
+        envelope = SessionBulkRequestSerializer(data=request.data)
+        envelope.is_valid(raise_exception=True)
+        items = envelope.validated_data["sessions"]
+        user = request.user
+        results = [None] * len(items)
+
+        payloads = {}
+        for index, item in enumerate(items):
+            serializer = SessionTrackRequestSerializer(data=item)
+            if serializer.is_valid():
+                payloads[index] = serializer.validated_data
+            else:
+                results[index] = _bulk_failure(index, ValidationError(serializer.errors))
+
+        projects = Projects.objects.filter(
+            user=user, pk__in={data["project_id"] for data in payloads.values()}
+        ).in_bulk()
+        candidates = SubProjects.objects.filter(
+            user=user,
+            pk__in={
+                subproject_id
+                for data in payloads.values()
+                for subproject_id in [
+                    *data.get("subproject_ids", []),
+                    *(
+                        item["subproject_id"]
+                        for item in data.get("subproject_allocations", [])
+                    ),
+                ]
+            },
+        ).in_bulk()
+        existing = {
+            session.uuid: session
+            for session in _session_queryset(user).filter(
+                uuid__in={data["uuid"] for data in payloads.values() if "uuid" in data}
+            )
+        }
+
+        rows, row_indexes = [], []
+        claimed = {}  # UUID -> (index, content) of the item that creates it
+        repeats = {}  # index -> index of the identical item it repeats
+        for index, data in payloads.items():
+            try:
+                project, allocations = _track_target(
+                    user, data, projects=projects, candidates=candidates
+                )
+            except APIException as exc:
+                results[index] = _bulk_failure(index, exc)
+                continue
+            if "uuid" in data:
+                content = _canonical_track_payload(project, allocations, data)
+                current = existing.get(data["uuid"])
+                if current is not None:
+                    if _canonical_existing(current) == content:
+                        results[index] = _bulk_result(index, "existing", current)
+                    else:
+                        results[index] = {
+                            "index": index,
+                            "status": "error",
+                            "session": None,
+                            "error": _envelope(
+                                "uuid_conflict",
+                                "The UUID is already assigned to different "
+                                "session content.",
+                                {"current": _serialize(current)},
+                            )["error"],
+                        }
+                    continue
+                if data["uuid"] in claimed:
+                    first_index, first_content = claimed[data["uuid"]]
+                    if first_content == content:
+                        repeats[index] = first_index
+                    else:
+                        results[index] = _bulk_failure(
+                            index,
+                            ValidationError(
+                                {
+                                    "uuid": [
+                                        f"Item {first_index} uses this UUID for "
+                                        "different session content."
+                                    ]
+                                }
+                            ),
+                        )
+                    continue
+                claimed[data["uuid"]] = (index, content)
+            rows.append(_track_fields(project, allocations, data))
+            row_indexes.append(index)
+
+        outcomes = (
+            SessionMutationService.create_sessions(user=user, rows=rows)
+            if rows
+            else []
+        )
+        prefetch_related_objects(
+            [outcome for outcome in outcomes if isinstance(outcome, Sessions)],
+            "subproject_links__subproject",
+        )
+        for index, outcome in zip(row_indexes, outcomes):
+            results[index] = (
+                _bulk_failure(index, outcome)
+                if isinstance(outcome, DjangoValidationError)
+                else _bulk_result(index, "created", outcome)
+            )
+        for index, first_index in repeats.items():
+            first = results[first_index]
+            results[index] = {
+                **first,
+                "index": index,
+                "status": "existing" if first["status"] == "created" else "error",
+            }
+
+        counts = Counter(result["status"] for result in results)
+        return Response(
+            {
+                "created": counts["created"],
+                "existing": counts["existing"],
+                "failed": counts["error"],
+                "results": results,
+            }
+        )
+
+
 class SessionDetailView(V2APIView):
     permission_classes = [IsAuthenticated]
 
@@ -1074,6 +1321,7 @@ class ProjectsView(V2APIView):
         parameters=[ProjectListQuerySerializer],
         responses=ProjectListResponseSerializer,
     )
+    @conditional_get()
     def get(self, request):
         serializer = ProjectListQuerySerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
@@ -1160,6 +1408,7 @@ class ProjectsView(V2APIView):
                 Projects.objects.filter(pk=project.pk).update(context=None)
             if "tag_ids" in data:
                 project.tags.set(tags)
+            changelog.record(request.user.pk, projects=[project.pk])
         project = _get_project(request.user, project.pk)
         return Response(
             ProjectResourceSerializer(project).data,
@@ -1221,6 +1470,8 @@ class ProjectDetailView(V2APIView):
                     Projects.objects.filter(pk=project.pk).update(**updates)
                 if tags is not None:
                     project.tags.set(tags)
+                if updates or tags is not None:
+                    changelog.record(request.user.pk, projects=[project.pk])
         except DestructiveOperationError as exc:
             return _conflict(exc)
         project = _get_project(request.user, project.pk)
@@ -1323,6 +1574,7 @@ class ProjectSubprojectsView(V2APIView):
             name=data["name"],
             description=data.get("description", ""),
         )
+        changelog.record(request.user.pk, subprojects=[subproject.pk])
         subproject = _get_subproject(request.user, subproject.pk)
         return Response(
             SubprojectResourceSerializer(subproject).data,
@@ -1369,6 +1621,7 @@ class SubprojectDetailView(V2APIView):
                     SubProjects.objects.filter(pk=subproject.pk).update(
                         description=data["description"]
                     )
+                    changelog.record(request.user.pk, subprojects=[subproject.pk])
         except DestructiveOperationError as exc:
             return _conflict(exc)
         return Response(
@@ -1442,3 +1695,74 @@ class SubprojectMergeView(V2APIView):
             ).data,
             status=status.HTTP_201_CREATED,
         )
+
+
+class ChangesView(V2APIView):
+    """Delta sync: rows written since a change sequence number.
+
+    Each touched session, project or subproject appears once per batch, as
+    its current representation or, when it no longer exists, as an id under
+    ``deleted``. Session writes also touch the projects and subprojects whose
+    totals they feed; renames touch only the renamed row, so clients resolve
+    embedded project and subproject names through those entries.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        operation_id="changes_list",
+        parameters=[ChangeFeedQuerySerializer],
+        responses=ChangeFeedResponseSerializer,
+    )
+    def get(self, request):
+        query = ChangeFeedQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        since = query.validated_data.get("since")
+        if since is None:
+            since = next_since = changelog.head(request.user)
+            ids_by_kind = {kind: set() for kind in changelog.KINDS}
+            has_more = False
+        else:
+            ids_by_kind, next_since, has_more = changelog.changes_since(
+                request.user, since, query.validated_data["limit"]
+            )
+
+        session_ids = ids_by_kind[ChangeLogEntry.KIND_SESSION]
+        project_ids = ids_by_kind[ChangeLogEntry.KIND_PROJECT]
+        subproject_ids = ids_by_kind[ChangeLogEntry.KIND_SUBPROJECT]
+        # Empty id sets short-circuit without a query.
+        sessions = list(
+            _session_queryset(request.user).filter(pk__in=session_ids).order_by("id")
+        )
+        projects = list(
+            _project_queryset(request.user).filter(pk__in=project_ids).order_by("id")
+        )
+        subprojects = list(
+            _subproject_queryset(request.user)
+            .filter(pk__in=subproject_ids)
+            .order_by("id")
+        )
+        return Response(
+            {
+                "since": since,
+                "next_since": next_since,
+                "has_more": has_more,
+                "sessions": [_serialize(session) for session in sessions],
+                "projects": ProjectResourceSerializer(projects, many=True).data,
+                "subprojects": SubprojectResourceSerializer(
+                    subprojects, many=True
+                ).data,
+                "deleted": {
+                    "sessions": sorted(
+                        session_ids - {session.pk for session in sessions}
+                    ),
+                    "projects": sorted(
+                        project_ids - {project.pk for project in projects}
+                    ),
+                    "subprojects": sorted(
+                        subproject_ids
+                        - {subproject.pk for subproject in subprojects}
+                    ),
+                },
+            }
+        )
@@ -0,0 +1,458 @@
+"""Compact binary export archives (export format 3).
+
+An archive is ``MAGIC`` followed by length-prefixed blocks. Each block is a
+``_BLOCK`` header (kind, payload length, CRC-32 of the payload) and a payload
+padded to 8 bytes; the payload is a column directory (column count, then the
+byte length of each column) followed by the columns, each a packed
+little-endian array padded to 8 bytes:
+
+* ``PROJ`` starts a project: its start date, tag and subproject counts and a
+  string table of name, status, description, context, tags and subproject
+  names and descriptions.
+* ``SESS`` holds up to ``EXPORT_CHUNK_SIZE`` sessions of the current project
+  as columns (UUID bytes, start and end epoch seconds, note, cumulative link
+  counts, link subproject and allocation); notes and subproject names are
+  indexes into the block's string table, which holds each distinct one once.
+* ``END`` closes the archive with its project and session totals.
+
+A string table is three columns: ``n + 1`` offsets into a UTF-8 heap, the heap,
+and one null flag per string. An all-zero UUID stands for a missing one.
+
+Readers map the file with ``mmap`` and view each column in place through
+``memoryview.cast``, so ``Format3Archive.verify`` checks checksums, structure,
+string encodings and timestamp ranges without building a single record, and
+``Format3Archive.projects`` decodes one project at a time into the same raw
+entries a format-2 document holds, for ``import_format2_projects`` to validate
+and write.
+"""
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone as datetime_timezone
+from itertools import islice
+from uuid import UUID
+
+from core.export2 import EXPORT_CHUNK_SIZE, iter_format2_projects
+
+
+MAGIC = b"AUTUMN\x03\n"
+ARCHIVE_SUFFIX = ".autumn"
+ARCHIVE_CONTENT_TYPE = "application/vnd.autumn.archive"
+
+_BLOCK = struct.Struct("<4sQI4x")
+_COUNT = struct.Struct("<I4x")
+_LENGTH = struct.Struct("<Q")
+_NIL_UUID = bytes(16)
+_MAX_ALLOCATION_BP = 10000
+_LITTLE_ENDIAN = sys.byteorder == "little"
+_EPOCH = datetime(1970, 1, 1, tzinfo=datetime_timezone.utc)
+
+# Column typecodes per block kind; string tables are the last three columns.
+_STRINGS = ("I", "B", "B")
+_SCHEMAS = {
+    b"PROJ": ("q", "I") + _STRINGS,
+    b"SESS": ("B", "q", "q", "I", "I", "I", "H") + _STRINGS,
+    b"END\x00": ("Q",),
+}
+
+
+class Format3ArchiveError(ValueError):
+    """The file is not a well-formed format-3 archive."""
+
+
+def _padding(length):
+    return -length % 8
+
+
+def _packed(typecode, values):
+    column = array(typecode, values)
+    if not _LITTLE_ENDIAN:
+        column.byteswap()
+    return column.tobytes()
+
+
+def _string_columns(strings):
+    offsets = [0]
+    heap = bytearray()
+    nulls = bytearray()
+    for string in strings:
+        nulls.append(string is None)
+        if string is not None:
+            heap += string.encode("utf-8")
+        offsets.append(len(heap))
+    return [_packed("I", offsets), bytes(heap), bytes(nulls)]
+
+
+def _block(kind, columns):
+    payload = bytearray(_COUNT.pack(len(columns)))
+    for column in columns:
+        payload += _LENGTH.pack(len(column))
+    for column in columns:
+        payload += column
+        payload += bytes(_padding(len(column)))
+    return _BLOCK.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+
+def _epoch(instant):
+    return int(datetime.fromisoformat(instant).timestamp())
+
+
+def _project_block(project):
+    strings = [
+        project["name"],
+        project["status"],
+        project["description"],
+        project["context"],
+        *project["tags"],
+    ]
+    for subproject in project["subprojects"]:
+        strings += [subproject["name"], subproject["description"]]
+    return _block(
+        b"PROJ",
+        [
+            _packed("q", [_epoch(project["start_date"])]),
+            _packed("I", [len(project["tags"]), len(project["subprojects"])]),
+            *_string_columns(strings),
+        ],
+    )
+
+
+def _sessions_block(sessions):
+    uuids = bytearray()
+    starts = []
+    ends = []
+    notes = []
+    link_ends = []
+    link_names = []
+    allocations = []
+    strings = {}
+    for session in sessions:
+        uuids += UUID(session["uuid"]).bytes if session["uuid"] else _NIL_UUID
+        starts.append(_epoch(session["start"]))
+        ends.append(_epoch(session["end"]))
+        notes.append(strings.setdefault(session["note"], len(strings)))
+        for link in session["links"]:
+            link_names.append(strings.setdefault(link["subproject"], len(strings)))
+            allocations.append(link["allocation_bp"])
+        link_ends.append(len(allocations))
+    return _block(
+        b"SESS",
+        [
+            bytes(uuids),
+            _packed("q", starts),
+            _packed("q", ends),
+            _packed("I", notes),
+            _packed("I", link_ends),
+            _packed("I", link_names),
+            _packed("H", allocations),
+            *_string_columns(strings),
+        ],
+    )
+
+
+def iter_format3_archive(sessions_queryset, *, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the format-3 archive of ``sessions_queryset`` as bytes.
+
+    The archive holds exactly the entries of ``build_format2_export`` and is
+    written as it is read, one block of at most ``chunk_size`` sessions at a
+    time.
+    """
+    yield MAGIC
+    project_count = 0
+    session_count = 0
+    for project, sessions in iter_format2_projects(
+        sessions_queryset, chunk_size=chunk_size
+    ):
+        project_count += 1
+        yield _project_block(project)
+        while batch := list(islice(sessions, chunk_size)):
+            session_count += len(batch)
+            yield _sessions_block(batch)
+    yield _block(b"END\x00", [_packed("Q", [project_count, session_count])])
+
+
+def is_format3_archive(path):
+    with open(path, "rb") as archive_file:
+        return archive_file.read(len(MAGIC)) == MAGIC
+
+
+def _column(view, typecode):
+    if typecode == "B":
+        return view
+    if _LITTLE_ENDIAN:
+        return view.cast(typecode)
+    column = array(typecode, view.tobytes())
+    column.byteswap()
+    return column
+
+
+def _non_decreasing(column):
+    return all(earlier <= later for earlier, later in zip(column, column[1:]))
+
+
+def _epoch_seconds(instant):
+    delta = instant.replace(tzinfo=datetime_timezone.utc) - _EPOCH
+    return delta.days * 86400 + delta.seconds
+
+
+# Epoch seconds that name an aware datetime, 0001-01-01 through 9999-12-31.
+_MIN_SECONDS = _epoch_seconds(datetime.min)
+_MAX_SECONDS = _epoch_seconds(datetime.max)
+
+
+def _datetime_range(column):
+    return not len(column) or (
+        min(column) >= _MIN_SECONDS and max(column) <= _MAX_SECONDS
+    )
+
+
+class _Strings:
+    """A string table viewed in place; strings are decoded on access."""
+
+    def __init__(self, offsets, heap, nulls):
+        self.offsets = offsets
+        self.heap = heap
+        self.nulls = nulls
+
+    def __len__(self):
+        return len(self.nulls)
+
+    def __getitem__(self, index):
+        if self.nulls[index]:
+            return None
+        return str(self.heap[self.offsets[index] : self.offsets[index + 1]], "utf-8")
+
+    def check(self, kind):
+        if len(self.offsets) != len(self.nulls) + 1:
+            raise Format3ArchiveError(f"{kind} block: string table size mismatch")
+        if self.offsets[0] != 0 or self.offsets[-1] != len(self.heap):
+            raise Format3ArchiveError(f"{kind} block: string offsets out of range")
+        if not _non_decreasing(self.offsets):
+            raise Format3ArchiveError(f"{kind} block: string offsets out of order")
+        if any(flag > 1 for flag in self.nulls):
+            raise Format3ArchiveError(f"{kind} block: invalid null flag")
+        # A valid heap cut only at character starts decodes string by string.
+        try:
+            str(self.heap, "utf-8")
+        except UnicodeDecodeError as exc:
+            raise Format3ArchiveError(f"{kind} block: strings are not UTF-8") from exc
+        if any(
+            0x80 <= self.heap[offset] < 0xC0
+            for offset in self.offsets
+            if offset < len(self.heap)
+        ):
+            raise Format3ArchiveError(f"{kind} block: string splits a UTF-8 character")
+
+
+def _instant(seconds):
+    return (_EPOCH + timedelta(seconds=seconds)).isoformat()
+
+
+class Format3Archive:
+    """A format-3 archive mapped read-only into memory.
+
+    Use as a context manager; the mapping is released on exit.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:
+            # An empty file cannot be mapped.
+            self._file.close()
+            raise Format3ArchiveError("not a format-3 archive") from exc
+        if self._map[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise Format3ArchiveError("not a format-3 archive")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            # Columns of an abandoned read are still referenced (say, from a
+            # traceback); the mapping is released once they are collected.
+            pass
+        self._file.close()
+
+    def _blocks(self, *, check_crc=False):
+        """Yield ``(kind, columns)`` for each block, columns viewed in place."""
+        with memoryview(self._map) as view:
+            position = len(MAGIC)
+            while position < len(view):
+                if position + _BLOCK.size > len(view):
+                    raise Format3ArchiveError("truncated block header")
+                kind, length, crc = _BLOCK.unpack_from(view, position)
+                position += _BLOCK.size
+                if kind not in _SCHEMAS:
+                    raise Format3ArchiveError(f"unknown block kind {kind!r}")
+                label = kind.decode().rstrip("\x00")
+                if position + length > len(view):
+                    raise Format3ArchiveError(f"{label} block: truncated")
+                payload = view[position : position + length]
+                position += length
+                if check_crc and zlib.crc32(payload) != crc:
+                    raise Format3ArchiveError(f"{label} block: checksum mismatch")
+                yield label, self._columns(_SCHEMAS[kind], label, payload)
+
+    @staticmethod
+    def _columns(schema, label, payload):
+        if len(payload) < _COUNT.size or _COUNT.unpack_from(payload)[0] != len(schema):
+            raise Format3ArchiveError(f"{label} block: unexpected column count")
+        position = _COUNT.size + _LENGTH.size * len(schema)
+        if position > len(payload):
+            raise Format3ArchiveError(f"{label} block: truncated column directory")
+        columns = []
+        for index, typecode in enumerate(schema):
+            (length,) = _LENGTH.unpack_from(payload, _COUNT.size + _LENGTH.size * index)
+            end = position + length
+            if end > len(payload) or length % array(typecode).itemsize:
+                raise Format3ArchiveError(f"{label} block: malformed column {index}")
+            columns.append(_column(payload[position:end], typecode))
+            position = end + _padding(length)
+        return columns
+
+    def verify(self):
+        """Check checksums, structure, strings and timestamps without decoding
+        any records.
+
+        Returns the ``(projects, sessions)`` totals and raises
+        ``Format3ArchiveError`` at the first problem found.
+        """
+        projects = sessions = 0
+        totals = None
+        for kind, columns in self._blocks(check_crc=True):
+            if totals is not None:
+                raise Format3ArchiveError("data after the END block")
+            if kind == "END":
+                if len(columns[0]) != 2:
+                    raise Format3ArchiveError("END block: malformed totals")
+                totals = tuple(columns[0])
+            elif kind == "PROJ":
+                projects += 1
+                self._check_project(columns)
+            elif not projects:
+                raise Format3ArchiveError("SESS block before any project")
+            else:
+                sessions += self._check_sessions(columns)
+        if totals is None:
+            raise Format3ArchiveError("missing END block")
+        if totals != (projects, sessions):
+            raise Format3ArchiveError(
+                f"END block: expected {totals[0]} projects and {totals[1]} "
+                f"sessions, found {projects} and {sessions}"
+            )
+        return totals
+
+    @staticmethod
+    def _check_project(columns):
+        start_date, counts, *strings = columns
+        strings = _Strings(*strings)
+        strings.check("PROJ")
+        if len(start_date) != 1 or len(counts) != 2:
+            raise Format3ArchiveError("PROJ block: malformed header")
+        tag_count, subproject_count = counts
+        if len(strings) != 4 + tag_count + 2 * subproject_count:
+            raise Format3ArchiveError("PROJ block: string count mismatch")
+        if strings.nulls[0] or strings.nulls[1]:
+            raise Format3ArchiveError("PROJ block: missing name or status")
+        if not _datetime_range(start_date):
+            raise Format3ArchiveError("PROJ block: start date out of range")
+
+    @staticmethod
+    def _check_sessions(columns):
+        uuids, starts, ends, notes, link_ends, link_names, allocations, *strings = columns
+        strings = _Strings(*strings)
+        strings.check("SESS")
+        count = len(starts)
+        if any(len(column) != count for column in (ends, notes, link_ends)) or (
+            len(uuids) != 16 * count
+        ):
+            raise Format3ArchiveError("SESS block: session column size mismatch")
+        if len(link_names) != len(allocations):
+            raise Format3ArchiveError("SESS block: link column size mismatch")
+        if not _non_decreasing(link_ends) or (count and link_ends[-1] != len(allocations)):
+            raise Format3ArchiveError("SESS block: link ranges out of order")
+        if any(note >= len(strings) for note in notes):
+            raise Format3ArchiveError("SESS block: note out of range")
+        if any(name >= len(strings) or strings.nulls[name] for name in link_names):
+            raise Format3ArchiveError("SESS block: link subproject out of range")
+        if any(not 1 <= allocation <= _MAX_ALLOCATION_BP for allocation in allocations):
+            raise Format3ArchiveError("SESS block: allocation out of range")
+        if not (_datetime_range(starts) and _datetime_range(ends)):
+            raise Format3ArchiveError("SESS block: timestamp out of range")
+        return count
+
+    def projects(self):
+        """Yield each project as a raw format-2 entry, one project at a time."""
+        project = None
+        for kind, columns in self._blocks():
+            if kind == "PROJ":
+                if project is not None:
+                    yield project
+                project = self._project(columns)
+            elif kind == "SESS":
+                project["sessions"] += self._sessions(columns)
+        if project is not None:
+            yield project
+
+    @staticmethod
+    def _project(columns):
+        start_date, (tag_count, subproject_count), *strings = columns
+        strings = _Strings(*strings)
+        subprojects = 4 + tag_count
+        return {
+            "name": strings[0],
+            "status": strings[1],
+            "description": strings[2],
+            "context": strings[3],
+            "tags": [strings[index] for index in range(4, subprojects)],
+            "start_date": _instant(start_date[0]),
+            "subprojects": [
+                {"name": strings[index], "description": strings[index + 1]}
+                for index in range(subprojects, subprojects + 2 * subproject_count, 2)
+            ],
+            "sessions": [],
+        }
+
+    @staticmethod
+    def _sessions(columns):
+        uuids, starts, ends, notes, link_ends, link_names, allocations, *strings = columns
+        strings = _Strings(*strings)
+        decoded = {}
+
+        def string(index):
+            if index not in decoded:
+                decoded[index] = strings[index]
+            return decoded[index]
+
+        sessions = []
+        first_link = 0
+        for index, last_link in enumerate(link_ends):
+            uuid = bytes(uuids[16 * index : 16 * index + 16])
+            sessions.append(
+                {
+                    "uuid": None if uuid == _NIL_UUID else str(UUID(bytes=uuid)),
+                    "start": _instant(starts[index]),
+                    "end": _instant(ends[index]),
+                    "note": string(notes[index]),
+                    "links": [
+                        {
+                            "subproject": string(link_names[link]),
+                            "allocation_bp": allocations[link],
+                        }
+                        for link in range(first_link, last_link)
+                    ],
+                }
+            )
+            first_link = last_link
+        return sessions
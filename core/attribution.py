@@ -7,7 +7,6 @@ their existing minutes/hours conversion.
 
 from __future__ import annotations
 
-from collections import defaultdict
 from datetime import timedelta, timezone as datetime_timezone
 
 from django.db.models import (
@@ -18,15 +17,13 @@ from django.db.models import (
     Func,
     IntegerField,
     Max,
-    OuterRef,
-    Subquery,
     Sum,
     Value,
     When,
 )
 from django.db.models.functions import Cast, Coalesce, TruncDate
 
-from core.models import Sessions, SessionSubproject
+from core.models import Sessions
 
 
 BASIS_POINTS = 10000
@@ -87,22 +84,6 @@ def _reanchor(sessions_qs):
     ).order_by()
 
 
-def _with_allocation_total(sessions):
-    allocation_totals = (
-        SessionSubproject.objects.filter(session_id=OuterRef("pk"))
-        .order_by()
-        .values("session_id")
-        .annotate(total=Sum("allocation_bp"))
-        .values("total")
-    )
-    return sessions.annotate(
-        _allocation_total=Coalesce(
-            Subquery(allocation_totals, output_field=IntegerField()),
-            Value(0),
-        )
-    )
-
-
 def _with_link_numerator(sessions):
     return (
         sessions.filter(subproject_links__isnull=False)
@@ -115,9 +96,22 @@ def _with_link_numerator(sessions):
     )
 
 
-def _with_residual_numerator(sessions):
+def _with_residual_numerator(sessions, *fields):
+    """One row per completed session, with ``fields`` and its residual numerator.
+
+    The sessions are grouped in the database over a single left join to their
+    links, so the allocation total is an ordinary ``Sum`` rather than a
+    correlated per-session subquery.  Fully allocated sessions are dropped.
+    """
+
     return (
-        _with_allocation_total(sessions)
+        sessions.filter(end_time__isnull=False)
+        .values("pk", "end_time", *fields)
+        .annotate(
+            _allocation_total=Coalesce(
+                Sum("subproject_links__allocation_bp"), Value(0)
+            )
+        )
         .annotate(
             _residual_bp=Case(
                 When(_allocation_total=0, then=Value(BASIS_POINTS)),
@@ -131,14 +125,19 @@ def _with_residual_numerator(sessions):
         )
         .filter(_residual_bp__gt=0)
         .annotate(
-            _weighted_numerator=ExpressionWrapper(
+            _residual_numerator=ExpressionWrapper(
                 _elapsed_microseconds() * F("_residual_bp"),
                 output_field=BigIntegerField(),
             )
         )
+        .order_by()
     )
 
 
+def _summed_numerator(expression="_weighted_numerator"):
+    return Cast(Sum(expression), BigIntegerField())
+
+
 def _latest_first(rows, secondary_key):
     rows.sort(key=secondary_key)
     rows.sort(
@@ -158,18 +157,17 @@ def subproject_tally(sessions_qs, *, group_by_id=False):
     """
 
     sessions = _reanchor(sessions_qs)
-    link_sessions = _with_link_numerator(sessions)
+    link_sessions = _with_link_numerator(sessions).annotate(
+        name=F("subproject_links__subproject__name")
+    )
     if group_by_id:
         link_rows = list(
             link_sessions.annotate(
-                subproject_id=F("subproject_links__subproject_id"),
-                name=F("subproject_links__subproject__name"),
+                subproject_id=F("subproject_links__subproject_id")
             )
             .values("subproject_id", "name")
             .annotate(
-                total_numerator=Cast(
-                    Sum("_weighted_numerator"), BigIntegerField()
-                ),
+                total_numerator=_summed_numerator(),
                 latest_end_time=Max("end_time"),
             )
         )
@@ -180,14 +178,8 @@ def subproject_tally(sessions_qs, *, group_by_id=False):
         )
     else:
         link_rows = list(
-            link_sessions.annotate(
-                name=F("subproject_links__subproject__name")
-            )
-            .values("name")
-            .annotate(
-                total_numerator=Cast(
-                    Sum("_weighted_numerator"), BigIntegerField()
-                ),
+            link_sessions.values("name").annotate(
+                total_numerator=_summed_numerator(),
                 latest_end_time=Max("end_time"),
             )
         )
@@ -196,7 +188,7 @@ def subproject_tally(sessions_qs, *, group_by_id=False):
 
     rows_by_key = {row_key(row): row for row in link_rows}
     residual = _with_residual_numerator(sessions).aggregate(
-        total_numerator=Cast(Sum("_weighted_numerator"), BigIntegerField()),
+        total_numerator=_summed_numerator("_residual_numerator"),
         latest_end_time=Max("end_time"),
     )
     if residual["total_numerator"]:
@@ -227,32 +219,26 @@ def subproject_session_points(sessions_qs):
     """Return one weighted scatter point per session/subproject bucket."""
 
     sessions = _reanchor(sessions_qs)
-    link_rows = list(
-        _with_link_numerator(sessions)
-        .annotate(series=F("subproject_links__subproject__name"))
-        .values("pk", "end_time", "series", "_weighted_numerator")
-    )
     rows_by_key = {
         (row["pk"], row["series"]): {
             "end_time": row["end_time"],
             "series": row["series"],
-            "duration_numerator": row["_weighted_numerator"],
+            "duration_numerator": row["duration_numerator"],
         }
-        for row in link_rows
+        for row in _with_link_numerator(sessions)
+        .annotate(series=F("subproject_links__subproject__name"))
+        .values("pk", "end_time", "series")
+        .annotate(duration_numerator=_summed_numerator())
     }
-    for row in _with_residual_numerator(sessions).values(
-        "pk", "end_time", "_weighted_numerator"
-    ):
+    for row in _with_residual_numerator(sessions):
         key = (row["pk"], NO_SUBPROJECT)
         if key in rows_by_key:
-            rows_by_key[key]["duration_numerator"] += row[
-                "_weighted_numerator"
-            ]
+            rows_by_key[key]["duration_numerator"] += row["_residual_numerator"]
         else:
             rows_by_key[key] = {
                 "end_time": row["end_time"],
                 "series": NO_SUBPROJECT,
-                "duration_numerator": row["_weighted_numerator"],
+                "duration_numerator": row["_residual_numerator"],
             }
 
     rows = list(rows_by_key.values())
@@ -268,46 +254,22 @@ def subproject_session_points(sessions_qs):
 def subproject_daily_series(sessions_qs):
     """Return weighted UTC-day/subproject aggregates, including residuals."""
 
-    sessions = _reanchor(sessions_qs)
-    date_expression = TruncDate(
-        "start_time", tzinfo=datetime_timezone.utc
+    sessions = _reanchor(sessions_qs).annotate(
+        date=TruncDate("start_time", tzinfo=datetime_timezone.utc)
     )
-    link_rows = list(
-        _with_link_numerator(sessions)
-        .annotate(
-            date=date_expression,
-            series=F("subproject_links__subproject__name"),
-        )
+    rows_by_key = {
+        (row["date"], row["series"]): row
+        for row in _with_link_numerator(sessions)
+        .annotate(series=F("subproject_links__subproject__name"))
         .values("date", "series")
-        .annotate(
-            total_numerator=Cast(
-                Sum("_weighted_numerator"), BigIntegerField()
-            )
-        )
-    )
-    rows_by_key = {(row["date"], row["series"]): row for row in link_rows}
-    residual_rows = (
-        _with_residual_numerator(sessions)
-        .annotate(date=date_expression)
-        .values("date")
-        .annotate(
-            total_numerator=Cast(
-                Sum("_weighted_numerator"), BigIntegerField()
-            )
-        )
-    )
-    for residual in residual_rows:
+        .annotate(total_numerator=_summed_numerator())
+    }
+    for residual in _with_residual_numerator(sessions, "date"):
         key = (residual["date"], NO_SUBPROJECT)
-        if key in rows_by_key:
-            rows_by_key[key]["total_numerator"] += residual[
-                "total_numerator"
-            ]
-        else:
-            rows_by_key[key] = {
-                "date": residual["date"],
-                "series": NO_SUBPROJECT,
-                "total_numerator": residual["total_numerator"],
-            }
+        row = rows_by_key.setdefault(
+            key, {"date": key[0], "series": NO_SUBPROJECT, "total_numerator": 0}
+        )
+        row["total_numerator"] += residual["_residual_numerator"]
 
     rows = list(rows_by_key.values())
     for row in rows:
@@ -324,11 +286,7 @@ def hierarchy_child_credit(sessions_qs):
         _with_link_numerator(sessions)
         .annotate(subproject_id=F("subproject_links__subproject_id"))
         .values("subproject_id")
-        .annotate(
-            total_numerator=Cast(
-                Sum("_weighted_numerator"), BigIntegerField()
-            )
-        )
+        .annotate(total_numerator=_summed_numerator())
         .order_by()
     )
     for row in rows:
@@ -340,52 +298,45 @@ def report_attribution(sessions_qs):
     """Partition filtered sessions into per-project link and residual credit.
 
     Values stay as integer ``duration microseconds * basis points`` numerators
-    until report views convert them to minutes.
+    until report views convert them to minutes.  Project and link totals are
+    grouped in the database; residuals arrive one row per session.
     """
 
-    projects = {}
-    sessions = (
-        _reanchor(sessions_qs)
-        .select_related("project")
-        .prefetch_related("subproject_links__subproject")
-    )
-    for session in sessions.iterator(chunk_size=500):
-        project = projects.setdefault(
-            session.project_id,
-            {
-                "id": session.project_id,
-                "name": session.project.name,
-                "total_numerator": 0,
-                "children": defaultdict(
-                    lambda: {"id": None, "name": None, "total_numerator": 0}
-                ),
-                "residual_numerator": 0,
-            },
-        )
-        duration_numerator = _duration_numerator(
-            session.end_time - session.start_time
-        )
-        project["total_numerator"] += duration_numerator
-
-        links = list(session.subproject_links.all())
-        allocation_total = sum(link.allocation_bp for link in links)
-        for link in links:
-            child = project["children"][link.subproject_id]
-            child["id"] = link.subproject_id
-            child["name"] = link.subproject.name
-            child["total_numerator"] += (
-                duration_numerator * link.allocation_bp // BASIS_POINTS
+    sessions = _reanchor(sessions_qs).filter(end_time__isnull=False)
+    projects = {
+        row["project_id"]: {
+            "id": row["project_id"],
+            "name": row["project__name"],
+            "total_numerator": row["total_numerator"],
+            "children": {},
+            "residual_numerator": 0,
+        }
+        for row in sessions.values("project_id", "project__name")
+        .annotate(
+            total_numerator=_summed_numerator(
+                _elapsed_microseconds() * Value(BASIS_POINTS)
             )
-
-        residual_bp = 0
-        if not links:
-            residual_bp = BASIS_POINTS
-        elif allocation_total < BASIS_POINTS:
-            residual_bp = BASIS_POINTS - allocation_total
-        project["residual_numerator"] += (
-            duration_numerator * residual_bp // BASIS_POINTS
         )
-
-    for project in projects.values():
-        project["children"] = dict(project["children"])
+        .order_by("project_id")
+    }
+    for row in (
+        _with_link_numerator(sessions)
+        .values(
+            "project_id",
+            "subproject_links__subproject_id",
+            "subproject_links__subproject__name",
+        )
+        .annotate(total_numerator=_summed_numerator())
+        .order_by("project_id", "subproject_links__subproject_id")
+    ):
+        subproject_id = row["subproject_links__subproject_id"]
+        projects[row["project_id"]]["children"][subproject_id] = {
+            "id": subproject_id,
+            "name": row["subproject_links__subproject__name"],
+            "total_numerator": row["total_numerator"],
+        }
+    for row in _with_residual_numerator(sessions, "project_id"):
+        projects[row["project_id"]]["residual_numerator"] += row[
+            "_residual_numerator"
+        ]
     return projects
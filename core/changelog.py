@@ -0,0 +1,93 @@
+"""Per-user change sequence behind the /api/v2/changes/ delta feed.
+
+Every write path that creates, edits or deletes a session, project or
+subproject records the touched row ids with ``record``. Writers call it
+explicitly next to their other post-mutation hooks (``rollups``,
+``session_frame``, commitment dirtying); there are no model signals.
+
+Entries carry no payload and no operation: the feed reads the live row when
+it is served and sends a tombstone when the row is gone. Collapsing a batch
+to distinct ids therefore sends each changed row once, however many times it
+was written between polls.
+
+Sequence numbers are auto-increment ids, which a concurrent transaction can
+commit out of order. ``record`` bumps the user's data generation first, whose
+row lock is held until commit, so one user's entries always commit in
+sequence order and a client that has seen ``since`` can never later miss a
+lower id.
+"""
+
+from django.db import transaction
+
+from core import generation
+from core.models import ChangeLogEntry
+
+
+KINDS = (
+    ChangeLogEntry.KIND_SESSION,
+    ChangeLogEntry.KIND_PROJECT,
+    ChangeLogEntry.KIND_SUBPROJECT,
+)
+
+
+def record(user_id, *, sessions=(), projects=(), subprojects=()):
+    """Append one entry per distinct id to ``user_id``'s change sequence."""
+    entries = [
+        ChangeLogEntry(user_id=user_id, kind=kind, object_id=object_id)
+        for kind, object_ids in zip(KINDS, (sessions, projects, subprojects))
+        for object_id in sorted({pk for pk in object_ids if pk is not None})
+    ]
+    if not entries:
+        return
+    with transaction.atomic():
+        generation.bump(user_id)
+        ChangeLogEntry.objects.bulk_create(entries)
+
+
+def record_session_scopes(user_id, session_ids, scopes):
+    """Record sessions plus every project/subproject whose totals they feed.
+
+    ``scopes`` are ``(project_id, subproject_ids)`` pairs as passed to the
+    commitment hooks, typically the session's scope before and after a write.
+    """
+    record(
+        user_id,
+        sessions=session_ids,
+        projects=[project_id for project_id, _ in scopes],
+        subprojects=[
+            subproject_id
+            for _, subproject_ids in scopes
+            for subproject_id in subproject_ids
+        ],
+    )
+
+
+def head(user):
+    """The user's latest sequence number, or 0 before any recorded change."""
+    latest = (
+        ChangeLogEntry.objects.filter(user=user)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+    )
+    return latest or 0
+
+
+def changes_since(user, since, limit):
+    """Collapse up to ``limit`` entries after ``since`` into touched ids.
+
+    Returns ``(ids_by_kind, next_since, has_more)``; ``next_since`` is the
+    last entry consumed (``since`` itself when nothing changed).
+    """
+    entries = list(
+        ChangeLogEntry.objects.filter(user=user, id__gt=since)
+        .order_by("id")
+        .values_list("id", "kind", "object_id")[: limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    ids_by_kind = {kind: set() for kind in KINDS}
+    for _, kind, object_id in entries:
+        ids_by_kind[kind].add(object_id)
+    next_since = entries[-1][0] if entries else since
+    return ids_by_kind, next_since, has_more
@@ -16,6 +16,7 @@ from django.db.models import (
     When,
 )
 from django.db.models.functions import TruncDate
+from core import rollups as day_rollups
 from core.attribution import subproject_daily_series, subproject_session_points
 
 
@@ -58,26 +59,20 @@ def _duration_hours(duration):
     return duration.total_seconds() / 3600.0 if duration else 0.0
 
 
-def _session_points(sessions, use_subprojects):
-    if use_subprojects:
+def _session_points(sessions, use_subprojects, frame=None):
+    if frame is not None:
+        rows = frame.session_points(use_subprojects)
+    elif use_subprojects:
         rows = subproject_session_points(sessions)
-        return [
-            {
-                "x": row["end_time"],
-                "y": _duration_hours(row["duration_value"]),
-                "series": row["series"],
-            }
-            for row in rows
-        ]
-
-    rows = (
-        sessions.annotate(
-            series=F("project__name"),
-            duration_value=_duration_expression(),
+    else:
+        rows = (
+            sessions.annotate(
+                series=F("project__name"),
+                duration_value=_duration_expression(),
+            )
+            .values("end_time", "series", "duration_value")
+            .order_by("-end_time", "series")
         )
-        .values("end_time", "series", "duration_value")
-        .order_by("-end_time", "series")
-    )
     return [
         {
             "x": row["end_time"],
@@ -88,9 +83,14 @@ def _session_points(sessions, use_subprojects):
     ]
 
 
-def _daily_series(sessions, use_subprojects):
+def _daily_series(sessions, use_subprojects, rollups=None, frame=None):
     if use_subprojects:
-        rows = subproject_daily_series(sessions)
+        if rollups is not None:
+            rows = day_rollups.subproject_daily_series(rollups)
+        elif frame is not None:
+            rows = frame.daily_series(use_subprojects=True)
+        else:
+            rows = subproject_daily_series(sessions)
         return [
             {
                 "date": row["date"],
@@ -100,15 +100,20 @@ def _daily_series(sessions, use_subprojects):
             for row in rows
         ]
 
-    rows = (
-        sessions.annotate(
-            date=TruncDate("start_time", tzinfo=datetime_timezone.utc),
-            series=F("project__name"),
+    if rollups is not None:
+        rows = day_rollups.daily_series(rollups)
+    elif frame is not None:
+        rows = frame.daily_series()
+    else:
+        rows = (
+            sessions.annotate(
+                date=TruncDate("start_time", tzinfo=datetime_timezone.utc),
+                series=F("project__name"),
+            )
+            .values("date", "series")
+            .annotate(total=Sum(_duration_expression()))
+            .order_by("date", "series")
         )
-        .values("date", "series")
-        .annotate(total=Sum(_duration_expression()))
-        .order_by("date", "series")
-    )
     return [
         {
             "date": row["date"],
@@ -119,24 +124,35 @@ def _daily_series(sessions, use_subprojects):
     ]
 
 
-def _daily_totals(sessions):
-    rows = (
-        sessions.annotate(date=TruncDate("start_time", tzinfo=datetime_timezone.utc))
-        .values("date")
-        .annotate(total=Sum(_duration_expression()))
-        .order_by("date")
-    )
+def _daily_totals(sessions, rollups=None, frame=None):
+    if rollups is not None:
+        rows = day_rollups.daily_totals(rollups)
+    elif frame is not None:
+        rows = frame.daily_totals()
+    else:
+        rows = (
+            sessions.annotate(
+                date=TruncDate("start_time", tzinfo=datetime_timezone.utc)
+            )
+            .values("date")
+            .annotate(total=Sum(_duration_expression()))
+            .order_by("date")
+        )
     return [
         {"date": row["date"], "hours": _duration_hours(row["total"])}
         for row in rows
     ]
 
 
-def _intervals(sessions):
+def _intervals(sessions, frame=None):
+    if frame is not None:
+        return frame.intervals()
     return list(sessions.order_by("-end_time").values("start_time", "end_time"))
 
 
-def _histogram(sessions):
+def _histogram(sessions, frame=None):
+    if frame is not None:
+        return _histogram_payload(frame.histogram_buckets())
     rows = (
         sessions.annotate(duration_value=_duration_expression())
         .annotate(
@@ -155,6 +171,10 @@ def _histogram(sessions):
         .annotate(count=Count("pk"))
         .order_by("bucket")
     )
+    return _histogram_payload(rows)
+
+
+def _histogram_payload(rows):
     counts = {row["bucket"]: row["count"] for row in rows}
     if not counts:
         return []
@@ -183,16 +203,24 @@ def _wordcloud(sessions):
     ]
 
 
-def build_chart_payload(chart_type, sessions, *, use_subprojects=False):
-    """Build the legacy web-chart payload shape for an already filtered set."""
+def build_chart_payload(
+    chart_type, sessions, *, use_subprojects=False, rollups=None, frame=None
+):
+    """Build the legacy web-chart payload shape for an already filtered set.
+
+    ``rollups``, when given, is the ``core.rollups.scoped_rollups`` view of
+    the same filtered set; the daily charts sum it instead of raw sessions.
+    ``frame`` is a ``core.session_frame.SessionFrame`` holding exactly the
+    filtered sessions; every chart except the word cloud reads it instead.
+    """
     if chart_type in SESSION_POINT_CHARTS:
-        return _session_points(sessions, use_subprojects)
+        return _session_points(sessions, use_subprojects, frame)
     elif chart_type in DAILY_SERIES_CHARTS:
-        return _daily_series(sessions, use_subprojects)
+        return _daily_series(sessions, use_subprojects, rollups, frame)
     elif chart_type in DAILY_TOTAL_CHARTS:
-        return _daily_totals(sessions)
+        return _daily_totals(sessions, rollups, frame)
     elif chart_type in INTERVAL_CHARTS:
-        return _intervals(sessions)
+        return _intervals(sessions, frame)
     elif chart_type == "histogram":
-        return _histogram(sessions)
+        return _histogram(sessions, frame)
     return _wordcloud(sessions)
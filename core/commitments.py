@@ -1,11 +1,25 @@
+import logging
+from bisect import bisect_right
+from collections import defaultdict
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from django.conf import settings
 from django.db import transaction
-from django.db.models import DurationField, ExpressionWrapper, F, Sum
+from django.db.models import (
+    BooleanField,
+    Count,
+    DurationField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Sum,
+)
 from django.utils import timezone
 
+from core import generation
 from core.models import (
     Commitment,
     CommitmentAdjustment,
@@ -14,10 +28,14 @@ from core.models import (
     Context,
     Projects,
     Sessions,
+    SessionSubproject,
     SubProjects,
     Tag,
 )
-from core.utils import get_period_bounds
+from core.utils import get_period_bounds, iter_period_bounds
+
+
+logger = logging.getLogger("main")
 
 
 def build_commitment_scope_meta(user) -> dict:
@@ -78,7 +96,8 @@ def _project_has_any_subproject_in_qs(project: Projects, subprojects_qs) -> bool
 
 
 def _list_names(qs):
-    return list(qs.values_list("name", flat=True))
+    # Iterate rather than values_list() so prefetched relations are reused.
+    return [item.name for item in qs]
 
 
 def build_commitment_rule_lines(commitment: Commitment) -> list[str]:
@@ -120,20 +139,38 @@ def build_commitment_rule_lines(commitment: Commitment) -> list[str]:
     return lines
 
 
-def build_commitment_panel_items(commitments):
+def build_commitment_panel_items(commitments, *, include_streak=False):
+    """
+    Panel rows for ``commitments`` with a query count independent of how many
+    there are, provided their include/exclude relations are prefetched.
+
+    Only ledgers that are actually stale are reconciled one by one; current
+    actuals come from one aggregate and streaks from one batched pass.
+    """
+    commitments = list(commitments)
+    active = [commitment for commitment in commitments if commitment.active]
+    stale = {
+        commitment.pk: reconcile_for_read(commitment)
+        for commitment in active
+        if commitment_is_stale(commitment)
+    }
+    actuals = commitment_actuals(active)
+    streaks = calculate_commitment_streaks(active) if include_streak else {}
+
     items = []
     for commitment in commitments:
         progress = None
         if commitment.active:
-            reconcile_commitment(commitment)
-            progress = get_commitment_progress(commitment)
-        items.append(
-            {
-                "commitment": commitment,
-                "progress": progress,
-                "rule_lines": build_commitment_rule_lines(commitment),
-            }
-        )
+            progress = get_commitment_progress(commitment, actuals[commitment.pk])
+        item = {
+            "commitment": commitment,
+            "progress": progress,
+            "stale": stale.get(commitment.pk, False),
+            "rule_lines": build_commitment_rule_lines(commitment),
+        }
+        if include_streak:
+            item["streak"] = streaks.get(commitment.pk)
+        items.append(item)
     return items
 
 
@@ -273,54 +310,36 @@ def get_commitment_sessions_queryset(commitment, period_start, period_end):
     return _apply_commitment_composable_filters(commitment, sessions)
 
 
+_RULE_DIMENSIONS = {
+    "context": {"tag", "project", "subproject"},
+    "tag": {"project", "subproject"},
+    "project": {"subproject"},
+    "subproject": set(),
+}
+
+
+def _commitment_rule_ids(commitment) -> dict:
+    """``{dimension: (include_ids, exclude_ids)}`` for the rules its scope allows.
+
+    Reads the relations through ``.all()`` so prefetched rules cost no queries.
+    """
+    allowed_rule_dimensions = _RULE_DIMENSIONS.get(commitment.aggregation_type, set())
+    return {
+        dimension: (
+            [item.pk for item in getattr(commitment, f"include_{dimension}s").all()],
+            [item.pk for item in getattr(commitment, f"exclude_{dimension}s").all()],
+        )
+        for dimension in ("project", "subproject", "context", "tag")
+        if dimension in allowed_rule_dimensions
+    }
+
+
 def _apply_commitment_composable_filters(commitment, sessions):
-    allowed_rule_dimensions = {
-        "context": {"tag", "project", "subproject"},
-        "tag": {"project", "subproject"},
-        "project": {"subproject"},
-        "subproject": set(),
-    }.get(commitment.aggregation_type, set())
-
-    include_project_ids = list(
-        commitment.include_projects.values_list("pk", flat=True)
-        if "project" in allowed_rule_dimensions
-        else []
-    )
-    exclude_project_ids = list(
-        commitment.exclude_projects.values_list("pk", flat=True)
-        if "project" in allowed_rule_dimensions
-        else []
-    )
-    include_subproject_ids = list(
-        commitment.include_subprojects.values_list("pk", flat=True)
-        if "subproject" in allowed_rule_dimensions
-        else []
-    )
-    exclude_subproject_ids = list(
-        commitment.exclude_subprojects.values_list("pk", flat=True)
-        if "subproject" in allowed_rule_dimensions
-        else []
-    )
-    include_context_ids = list(
-        commitment.include_contexts.values_list("pk", flat=True)
-        if "context" in allowed_rule_dimensions
-        else []
-    )
-    exclude_context_ids = list(
-        commitment.exclude_contexts.values_list("pk", flat=True)
-        if "context" in allowed_rule_dimensions
-        else []
-    )
-    include_tag_ids = list(
-        commitment.include_tags.values_list("pk", flat=True)
-        if "tag" in allowed_rule_dimensions
-        else []
-    )
-    exclude_tag_ids = list(
-        commitment.exclude_tags.values_list("pk", flat=True)
-        if "tag" in allowed_rule_dimensions
-        else []
-    )
+    rules = _commitment_rule_ids(commitment)
+    include_project_ids, exclude_project_ids = rules.get("project", ([], []))
+    include_subproject_ids, exclude_subproject_ids = rules.get("subproject", ([], []))
+    include_context_ids, exclude_context_ids = rules.get("context", ([], []))
+    include_tag_ids, exclude_tag_ids = rules.get("tag", ([], []))
 
     if include_project_ids:
         sessions = sessions.filter(project_id__in=include_project_ids)
@@ -343,6 +362,85 @@ def _apply_commitment_composable_filters(commitment, sessions):
     return sessions.distinct()
 
 
+def _has_subproject_link(subproject_ids):
+    return Exists(
+        SessionSubproject.objects.filter(
+            session=OuterRef("pk"), subproject_id__in=subproject_ids
+        )
+    )
+
+
+def _has_project_tag(tag_ids):
+    return Exists(
+        Projects.tags.through.objects.filter(
+            projects_id=OuterRef("project_id"), tag_id__in=tag_ids
+        )
+    )
+
+
+def _commitment_sessions_q(commitment):
+    """
+    get_commitment_sessions_queryset's scope and rules, minus the period, as a
+    join-free ``Q`` on Sessions (multi-valued rules become EXISTS), so several
+    commitments can be evaluated side by side in one query. ``None`` when the
+    commitment can match nothing.
+    """
+    q = Q(user_id=commitment.user_id, end_time__isnull=False)
+    if commitment.aggregation_type == "project" and commitment.project_id:
+        q &= Q(project_id=commitment.project_id)
+    elif commitment.aggregation_type == "subproject" and commitment.subproject_id:
+        q &= Q(_has_subproject_link([commitment.subproject_id]))
+    elif commitment.aggregation_type == "context" and commitment.context_id:
+        q &= Q(project__context_id=commitment.context_id)
+    elif commitment.aggregation_type == "tag" and commitment.tag_id:
+        q &= Q(_has_project_tag([commitment.tag_id]))
+    else:
+        return None
+
+    rules = _commitment_rule_ids(commitment)
+    include_project_ids, exclude_project_ids = rules.get("project", ([], []))
+    include_subproject_ids, exclude_subproject_ids = rules.get("subproject", ([], []))
+    include_context_ids, exclude_context_ids = rules.get("context", ([], []))
+    include_tag_ids, exclude_tag_ids = rules.get("tag", ([], []))
+
+    if include_project_ids:
+        q &= Q(project_id__in=include_project_ids)
+    if include_subproject_ids:
+        q &= Q(_has_subproject_link(include_subproject_ids))
+    if include_context_ids:
+        q &= Q(project__context_id__in=include_context_ids)
+    if include_tag_ids:
+        q &= Q(_has_project_tag(include_tag_ids))
+
+    if exclude_project_ids:
+        q &= ~Q(project_id__in=exclude_project_ids)
+    if exclude_subproject_ids:
+        q &= ~Q(_has_subproject_link(exclude_subproject_ids))
+    if exclude_context_ids:
+        q &= ~Q(project__context_id__in=exclude_context_ids)
+    if exclude_tag_ids:
+        q &= ~Q(_has_project_tag(exclude_tag_ids))
+    return q
+
+
+def _merged_ranges(ranges):
+    """Coalesce sorted ``(start, end)`` ranges that touch into single ranges."""
+    merged = []
+    for start, end in ranges:
+        if merged and merged[-1][1] >= start:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _ranges_q(ranges):
+    q = Q()
+    for start, end in _merged_ranges(ranges):
+        q |= Q(end_time__gte=start, end_time__lt=end)
+    return q
+
+
 def commitment_actual(commitment, period_start, period_end) -> float | int:
     sessions = get_commitment_sessions_queryset(
         commitment, period_start, period_end
@@ -363,6 +461,56 @@ def commitment_actual(commitment, period_start, period_end) -> float | int:
     return duration.total_seconds() / 60 if duration is not None else 0
 
 
+def _current_period(commitment):
+    period_start, period_end = get_period_bounds(commitment.period)
+    start_dt = get_commitment_start_datetime(commitment)
+    return period_start, max(period_start, start_dt), period_end
+
+
+def commitment_actuals(commitments) -> dict:
+    """
+    ``{pk: actual}`` for each commitment's current period, as commitment_actual
+    computes it, from one conditional aggregate over the owners' sessions.
+    """
+    actuals = {}
+    aggregates = {}
+    ranges = []
+    for commitment in commitments:
+        _, effective_period_start, period_end = _current_period(commitment)
+        scope = _commitment_sessions_q(commitment)
+        actuals[commitment.pk] = 0
+        if scope is None or effective_period_start >= period_end:
+            continue
+        scope &= Q(end_time__gte=effective_period_start, end_time__lt=period_end)
+        ranges.append((effective_period_start, period_end))
+        if commitment.commitment_type == "time":
+            aggregates[f"c{commitment.pk}"] = Sum(
+                ExpressionWrapper(
+                    F("end_time") - F("start_time"), output_field=DurationField()
+                ),
+                filter=scope,
+            )
+        else:
+            aggregates[f"c{commitment.pk}"] = Count("pk", filter=scope)
+    if not aggregates:
+        return actuals
+
+    totals = (
+        Sessions.objects.filter(
+            user_id__in={commitment.user_id for commitment in commitments},
+            end_time__gte=min(start for start, _ in ranges),
+            end_time__lt=max(end for _, end in ranges),
+        )
+        .order_by()
+        .aggregate(**aggregates)
+    )
+    for key, total in totals.items():
+        if isinstance(total, timedelta):
+            total = total.total_seconds() / 60
+        actuals[int(key[1:])] = total or 0
+    return actuals
+
+
 _REVISION_FILTER_FIELDS = (
     "include_projects",
     "exclude_projects",
@@ -433,7 +581,8 @@ def _ensure_ledger_initialized(commitment: Commitment, now):
     )
     commitment.ledger_start_at = anchor
     commitment.needs_recompute = True
-    commitment.save(update_fields=["ledger_start_at", "needs_recompute"])
+    commitment.dirty_from = None
+    commitment.save(update_fields=["ledger_start_at", "needs_recompute", "dirty_from"])
 
     if revision is None:
         revision = CommitmentRevision.objects.create(
@@ -462,6 +611,15 @@ def _ensure_ledger_initialized(commitment: Commitment, now):
     return revision
 
 
+# Include/exclude dimensions each aggregation type's filters may narrow by.
+_REVISION_FILTER_DIMENSIONS = {
+    "context": {"tag", "project", "subproject"},
+    "tag": {"project", "subproject"},
+    "project": {"subproject"},
+    "subproject": set(),
+}
+
+
 def _snapshot_ids(revision, field):
     values = revision.filters_snapshot.get(field, [])
     return [value["id"] if isinstance(value, dict) else value for value in values]
@@ -487,12 +645,7 @@ def _revision_sessions_queryset(revision, period_start, period_end):
     else:
         return sessions.none()
 
-    allowed = {
-        "context": {"tag", "project", "subproject"},
-        "tag": {"project", "subproject"},
-        "project": {"subproject"},
-        "subproject": set(),
-    }.get(revision.aggregation_type, set())
+    allowed = _REVISION_FILTER_DIMENSIONS.get(revision.aggregation_type, set())
     dimensions = {
         "projects": "project_id",
         "subprojects": "subprojects__pk",
@@ -513,45 +666,51 @@ def _revision_sessions_queryset(revision, period_start, period_end):
 
 
 def _revision_accrual(revision, period_start, period_end):
-    sessions = list(
-        _revision_sessions_queryset(revision, period_start, period_end)
+    return _revision_accruals(revision, [(period_start, period_end)])[0]
+
+
+def _revision_accruals(revision, ranges):
+    """``(numerator, session_count)`` for each sorted, disjoint ``(start, end)``.
+
+    One query spans all ranges; sessions are bucketed by end time in Python.
+    """
+    if not ranges:
+        return []
+    starts = [start for start, _ in ranges]
+    totals = [[0, 0] for _ in ranges]
+    sessions = (
+        _revision_sessions_queryset(revision, ranges[0][0], ranges[-1][1])
         .order_by("pk")
         .values_list("pk", "start_time", "end_time")
     )
-    total_microseconds = sum(
-        (
-            (end_time - start_time).days * 86_400_000_000
-            + (end_time - start_time).seconds * 1_000_000
-            + (end_time - start_time).microseconds
+    for _, start_time, end_time in sessions.iterator(chunk_size=2000):
+        index = bisect_right(starts, end_time) - 1
+        if index < 0 or end_time >= ranges[index][1]:
+            continue
+        elapsed = end_time - start_time
+        totals[index][0] += (
+            elapsed.days * 86_400_000_000
+            + elapsed.seconds * 1_000_000
+            + elapsed.microseconds
         )
-        for _, start_time, end_time in sessions
-    )
+        totals[index][1] += 1
     # One numerator unit is 1/10000 minute, i.e. 6000 microseconds.
-    return total_microseconds // 6000, len(sessions)
+    return [(microseconds // 6000, count) for microseconds, count in totals]
 
 
 def _periods_for_replay(revision, ledger_start_at, now):
     zone = ZoneInfo(revision.timezone)
     start_dt = _local_midnight(revision.start_date, zone)
     cursor = max(ledger_start_at, start_dt)
-    periods = []
-    while cursor <= now:
-        local_reference = cursor.astimezone(zone)
-        with timezone.override(zone):
-            period_start, period_end = get_period_bounds(
-                revision.cadence, local_reference
-            )
-        if period_end <= cursor:
-            cursor = period_end + timedelta(seconds=1)
-            continue
-        if period_end > now:
-            break
-        if period_end > ledger_start_at:
-            periods.append(
-                (period_start, max(period_start, ledger_start_at, start_dt), period_end)
-            )
-        cursor = period_end + timedelta(seconds=1)
-    return periods
+    if cursor > now:
+        return []
+    return [
+        (period_start, max(period_start, ledger_start_at, start_dt), period_end)
+        for period_start, period_end in iter_period_bounds(
+            revision.cadence, cursor, now, zone
+        )
+        if period_end <= now
+    ]
 
 
 def _activate_due_revision(commitment, now):
@@ -581,6 +740,26 @@ def _activate_due_revision(commitment, now):
     return True
 
 
+def _next_reconcile_at(commitment, revision, now):
+    """When the ledger next goes stale: the current period's close, or an
+    earlier pending revision activation."""
+    zone = ZoneInfo(revision.timezone)
+    with timezone.override(zone):
+        _, period_end = get_period_bounds(revision.cadence, now.astimezone(zone))
+    pending_at = (
+        commitment.revisions.filter(
+            generation=commitment.generation,
+            status=CommitmentRevision.STATUS_PENDING,
+        )
+        .order_by("effective_from_instant")
+        .values_list("effective_from_instant", flat=True)
+        .first()
+    )
+    if pending_at is not None:
+        return min(period_end, pending_at)
+    return period_end
+
+
 def _revision_for_period(revisions, period_start):
     governing = None
     for revision in revisions:
@@ -602,6 +781,112 @@ def mutation_affects_ledger(commitment: Commitment, instant) -> bool:
     return instant >= commitment.ledger_start_at
 
 
+def _revision_can_count(revision, project, subproject_ids):
+    """Whether ``revision`` can count a session of ``project``.
+
+    ``project`` is ``(project_id, context_id, tag_ids, subproject_ids)``.
+    ``subproject_ids`` are the session's subprojects; ``None`` stands for any
+    subset of the project's, which no subproject exclusion can rule out.
+    """
+    project_id, context_id, tag_ids, project_subproject_ids = project
+    any_subprojects = subproject_ids is None
+    present = {
+        "project": {project_id},
+        "context": {context_id},
+        "tag": tag_ids,
+        "subproject": project_subproject_ids if any_subprojects else subproject_ids,
+    }
+    aggregation_type = revision.aggregation_type
+    if not revision.target_id or aggregation_type not in present:
+        return False
+    if revision.target_id not in present[aggregation_type]:
+        return False
+    for dimension in _REVISION_FILTER_DIMENSIONS[aggregation_type]:
+        values = present[dimension]
+        include_ids = _snapshot_ids(revision, f"include_{dimension}s")
+        exclude_ids = _snapshot_ids(revision, f"exclude_{dimension}s")
+        if include_ids and values.isdisjoint(include_ids):
+            return False
+        if exclude_ids and not values.isdisjoint(exclude_ids):
+            if not (dimension == "subproject" and any_subprojects):
+                return False
+    return True
+
+
+def commitments_affected_by(user_id, scopes) -> set[int]:
+    """IDs of the user's commitments that can count sessions in ``scopes``.
+
+    ``scopes`` holds ``(project_id, subproject_ids)`` pairs describing a
+    session before and/or after a write (``subproject_ids=None`` for any of
+    the project's current subprojects).
+    Scope is read from the current generation's active and pending
+    ``filters_snapshot`` revisions, with each project's live context and tags;
+    commitments without such a revision yet are always included.
+    """
+    scopes = [
+        (project_id, None if subproject_ids is None else set(subproject_ids))
+        for project_id, subproject_ids in scopes
+    ]
+    projects = {}
+    for project_id, context_id, tag_id, subproject_id in Projects.objects.filter(
+        user_id=user_id, pk__in={project_id for project_id, _ in scopes}
+    ).values_list("pk", "context_id", "tags", "subprojects"):
+        project = projects.setdefault(
+            project_id, (project_id, context_id, set(), set())
+        )
+        project[2].add(tag_id)
+        project[3].add(subproject_id)
+    for project in projects.values():
+        project[2].discard(None)
+        project[3].discard(None)
+
+    generations = dict(
+        Commitment.objects.filter(user_id=user_id).values_list("pk", "generation")
+    )
+    revised = set()
+    affected = set()
+    for revision in CommitmentRevision.objects.filter(commitment__user_id=user_id):
+        if revision.generation != generations[revision.commitment_id]:
+            continue
+        revised.add(revision.commitment_id)
+        if revision.commitment_id not in affected and any(
+            _revision_can_count(
+                revision,
+                projects.get(project_id, (project_id, None, set(), set())),
+                subproject_ids,
+            )
+            for project_id, subproject_ids in scopes
+        ):
+            affected.add(revision.commitment_id)
+    return affected | (set(generations) - revised)
+
+
+def mark_commitments_dirty(user_id, since=None, *, commitment_ids=None):
+    """Flag ``user_id``'s commitments for replay.
+
+    ``since`` is the earliest instant a session edit touched: closed periods
+    ending at or before it keep their accrual on the next replay. ``None``
+    (filters, projects or revisions moved) re-accrues the whole ledger.
+    ``commitment_ids`` narrows the flag, usually to ``commitments_affected_by``.
+    Every caller is a data write, so this also bumps the user's generation.
+    """
+    generation.bump(user_id)
+    commitments = Commitment.objects.filter(user_id=user_id)
+    if commitment_ids is not None:
+        if not commitment_ids:
+            return
+        commitments = commitments.filter(pk__in=commitment_ids)
+    if since is None:
+        commitments.update(needs_recompute=True, dirty_from=None)
+        return
+    commitments.filter(needs_recompute=True, dirty_from__gt=since).update(
+        dirty_from=since
+    )
+    commitments.filter(needs_recompute=False).update(
+        needs_recompute=True, dirty_from=since
+    )
+
+
 @transaction.atomic
 def recompute_commitment(commitment: Commitment) -> bool:
     """Rebuild current-generation derived periods and replay their event stream."""
@@ -609,12 +894,28 @@ def recompute_commitment(commitment: Commitment) -> bool:
     now = timezone.now()
     old_balance = locked.balance
     was_dirty = locked.needs_recompute
+    # Existing periods ending at or before the watermark keep their accrual;
+    # without one (clean or fully dirty) every period is re-accrued.
+    watermark = locked.dirty_from if was_dirty else None
 
     if not locked.active:
         locked.needs_recompute = False
-        locked.save(update_fields=["needs_recompute"])
+        locked.dirty_from = None
+        locked.next_reconcile_at = None
+        locked.last_reconciled = now
+        locked.save(
+            update_fields=[
+                "needs_recompute",
+                "dirty_from",
+                "next_reconcile_at",
+                "last_reconciled",
+            ]
+        )
         commitment.balance = locked.balance
         commitment.needs_recompute = False
+        commitment.dirty_from = None
+        commitment.next_reconcile_at = None
+        commitment.last_reconciled = now
         commitment.ledger_start_at = locked.ledger_start_at
         commitment.generation = locked.generation
         commitment.active = False
@@ -637,41 +938,54 @@ def recompute_commitment(commitment: Commitment) -> bool:
         for row in locked.period_rows.filter(generation=locked.generation)
     }
     period_rows = []
-    derived_changed = activated
+    # Periods needing accrual, grouped by governing revision: one query each.
+    to_accrue = defaultdict(list)
     for period_start, effective_start, period_end in desired:
         revision = _revision_for_period(revisions, period_start)
-        accrued_numerator, session_count = _revision_accrual(
-            revision, effective_start, period_end
-        )
         row = existing.get(period_start)
+        if (
+            row is not None
+            and watermark is not None
+            and period_end <= watermark
+            and row.period_end == period_end
+            and row.revision_id == revision.pk
+        ):
+            period_rows.append(row)
+            continue
         if row is None:
-            row = CommitmentPeriod.objects.create(
+            row = CommitmentPeriod(
                 commitment=locked,
                 generation=locked.generation,
                 revision=revision,
                 period_start=period_start,
                 period_end=period_end,
-                accrued_numerator=accrued_numerator,
-                session_count=session_count,
                 closed_at=now,
             )
-            derived_changed = True
-        else:
+        to_accrue[revision].append((row, effective_start, period_end))
+        period_rows.append(row)
+
+    # Rows to upsert once balances are replayed: new rows and changed ones.
+    upserts = {}
+    for revision, pending in to_accrue.items():
+        accruals = _revision_accruals(
+            revision, [(start, end) for _, start, end in pending]
+        )
+        for (row, _, period_end), (accrued_numerator, session_count) in zip(
+            pending, accruals
+        ):
             updates = {
                 "revision": revision,
                 "period_end": period_end,
                 "accrued_numerator": accrued_numerator,
                 "session_count": session_count,
             }
-            changed_fields = [
-                field for field, value in updates.items() if getattr(row, field) != value
-            ]
-            if changed_fields:
+            if row.pk is None or any(
+                getattr(row, field) != value for field, value in updates.items()
+            ):
                 for field, value in updates.items():
                     setattr(row, field, value)
-                row.save(update_fields=changed_fields)
-                derived_changed = True
-        period_rows.append(row)
+                upserts[row.period_start] = row
+    derived_changed = activated or bool(upserts)
 
     desired_starts = [row.period_start for row in period_rows]
     stale = locked.period_rows.filter(generation=locked.generation)
@@ -715,25 +1029,51 @@ def recompute_commitment(commitment: Commitment) -> bool:
                     min(revision.max_balance, running + surplus),
                 )
             )
-        row_updates = []
-        if event.carryover_in != carryover_in:
+        if (event.carryover_in, event.balance_out) != (carryover_in, running):
             event.carryover_in = carryover_in
-            row_updates.append("carryover_in")
-        if event.balance_out != running:
             event.balance_out = running
-            row_updates.append("balance_out")
-        if row_updates:
-            event.save(update_fields=row_updates)
+            upserts[event.period_start] = event
             derived_changed = True
+    if upserts:
+        # Upsert on the natural key; existing rows keep their ids and closed_at.
+        for row in upserts.values():
+            row.pk = None
+        CommitmentPeriod.objects.bulk_create(
+            upserts.values(),
+            update_conflicts=True,
+            unique_fields=["commitment", "generation", "period_start"],
+            update_fields=[
+                "revision",
+                "period_end",
+                "accrued_numerator",
+                "session_count",
+                "carryover_in",
+                "balance_out",
+            ],
+        )
     # Manual adjustments are effective immediately and remain unclamped until a
     # period-close event. ``running`` is therefore the authoritative post-replay
     # balance even when the final event is an adjustment.
     locked.balance = running
     locked.needs_recompute = False
-    locked.save(update_fields=["balance", "needs_recompute"])
+    locked.dirty_from = None
+    locked.next_reconcile_at = _next_reconcile_at(locked, revisions[-1], now)
+    locked.last_reconciled = now
+    locked.save(
+        update_fields=[
+            "balance",
+            "needs_recompute",
+            "dirty_from",
+            "next_reconcile_at",
+            "last_reconciled",
+        ]
+    )
 
     commitment.balance = locked.balance
     commitment.needs_recompute = False
+    commitment.dirty_from = None
+    commitment.next_reconcile_at = locked.next_reconcile_at
+    commitment.last_reconciled = now
     commitment.ledger_start_at = locked.ledger_start_at
     commitment.generation = locked.generation
     commitment.target = locked.target
@@ -745,20 +1085,16 @@ def recompute_commitment(commitment: Commitment) -> bool:
     return derived_changed or was_dirty or old_balance != locked.balance
 
 
-def get_commitment_progress(commitment) -> dict:
+def get_commitment_progress(commitment, actual=None) -> dict:
     """
     Calculate the progress for a commitment in the current period.
+
+    :param actual: The period's actual when already known, e.g. from commitment_actuals
     """
-    period_start, period_end = get_period_bounds(commitment.period)
-    start_dt = get_commitment_start_datetime(commitment)
-    effective_period_start = max(period_start, start_dt)
+    period_start, effective_period_start, period_end = _current_period(commitment)
 
-    if effective_period_start >= period_end:
-        actual = 0
-    else:
-        actual = commitment_actual(
-            commitment, effective_period_start, period_end
-        )
+    if actual is None:
+        actual = commitment_actuals([commitment])[commitment.pk]
 
     if commitment.commitment_type == "time":
         actual = round(actual, 2)
@@ -799,87 +1135,119 @@ def calculate_commitment_streak(commitment, num_periods=8) -> dict:
     Calculate consecutive periods where commitment target was met, accounting
     for banked time/sessions that can cover deficits.
     """
+    return calculate_commitment_streaks([commitment], num_periods)[commitment.pk]
+
+
+def calculate_commitment_streaks(commitments, num_periods=8) -> dict:
+    """
+    ``{pk: streak}`` as calculate_commitment_streak returns it, for many
+    commitments with one ledger query and at most one session query.
+    """
+    commitments = list(commitments)
     now = timezone.now()
-    start_dt = get_commitment_start_datetime(commitment)
-    _, span_end = get_period_bounds(commitment.period, now)
-    span_sessions = get_commitment_sessions_queryset(
-        commitment, start_dt, span_end
-    )
-    session_rows = list(
-        Sessions.objects.filter(pk__in=span_sessions.values("pk"))
-        .order_by("end_time", "pk")
-        .values_list("pk", "start_time", "end_time")
-    )
-    session_index = 0
     # Migration cutover deliberately creates no synthetic history. Closed rows
     # are authoritative where present; older/missing periods continue to use
     # the legacy session simulation so v1 streak payloads remain unchanged.
-    replay_rows = {
-        row.period_start: row
-        for row in commitment.period_rows.filter(
-            generation=commitment.generation
-        ).order_by("period_start")
-    }
-
-    all_periods = []
-    check_date = start_dt
-
-    while True:
-        period_start, period_end = get_period_bounds(commitment.period, check_date)
-
-        if period_end <= start_dt:
-            check_date = period_end + timedelta(seconds=1)
-            continue
-
-        is_current = period_start <= now < period_end
-        effective_start = max(period_start, start_dt)
-
-        while (
-            session_index < len(session_rows)
-            and session_rows[session_index][2] < effective_start
-        ):
-            session_index += 1
-
-        bucket = []
-        while (
-            session_index < len(session_rows)
-            and session_rows[session_index][2] < period_end
-        ):
-            bucket.append(session_rows[session_index])
-            session_index += 1
-
-        if commitment.commitment_type == "time":
-            actual = sum(
-                (end_time - start_time).total_seconds() / 60
-                for _, start_time, end_time in bucket
-            )
-        else:
-            actual = len(bucket)
-
-        replay_row = replay_rows.get(period_start)
-        if replay_row is not None:
-            actual = (
-                replay_row.accrued_numerator / 10000
+    by_pk = {commitment.pk: commitment for commitment in commitments}
+    replay_rows = defaultdict(dict)
+    for commitment_id, generation, period_start, accrued_numerator, session_count in (
+        CommitmentPeriod.objects.filter(commitment__in=list(by_pk)).values_list(
+            "commitment_id",
+            "generation",
+            "period_start",
+            "accrued_numerator",
+            "session_count",
+        )
+    ):
+        commitment = by_pk[commitment_id]
+        if generation == commitment.generation:
+            replay_rows[commitment_id][period_start] = (
+                accrued_numerator / 10000
                 if commitment.commitment_type == "time"
-                else replay_row.session_count
+                else session_count
             )
 
-        all_periods.append(
+    all_periods = {}
+    legacy = {}
+    flags = {}
+    for commitment in commitments:
+        start_dt = get_commitment_start_datetime(commitment)
+        rows = replay_rows[commitment.pk]
+        periods = all_periods[commitment.pk] = [
             {
                 "period_start": period_start,
-                "effective_period_start": effective_start,
+                "effective_period_start": max(period_start, start_dt),
                 "period_end": period_end,
-                "actual": actual,
+                "actual": rows.get(period_start, 0),
                 "target": commitment.target,
-                "is_current": is_current,
+                "is_current": period_start <= now < period_end,
             }
+            for period_start, period_end in iter_period_bounds(
+                commitment.period, start_dt, now
+            )
+        ]
+        # Periods without a ledger row are simulated from sessions.
+        missing = [period for period in periods if period["period_start"] not in rows]
+        scope = _commitment_sessions_q(commitment)
+        if missing and scope is not None:
+            legacy[commitment.pk] = missing
+            flags[f"c{commitment.pk}"] = ExpressionWrapper(
+                scope
+                & _ranges_q(
+                    (period["effective_period_start"], period["period_end"])
+                    for period in missing
+                ),
+                output_field=BooleanField(),
+            )
+
+    if flags:
+        # One pass over the sessions of every simulated period, each row
+        # flagged with the commitments it counts for, bucketed by end time
+        # against each commitment's sorted period starts.
+        session_rows = (
+            Sessions.objects.filter(
+                user_id__in={commitment.user_id for commitment in commitments}
+            )
+            .filter(
+                _ranges_q(
+                    sorted(
+                        (period["effective_period_start"], period["period_end"])
+                        for periods in legacy.values()
+                        for period in periods
+                    )
+                )
+            )
+            .annotate(**flags)
+            .order_by("end_time", "pk")
+            .values_list("start_time", "end_time", *flags)
         )
+        starts = {
+            pk: [period["effective_period_start"] for period in periods]
+            for pk, periods in legacy.items()
+        }
+        for start_time, end_time, *matches in session_rows:
+            for pk, matched in zip(legacy, matches):
+                if not matched:
+                    continue
+                index = bisect_right(starts[pk], end_time) - 1
+                # Fortnights can overlap; the earlier period keeps the session.
+                if index > 0 and end_time < legacy[pk][index - 1]["period_end"]:
+                    index -= 1
+                period = legacy[pk][index]
+                if by_pk[pk].commitment_type == "time":
+                    period["actual"] += (end_time - start_time).total_seconds() / 60
+                else:
+                    period["actual"] += 1
 
-        if is_current or period_start > now:
-            break
+    return {
+        commitment.pk: _streak_summary(
+            commitment, all_periods[commitment.pk], num_periods
+        )
+        for commitment in commitments
+    }
 
-        check_date = period_end + timedelta(seconds=1)
 
+def _streak_summary(commitment, all_periods, num_periods) -> dict:
     simulated_balance = 0
     for period in all_periods:
         surplus = period["actual"] - period["target"]
@@ -922,13 +1290,21 @@ def calculate_commitment_streak(commitment, num_periods=8) -> dict:
 def reconcile_commitment(commitment, force: bool = False) -> bool:
     """Compatibility wrapper for all v1/web lazy reconciliation call sites."""
     state = Commitment.objects.only(
-        "needs_recompute", "ledger_start_at", "generation"
+        "needs_recompute", "ledger_start_at", "next_reconcile_at", "generation"
     ).get(pk=commitment.pk)
     commitment.needs_recompute = state.needs_recompute
     commitment.ledger_start_at = state.ledger_start_at
+    commitment.next_reconcile_at = state.next_reconcile_at
     commitment.generation = state.generation
-    if force or state.needs_recompute or state.ledger_start_at is None:
+    if (
+        force
+        or state.needs_recompute
+        or state.ledger_start_at is None
+        or state.next_reconcile_at is None
+    ):
         return recompute_commitment(commitment)
+    if state.next_reconcile_at > timezone.now():
+        return False
 
     revision = (
         state.revisions.filter(
@@ -957,6 +1333,79 @@ def reconcile_commitment(commitment, force: bool = False) -> bool:
     return False
 
 
+def commitment_is_stale(commitment, now=None) -> bool:
+    """Whether the ledger state loaded on ``commitment`` lags its sessions."""
+    if not commitment.active:
+        return False
+    if commitment.needs_recompute or commitment.ledger_start_at is None:
+        return True
+    return (
+        commitment.next_reconcile_at is None
+        or commitment.next_reconcile_at <= (now or timezone.now())
+    )
+
+
+def reconcile_for_read(commitment) -> bool:
+    """
+    Prepare ``commitment`` for a page or API read and return its staleness.
+
+    With ``COMMITMENTS_BACKGROUND_RECONCILE`` the replay belongs to
+    ``manage.py commitments_worker``: reads only initialize a missing ledger
+    and otherwise serve the last reconciled state, flagged when stale.
+    """
+    if not commitment.active:
+        return False
+    if (
+        settings.COMMITMENTS_BACKGROUND_RECONCILE
+        and commitment.ledger_start_at is not None
+    ):
+        return commitment_is_stale(commitment)
+    reconcile_commitment(commitment)
+    return False
+
+
+def due_commitments(now=None):
+    """The reconciliation queue: active commitments whose ledger is stale."""
+    now = now or timezone.now()
+    return Commitment.objects.filter(active=True).filter(
+        Q(needs_recompute=True)
+        | Q(ledger_start_at__isnull=True)
+        | Q(next_reconcile_at__isnull=True)
+        | Q(next_reconcile_at__lte=now)
+    )
+
+
+def reconcile_due_commitments(limit=None) -> int:
+    """
+    Replay queued commitments one transaction at a time; return how many.
+
+    Each row is claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so several
+    workers can drain the queue side by side. A commitment that fails is
+    logged and left queued for the next pass.
+    """
+    attempted = set()
+    while limit is None or len(attempted) < limit:
+        with transaction.atomic():
+            commitment = (
+                due_commitments()
+                .exclude(pk__in=attempted)
+                .select_for_update(skip_locked=True)
+                .order_by("pk")
+                .first()
+            )
+            if commitment is None:
+                break
+            attempted.add(commitment.pk)
+            try:
+                with transaction.atomic():
+                    recompute_commitment(commitment)
+                    # Reads served the stale ledger under the current ETag.
+                    generation.bump(commitment.user_id)
+            except Exception:
+                logger.exception("Failed to reconcile commitment %s", commitment.pk)
+    return len(attempted)
+
+
 def get_commitment_start_datetime(commitment) -> datetime:
     start_date = getattr(commitment, "start_date", None)
     if start_date is None:
@@ -1,13 +1,20 @@
 # core/context_processors.py
 import os
-import json
 from django.conf import settings
 from django.core.cache import cache
-from core.utils import get_active_context
-from core.models import Context
+from core import static_manifest
+from core.utils import get_active_context, request_contexts
+
+
+# Read once per process: with a manifest, rendering does no filesystem I/O.
+# DEBUG always scans, since source files change under the dev server.
+_static_manifest = None if settings.DEBUG else static_manifest.load()
 
 
 def static_version(request):
+    if _static_manifest is not None:
+        return {'static_version': _static_manifest}
+
     # Try to get versions from cache first
     cache_key = 'static_file_versions'
     version = cache.get(cache_key)
@@ -15,35 +22,9 @@ def static_version(request):
     if version:  # If cache hit, return cached version
         return {'static_version': version}
 
-    version = {}
-
     # Use STATIC_ROOT in production, otherwise look in app's static directory
     base_static = settings.STATIC_ROOT if not settings.DEBUG else os.path.join("core", "static")
-
-    static_dirs = {
-        'js': os.path.join(base_static, "core", "js"),
-        'css': os.path.join(base_static, "core", "css"),
-    }
-
-    # Scan each directory (including subdirectories)
-    for dir_path in static_dirs.values():
-        if os.path.exists(dir_path):
-            for entry in os.listdir(dir_path):
-                entry_path = os.path.join(dir_path, entry)
-                if os.path.isfile(entry_path):
-                    name, ext = os.path.splitext(entry)
-                    mtime = int(os.path.getmtime(entry_path))
-                    version[name] = max(version.get(name, 0), mtime)
-                elif os.path.isdir(entry_path):
-                    # For subdirectories, use the max mtime of all files
-                    # as the version key (e.g. "charts" for js/charts/)
-                    max_mtime = 0
-                    for sub_file in os.listdir(entry_path):
-                        sub_path = os.path.join(entry_path, sub_file)
-                        if os.path.isfile(sub_path):
-                            max_mtime = max(max_mtime, os.path.getmtime(sub_path))
-                    if max_mtime:
-                        version[entry] = max(version.get(entry, 0), int(max_mtime))
+    version = static_manifest.scan(base_static)
 
     # Cache the version dictionary and set timeout
     timeout = settings.STATIC_VERSION_CACHE_TIMEOUT['debug'] if settings.DEBUG \
@@ -51,10 +32,6 @@ def static_version(request):
 
     cache.set(cache_key, version, timeout)
 
-    # if settings.DEBUG:
-    #     print("Static directories: ", static_dirs)
-    #     print("Static version: ", json.dumps(version, indent=4))
-
     return {'static_version': version}
 
 
@@ -66,7 +43,7 @@ def active_context(request):
         return {}
 
     context_obj, mode = get_active_context(request)
-    user_contexts = Context.objects.filter(user=request.user).order_by('name')
+    user_contexts = request_contexts(request).all
 
     return {
         'active_context': context_obj,
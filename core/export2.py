@@ -1,12 +1,30 @@
 """Portable, deterministic export format 2."""
 
+import base64
+import json
+import re
+import zlib
 from collections import defaultdict
 from datetime import timezone as datetime_timezone
+from itertools import chain
 
-from django.db.models import Prefetch, QuerySet
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 
 from core.models import SessionSubproject, SubProjects, Tag
+from core.utils import ZIPJSON_KEY
+
+
+# Sessions fetched per query by the streaming writer.
+EXPORT_CHUNK_SIZE = 2000
+# Characters gathered before the streaming writer yields a piece.
+STREAM_BUFFER_SIZE = 64 * 1024
+
+_PLACEHOLDERS = ("\x00export-item-0\x00", "\x00export-item-1\x00")
+_ACCEPTS_GZIP = re.compile(r"\bgzip\b")
 
 
 def _utc_seconds(value):
@@ -15,24 +33,63 @@ def _utc_seconds(value):
     return value.astimezone(datetime_timezone.utc).replace(microsecond=0).isoformat()
 
 
+def _with_export_relations(sessions_queryset):
+    return sessions_queryset.prefetch_related(None).select_related(
+        "project", "project__context"
+    ).prefetch_related(
+        Prefetch("project__tags", queryset=Tag.objects.order_by("name", "id")),
+        Prefetch(
+            "project__subprojects",
+            queryset=SubProjects.objects.order_by("name", "id"),
+        ),
+        Prefetch(
+            "subproject_links",
+            queryset=SessionSubproject.objects.select_related(
+                "subproject"
+            ).order_by("subproject__name", "subproject_id"),
+        ),
+    )
+
+
+def _project_entry(project):
+    return {
+        "name": project.name,
+        "status": project.status,
+        "description": project.description or "",
+        "context": project.context.name if project.context else None,
+        "tags": sorted(tag.name for tag in project.tags.all()),
+        "start_date": _utc_seconds(project.start_date),
+        "subprojects": [
+            {
+                "name": subproject.name,
+                "description": subproject.description or "",
+            }
+            for subproject in project.subprojects.all()
+        ],
+        "sessions": [],
+    }
+
+
+def _session_entry(session):
+    return {
+        "uuid": str(session.uuid) if session.uuid else None,
+        "start": _utc_seconds(session.start_time),
+        "end": _utc_seconds(session.end_time),
+        "note": session.note,
+        "links": [
+            {
+                "subproject": link.subproject.name,
+                "allocation_bp": link.allocation_bp,
+            }
+            for link in session.subproject_links.all()
+        ],
+    }
+
+
 def build_format2_export(sessions_queryset):
     """Build a deterministic format-2 document from completed sessions."""
     if isinstance(sessions_queryset, QuerySet):
-        sessions_queryset = sessions_queryset.prefetch_related(None).select_related(
-            "project", "project__context"
-        ).prefetch_related(
-            Prefetch("project__tags", queryset=Tag.objects.order_by("name", "id")),
-            Prefetch(
-                "project__subprojects",
-                queryset=SubProjects.objects.order_by("name", "id"),
-            ),
-            Prefetch(
-                "subproject_links",
-                queryset=SessionSubproject.objects.select_related(
-                    "subproject"
-                ).order_by("subproject__name", "subproject_id"),
-            ),
-        )
+        sessions_queryset = _with_export_relations(sessions_queryset)
 
     sessions_by_project = defaultdict(list)
     for session in sessions_queryset:
@@ -44,39 +101,160 @@ def build_format2_export(sessions_queryset):
             sessions_by_project[project_name],
             key=lambda session: (session.start_time, session.id),
         )
-        project = sessions[0].project
-        projects.append(
-            {
-                "name": project.name,
-                "status": project.status,
-                "description": project.description or "",
-                "context": project.context.name if project.context else None,
-                "tags": sorted(tag.name for tag in project.tags.all()),
-                "start_date": _utc_seconds(project.start_date),
-                "subprojects": [
-                    {
-                        "name": subproject.name,
-                        "description": subproject.description or "",
-                    }
-                    for subproject in project.subprojects.all()
-                ],
-                "sessions": [
-                    {
-                        "uuid": str(session.uuid) if session.uuid else None,
-                        "start": _utc_seconds(session.start_time),
-                        "end": _utc_seconds(session.end_time),
-                        "note": session.note,
-                        "links": [
-                            {
-                                "subproject": link.subproject.name,
-                                "allocation_bp": link.allocation_bp,
-                            }
-                            for link in session.subproject_links.all()
-                        ],
-                    }
-                    for session in sessions
-                ],
-            }
-        )
+        project = _project_entry(sessions[0].project)
+        project["sessions"] = [_session_entry(session) for session in sessions]
+        projects.append(project)
 
     return {"format": 2, "projects": projects}
+
+
+def iter_format2_projects(sessions_queryset, *, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield ``(project, sessions)`` pairs of format-2 entries in document order.
+
+    ``project`` is the project entry with an empty ``sessions`` list and
+    ``sessions`` lazily yields its session entries, read with
+    ``.iterator(chunk_size=...)``; consume it before advancing. Names are
+    sorted in Python, as ``build_format2_export`` does, rather than by a
+    database collation that may order them differently.
+    """
+    project_ids = defaultdict(list)
+    for project_id, name in (
+        sessions_queryset.order_by()
+        .values_list("project_id", "project__name")
+        .distinct()
+    ):
+        project_ids[name].append(project_id)
+
+    sessions_queryset = sessions_queryset.prefetch_related(None).select_related(
+        "project", "project__context"
+    ).prefetch_related(
+        Prefetch(
+            "subproject_links",
+            queryset=SessionSubproject.objects.select_related(
+                "subproject"
+            ).order_by("subproject__name", "subproject_id"),
+        )
+    )
+    for name in sorted(project_ids):
+        sessions = (
+            sessions_queryset.filter(project_id__in=project_ids[name])
+            .order_by("start_time", "id")
+            .iterator(chunk_size=chunk_size)
+        )
+        first = next(sessions, None)
+        if first is None:
+            continue
+        prefetch_related_objects(
+            [first.project],
+            Prefetch("tags", queryset=Tag.objects.order_by("name", "id")),
+            Prefetch("subprojects", queryset=SubProjects.objects.order_by("name", "id")),
+        )
+        yield _project_entry(first.project), map(_session_entry, chain([first], sessions))
+
+
+def _list_layout(encoder, wrap):
+    """Split ``encoder``'s rendering of ``wrap(items)`` around its items.
+
+    Returns the text before the first item, between two items and after the
+    last one, found by rendering two placeholder items.
+    """
+    text = encoder.encode(wrap(list(_PLACEHOLDERS)))
+    before, _, tail = text.rpartition(encoder.encode(_PLACEHOLDERS[1]))
+    head, _, separator = before.rpartition(encoder.encode(_PLACEHOLDERS[0]))
+    return head, separator, tail
+
+
+def _nested(encoder, text, depth):
+    """Re-indent text rendered at the top level for ``depth`` levels down."""
+    if encoder.indent is None:
+        return text
+    unit = " " * encoder.indent if isinstance(encoder.indent, int) else encoder.indent
+    return text.replace("\n", "\n" + unit * depth)
+
+
+def _buffered(pieces):
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= STREAM_BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_format2_json(sessions_queryset, *, chunk_size=EXPORT_CHUNK_SIZE, **dumps_kwargs):
+    """Yield ``json.dumps(build_format2_export(sessions_queryset), **dumps_kwargs)``
+    in pieces, holding one chunk of sessions at a time.
+
+    Sessions are read per project with ``.iterator(chunk_size=...)``; the
+    output is byte-identical to the in-memory document for any indent,
+    separators or ensure_ascii.
+    """
+    encoder = json.JSONEncoder(**dumps_kwargs)
+
+    def pieces():
+        head, separator, tail = _list_layout(
+            encoder, lambda projects: {"format": 2, "projects": projects}
+        )
+        started = False
+        for project, sessions in iter_format2_projects(
+            sessions_queryset, chunk_size=chunk_size
+        ):
+            project_head, session_separator, project_tail = _list_layout(
+                encoder, lambda items: {**project, "sessions": items}
+            )
+            yield separator if started else head
+            started = True
+            yield _nested(encoder, project_head, 2)
+            session_separator = _nested(encoder, session_separator, 2)
+            for index, session in enumerate(sessions):
+                if index:
+                    yield session_separator
+                yield _nested(encoder, encoder.encode(session), 4)
+            yield _nested(encoder, project_tail, 2)
+        yield tail if started else encoder.encode({"format": 2, "projects": []})
+
+    return _buffered(pieces())
+
+
+def iter_format2_compressed(
+    sessions_queryset, *, chunk_size=EXPORT_CHUNK_SIZE, **dumps_kwargs
+):
+    """Yield ``json.dumps(json_compress(document), **dumps_kwargs)`` in pieces,
+    deflating and base64-encoding the document as it is written."""
+    encoder = json.JSONEncoder(**dumps_kwargs)
+    head, _, tail = encoder.encode({ZIPJSON_KEY: _PLACEHOLDERS[0]}).rpartition(
+        encoder.encode(_PLACEHOLDERS[0])
+    )
+    yield head + '"'
+    compressor = zlib.compressobj()
+    pending = b""
+    for piece in iter_format2_json(sessions_queryset, chunk_size=chunk_size):
+        pending += compressor.compress(piece.encode("utf-8"))
+        # base64 is only stable across pieces in whole 3-byte groups.
+        usable = len(pending) - len(pending) % 3
+        if usable:
+            yield base64.b64encode(pending[:usable]).decode("ascii")
+            pending = pending[usable:]
+    pending += compressor.flush()
+    yield base64.b64encode(pending).decode("ascii") + '"' + tail
+
+
+def export_response(request, chunks, *, filename=None, content_type="application/json"):
+    """Stream ``chunks`` (text or bytes) as a response, gzip-encoded on the
+    fly when the client accepts it."""
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    if _ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")):
+        # Same BREACH padding as GZipMiddleware.
+        response.streaming_content = compress_sequence(
+            response.streaming_content, max_random_bytes=100
+        )
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,289 @@
+"""Database-free validation of format-2 projects.
+
+``check_project`` turns one raw project into import-ready values and its
+error list without touching the database or any other project, so large
+batches can fan ``validate_project`` out to worker processes (see
+``core.importer2``). The batch-wide duplicate checks a project cannot make
+alone come back as ``marks`` for ``merge_marks`` to settle in document order.
+"""
+
+from collections import namedtuple
+from datetime import date, datetime, time, timezone as datetime_timezone
+from uuid import UUID
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.session_canonical import canonical_digest, canonical_session_content
+
+
+# ``marks`` are (error position, batch-wide key, message) triples: the message
+# is inserted at that position if the key was already seen in the batch.
+ProjectCheck = namedtuple("ProjectCheck", ["project", "errors", "marks"])
+ProjectVerdict = namedtuple("ProjectVerdict", ["errors", "marks", "fingerprints"])
+
+
+def _instant(value, path, errors):
+    if not isinstance(value, str):
+        errors.append(f"{path}: expected an ISO-8601 timestamp")
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        errors.append(f"{path}: expected an ISO-8601 timestamp")
+        return None
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=datetime_timezone.utc)
+    return parsed.astimezone(datetime_timezone.utc).replace(microsecond=0)
+
+
+def _start_date(value, path, errors):
+    parsed = _instant(value, path, []) if isinstance(value, str) else None
+    if parsed is not None:
+        return parsed
+    try:
+        parsed_date = date.fromisoformat(value)
+    except (TypeError, ValueError):
+        errors.append(f"{path}: expected an ISO-8601 date or timestamp")
+        return None
+    return datetime.combine(parsed_date, time.min, tzinfo=datetime_timezone.utc)
+
+
+def _string(value, path, errors, *, nullable=False, max_length=None):
+    if nullable and value is None:
+        return None
+    if not isinstance(value, str):
+        errors.append(f"{path}: expected a string" + (" or null" if nullable else ""))
+        return None
+    if max_length is not None and len(value) > max_length:
+        errors.append(f"{path}: must contain at most {max_length} characters")
+    return value
+
+
+def check_project(existing_names, valid_statuses, indexed_project):
+    """Validate one ``(project_index, raw_project)`` pair.
+
+    ``existing_names`` maps each stored project name to its subproject names.
+    Sessions of an error-free project carry their canonical ``content``.
+    """
+    project_index, raw_project = indexed_project
+    errors = []
+    marks = []
+    path = f"projects[{project_index}]"
+    if not isinstance(raw_project, dict):
+        errors.append(f"{path}: expected an object")
+        return ProjectCheck(None, errors, marks)
+    name = _string(raw_project.get("name"), f"{path}.name", errors, max_length=255)
+    if not name:
+        errors.append(f"{path}.name: must not be blank")
+    else:
+        marks.append(
+            (len(errors), ("project", name), f"{path}.name: duplicate project name {name!r}")
+        )
+
+    status = _string(raw_project.get("status"), f"{path}.status", errors)
+    if status is not None and status not in valid_statuses:
+        errors.append(f"{path}.status: invalid status {status!r}")
+    description = _string(
+        raw_project.get("description"), f"{path}.description", errors
+    )
+    context = _string(
+        raw_project.get("context"),
+        f"{path}.context",
+        errors,
+        nullable=True,
+        max_length=100,
+    )
+    start_date = _start_date(raw_project.get("start_date"), f"{path}.start_date", errors)
+
+    raw_tags = raw_project.get("tags")
+    tags = []
+    if not isinstance(raw_tags, list):
+        errors.append(f"{path}.tags: expected a list")
+    else:
+        for tag_index, raw_tag in enumerate(raw_tags):
+            tag = _string(
+                raw_tag, f"{path}.tags[{tag_index}]", errors, max_length=100
+            )
+            if tag is not None and not tag:
+                errors.append(f"{path}.tags[{tag_index}]: must not be blank")
+            elif tag is not None:
+                tags.append(tag)
+    tags = sorted(set(tags))
+
+    raw_subprojects = raw_project.get("subprojects")
+    subprojects = []
+    declared_names = set()
+    if not isinstance(raw_subprojects, list):
+        errors.append(f"{path}.subprojects: expected a list")
+        raw_subprojects = []
+    for subproject_index, raw_subproject in enumerate(raw_subprojects):
+        sub_path = f"{path}.subprojects[{subproject_index}]"
+        if not isinstance(raw_subproject, dict):
+            errors.append(f"{sub_path}: expected an object")
+            continue
+        sub_name = _string(
+            raw_subproject.get("name"), f"{sub_path}.name", errors, max_length=255
+        )
+        sub_description = _string(
+            raw_subproject.get("description"), f"{sub_path}.description", errors
+        )
+        if not sub_name:
+            errors.append(f"{sub_path}.name: must not be blank")
+        elif sub_name in declared_names:
+            errors.append(f"{sub_path}.name: duplicate scoped name {sub_name!r}")
+        declared_names.add(sub_name)
+        subprojects.append({"name": sub_name, "description": sub_description})
+
+    raw_sessions = raw_project.get("sessions")
+    sessions = []
+    if not isinstance(raw_sessions, list):
+        errors.append(f"{path}.sessions: expected a list")
+        raw_sessions = []
+    resolvable_names = existing_names.get(name, set()) | declared_names
+
+    for session_index, raw_session in enumerate(raw_sessions):
+        session_path = f"{path}.sessions[{session_index}]"
+        if not isinstance(raw_session, dict):
+            errors.append(f"{session_path}: expected an object")
+            continue
+        raw_uuid = raw_session.get("uuid")
+        session_uuid = None
+        if raw_uuid is not None:
+            try:
+                session_uuid = UUID(str(raw_uuid))
+            except (TypeError, ValueError, AttributeError):
+                errors.append(f"{session_path}.uuid: expected a UUID or null")
+            else:
+                marks.append(
+                    (
+                        len(errors),
+                        ("uuid", session_uuid),
+                        f"{session_path}.uuid: duplicate UUID {session_uuid} in batch",
+                    )
+                )
+
+        allocation_mode = raw_session.get("allocation_mode")
+        if allocation_mode not in (None, "legacy_full", "partitioned"):
+            errors.append(
+                f"{session_path}.allocation_mode: expected legacy_full or partitioned"
+            )
+        start = _instant(raw_session.get("start"), f"{session_path}.start", errors)
+        end = _instant(raw_session.get("end"), f"{session_path}.end", errors)
+        if start is not None and end is not None and end < start:
+            errors.append(f"{session_path}.end: must be on or after start")
+        note = _string(
+            raw_session.get("note"), f"{session_path}.note", errors, nullable=True
+        )
+
+        raw_links = raw_session.get("links")
+        links = []
+        link_names = set()
+        total_bp = 0
+        if not isinstance(raw_links, list):
+            errors.append(f"{session_path}.links: expected a list")
+            raw_links = []
+        for link_index, raw_link in enumerate(raw_links):
+            link_path = f"{session_path}.links[{link_index}]"
+            if not isinstance(raw_link, dict):
+                errors.append(f"{link_path}: expected an object")
+                continue
+            subproject_name = _string(
+                raw_link.get("subproject"),
+                f"{link_path}.subproject",
+                errors,
+                max_length=255,
+            )
+            allocation_bp = raw_link.get("allocation_bp")
+            if (
+                isinstance(allocation_bp, bool)
+                or not isinstance(allocation_bp, int)
+                or not 1 <= allocation_bp <= 10000
+            ):
+                errors.append(f"{link_path}.allocation_bp: must be an integer from 1 to 10000")
+            else:
+                total_bp += allocation_bp
+            if subproject_name in link_names:
+                errors.append(
+                    f"{link_path}.subproject: duplicate link {subproject_name!r}"
+                )
+            link_names.add(subproject_name)
+            if subproject_name not in resolvable_names:
+                errors.append(
+                    f"{link_path}.subproject: scoped name {subproject_name!r} "
+                    f"does not exist in project {name!r}"
+                )
+            links.append((subproject_name, allocation_bp))
+        coerce_even = allocation_mode == "legacy_full" or (
+            allocation_mode is None
+            and len(links) > 1
+            and all(allocation_bp == 10000 for _, allocation_bp in links)
+        )
+        if coerce_even and links:
+            quotient, remainder = divmod(10000, len(links))
+            first_name = min(name for name, _ in links)
+            links = [
+                (name, quotient + (remainder if name == first_name else 0))
+                for name, _ in links
+            ]
+            total_bp = 10000
+        if total_bp > 10000:
+            errors.append(
+                f"{session_path}.links: allocation sum must not exceed 10000"
+            )
+
+        session = {
+            "uuid": session_uuid,
+            "start": start,
+            "end": end,
+            "note": note,
+            "links": links,
+        }
+        sessions.append(session)
+
+    if not errors:
+        for session in sessions:
+            session["content"] = canonical_session_content(
+                name, session["start"], session["end"], session["note"], session["links"]
+            )
+    project = {
+        "name": name,
+        "status": status,
+        "description": description,
+        "context": context,
+        "tags": tags,
+        "start_date": start_date,
+        "subprojects": subprojects,
+        "sessions": sessions,
+    }
+    return ProjectCheck(project, errors, marks)
+
+
+def validate_project(existing_names, valid_statuses, indexed_project):
+    """``check_project`` reduced to what a validation pass needs back.
+
+    ``fingerprints`` pair each identified session's UUID with the digest of
+    its canonical content; unlike the normalized project they are cheap to
+    send between processes.
+    """
+    check = check_project(existing_names, valid_statuses, indexed_project)
+    fingerprints = []
+    if check.project is not None and not check.errors:
+        fingerprints = [
+            (str(session["uuid"]), canonical_digest(session["content"]))
+            for session in check.project["sessions"]
+            if session["uuid"] is not None
+        ]
+    return ProjectVerdict(check.errors, check.marks, fingerprints)
+
+
+def merge_marks(check, seen, errors):
+    """Settle ``check``'s batch-wide duplicates against ``seen`` and extend
+    ``errors`` with its errors in document order."""
+    cursor = 0
+    for position, key, message in check.marks:
+        if key in seen:
+            errors.extend(check.errors[cursor:position])
+            errors.append(message)
+            cursor = position
+        seen.add(key)
+    errors.extend(check.errors[cursor:])
@@ -335,7 +335,7 @@ class ImportJSONForm(forms.Form):
             'import_context_new',
         ]
         widgets = {
-            'file': forms.FileInput(attrs={'accept': '.json'}),
+            'file': forms.FileInput(attrs={'accept': '.json,.autumn'}),
         }
 
     def __init__(self, *args, **kwargs):
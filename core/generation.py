@@ -0,0 +1,62 @@
+"""Per-user data generation behind the v2 conditional GETs.
+
+Every write that can change a v2 read payload calls ``bump`` next to its
+other post-mutation hooks: ``mark_commitments_dirty`` and ``changelog.record``
+cover sessions, projects, subprojects and imports, and the commitment,
+context and tag write paths call it directly. Readers compare ``current``
+against the generation baked into the client's ETag.
+
+The bump is an ``UPDATE`` inside the writer's transaction, so readers see
+the new generation exactly when they can see the new rows, and the row lock
+it takes serializes one user's writers until commit.
+"""
+
+from django.db.models import F
+
+from core.models import DataGeneration
+
+
+def bump(user_id):
+    """Advance ``user_id``'s generation by one."""
+    generations = DataGeneration.objects.filter(user_id=user_id)
+    if generations.update(value=F("value") + 1):
+        return
+    _, created = DataGeneration.objects.get_or_create(
+        user_id=user_id, defaults={"value": 1}
+    )
+    if not created:
+        # Lost the race to create the row; still count this write.
+        generations.update(value=F("value") + 1)
+
+
+def lock(user_id):
+    """Hold ``user_id``'s generation row lock until the transaction ends.
+
+    The row is the one per-user row every writer can lock even before the
+    user has any other state, so paths that must serialize against each other
+    (a rollup rebuild and the session writers maintaining it) lock it without
+    changing the generation.
+    """
+    generations = DataGeneration.objects.select_for_update().filter(user_id=user_id)
+    if generations.first() is None:
+        DataGeneration.objects.get_or_create(user_id=user_id)
+        generations.first()
+
+
+def current(user_id):
+    """``user_id``'s generation, 0 before the first recorded write."""
+    value = (
+        DataGeneration.objects.filter(user_id=user_id)
+        .values_list("value", flat=True)
+        .first()
+    )
+    return value or 0
+
+
+def for_request(request):
+    """``current`` for the request's user, looked up once per request."""
+    try:
+        return request._data_generation
+    except AttributeError:
+        request._data_generation = current(request.user.pk)
+        return request._data_generation
@@ -1,23 +1,85 @@
 """Shared project/session JSON import implementation."""
 
+from collections import defaultdict
 from datetime import datetime, timedelta
 
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 
-from .models import Commitment, Projects, Sessions, SubProjects, status_choices
-from .services import DestructiveMutationService, SessionMutationService
+from . import changelog
+from .archive3 import Format3Archive, is_format3_archive
+from .commitments import mark_commitments_dirty
+from .models import Projects, Sessions, SessionSubproject, SubProjects, status_choices
+from .services import (
+    DestructiveMutationService,
+    SessionMutationService,
+    even_split_bps,
+)
 from .totals import derived_project_last_updated, derived_project_totals
-from .importer2 import import_format2
+from .importer2 import Format2ValidationError, import_format2, import_format2_projects
+from .json_stream import JsonStream, document_chunks
 from .utils import (
     apply_context_and_tags_to_project,
-    session_exists,
     sessions_get_earliest_latest,
 )
 
 
+class _SessionIndex:
+    """``session_exists`` for one project, answered from memory.
+
+    Sessions are bucketed by start and end into tolerance-wide slots, so a
+    probe compares against the few sessions in the neighbouring slots only.
+    """
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self._width = tolerance.total_seconds()
+        self._slots = defaultdict(list)
+
+    @classmethod
+    def for_project(cls, user, project, tolerance):
+        index = cls(tolerance)
+        names = defaultdict(list)
+        for session_id, name in SessionSubproject.objects.filter(
+            session__user=user, session__project=project
+        ).values_list("session_id", "subproject__name"):
+            names[session_id].append(name)
+        for session_id, start_time, end_time in Sessions.objects.filter(
+            user=user, project=project, end_time__isnull=False
+        ).values_list("pk", "start_time", "end_time"):
+            index.add(start_time, end_time, names[session_id])
+        return index
+
+    def _slot(self, instant):
+        seconds = instant.timestamp()
+        return seconds // self._width if self._width > 0 else seconds
+
+    def add(self, start_time, end_time, subproject_names):
+        self._slots[self._slot(start_time), self._slot(end_time)].append(
+            (start_time, end_time, frozenset(name.lower() for name in subproject_names))
+        )
+
+    def contains(self, start_time, end_time, subproject_names):
+        names = frozenset(name.lower() for name in subproject_names)
+        start_slot = self._slot(start_time)
+        end_slot = self._slot(end_time)
+        offsets = (-1, 0, 1) if self._width > 0 else (0,)
+        return any(
+            abs(candidate_start - start_time) <= self.tolerance
+            and abs(candidate_end - end_time) <= self.tolerance
+            and candidate_names == names
+            for start_offset in offsets
+            for end_offset in offsets
+            for candidate_start, candidate_end, candidate_names in self._slots.get(
+                (start_slot + start_offset, end_slot + end_offset), ()
+            )
+        )
+
+
 def _iter_import_format1(
     user,
-    data: dict,
+    projects,
+    total_projects,
     *,
     force=False,
     merge=False,
@@ -28,6 +90,9 @@ def _iter_import_format1(
 ):
     """Import exported project data for ``user``, yielding progress messages.
 
+    ``projects`` yields ``(name, project_data)`` pairs, ``total_projects`` of
+    them; they are consumed one at a time.
+
     Generator: yields the same human-readable messages the streaming import
     view reports to the browser, as they happen. Its return value (available
     via ``StopIteration.value`` or the ``run_import`` wrapper) is the import
@@ -38,8 +103,7 @@ def _iter_import_format1(
     projects_updated = 0
     sessions_imported = 0
 
-    total_projects = len(data.items())
-    for idx, (project_name, project_data) in enumerate(data.items(), 1):
+    for idx, (project_name, project_data) in enumerate(projects, 1):
         yield (f"Processing project {idx}/{total_projects}: {project_name}")
 
         project = Projects.objects.filter(name=project_name, user=user).first()
@@ -185,11 +249,23 @@ def _iter_import_format1(
                     f"'{project_name}'"
                 )
 
-        # Process sessions.
+        # Process sessions. Duplicates are probed against an in-memory index of
+        # the project's sessions (including those accepted from this file) and
+        # the new rows are written in one batch.
         total_sessions = len(project_data["Session History"])
         yield (f"Processing {total_sessions} sessions for {project_name}")
 
-        for session_idx, session_data in enumerate(project_data["Session History"], 1):
+        existing = _SessionIndex.for_project(
+            user, project, timedelta(minutes=tolerance)
+        )
+        subprojects_by_name = {
+            subproject.name: subproject
+            for subproject in SubProjects.objects.filter(
+                user=user, parent_project=project
+            )
+        }
+        rows = []
+        for session_data in project_data["Session History"]:
             start_time = timezone.make_aware(
                 datetime.strptime(
                     f"{session_data['Date']} {session_data['Start Time']}",
@@ -211,14 +287,7 @@ def _iter_import_format1(
             if end_time < start_time:
                 start_time -= timedelta(days=1)
 
-            if session_exists(
-                user,
-                project,
-                start_time,
-                end_time,
-                subproject_names,
-                time_tolerance=timedelta(minutes=tolerance),
-            ):
+            if existing.contains(start_time, end_time, subproject_names):
                 continue
 
             if verbose:
@@ -229,27 +298,37 @@ def _iter_import_format1(
 
             session_subprojects = []
             for subproject_name in subproject_names:
-                try:
-                    subproject = SubProjects.objects.get(
-                        user=user, name=subproject_name, parent_project=project
-                    )
-                    session_subprojects.append(subproject)
-                except SubProjects.DoesNotExist:
+                subproject = subprojects_by_name.get(subproject_name)
+                if subproject is None:
                     yield (
                         f"Warning: Subproject not found: {subproject_name}. Subproject "
                         f"will not be added to session."
                     )
                     continue
-            SessionMutationService.create_session(
-                user=user,
-                project=project,
-                start_time=start_time,
-                end_time=end_time,
-                is_active=False,
-                note=note,
-                subprojects=session_subprojects,
+                session_subprojects.append(subproject)
+            split = even_split_bps(subproject.pk for subproject in session_subprojects)
+            rows.append(
+                {
+                    "project": project,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "note": note,
+                    "allocations": [
+                        (subproject, split[subproject.pk])
+                        for subproject in session_subprojects
+                    ],
+                }
+            )
+            existing.add(
+                start_time,
+                end_time,
+                [subproject.name for subproject in session_subprojects],
             )
-            sessions_imported += 1
+
+        for result in SessionMutationService.create_sessions(user=user, rows=rows):
+            if isinstance(result, ValidationError):
+                raise result
+        sessions_imported += len(rows)
 
         yield ("\n\n")
 
@@ -269,9 +348,11 @@ def _iter_import_format1(
                 )
                 subproject.save(update_fields=["start_date"])
 
-        # Imports may also change project/context metadata without writing a
-        # session, so conservatively invalidate every commitment for the user.
-        Commitment.objects.filter(user=user).update(needs_recompute=True)
+        changelog.record(
+            user.pk,
+            projects=[project.pk],
+            subprojects=project.subprojects.values_list("pk", flat=True),
+        )
 
         if not merge:
             tally = derived_project_totals(user, [project.pk])[project.pk]
@@ -285,6 +366,7 @@ def _iter_import_format1(
                     f"expected {project_data['Total Time']}, got {tally}. "
                     f"Mismatch: {mismatch}"
                 )
+                mark_commitments_dirty(user.pk)
                 return {
                     "projects_processed": idx,
                     "projects_created": projects_created,
@@ -293,6 +375,10 @@ def _iter_import_format1(
                     "skipped": skipped,
                 }
 
+    # Imports may also change project/context metadata without writing a
+    # session, so conservatively invalidate every commitment for the user.
+    mark_commitments_dirty(user.pk)
+
     if skipped:
         yield (f"Import completed with skipped projects: {', '.join(skipped)}")
     else:
@@ -332,7 +418,104 @@ def iter_import(
     return (
         yield from _iter_import_format1(
             user,
-            data,
+            data.items(),
+            len(data),
+            force=force,
+            merge=merge,
+            tolerance=tolerance,
+            verbose=verbose,
+            autumn_import=autumn_import,
+            import_into_context=import_into_context,
+        )
+    )
+
+
+def _scan_document(path):
+    """The document's format-2 marker and its number of top-level members."""
+    stream = JsonStream(document_chunks(path))
+    document_format = None
+    members = 0
+    for key in stream.members():
+        members += 1
+        if key == "format":
+            document_format = stream.value()
+            if document_format == 2:
+                break
+    else:
+        stream.end()
+    return document_format, members
+
+
+def _format1_projects(path):
+    stream = JsonStream(document_chunks(path))
+    for project_name in stream.members():
+        yield project_name, stream.value()
+    stream.end()
+
+
+def _format2_projects(path):
+    stream = JsonStream(document_chunks(path))
+    found = False
+    for key in stream.members():
+        if key != "projects":
+            continue
+        if stream.peek() != "[":
+            break
+        found = True
+        yield from stream.items()
+    if not found:
+        raise Format2ValidationError(["projects: expected a list"])
+
+
+def iter_import_file(
+    user,
+    path,
+    *,
+    force=False,
+    merge=False,
+    tolerance=2,
+    verbose=False,
+    autumn_import=False,
+    import_into_context=None,
+):
+    """``iter_import`` reading the export file at ``path`` incrementally.
+
+    The file may be plain or ``json_compress``-ed JSON, or a format-3 archive.
+    Memory stays bounded by the largest single project rather than the file:
+    format 1 is imported one project at a time, formats 2 and 3 are validated
+    and then written in two passes over the file. Malformed JSON raises
+    ``json.JSONDecodeError``, possibly after earlier format-1 projects were
+    imported; a damaged archive raises ``Format3ArchiveError`` before anything
+    is written.
+    """
+    if is_format3_archive(path):
+        yield "Verifying format-3 archive"
+        with Format3Archive(path) as archive:
+            archive.verify()
+            summary = import_format2_projects(
+                user,
+                archive.projects,
+                force=force,
+                import_into_context=import_into_context,
+            )
+        yield "Import completed successfully!"
+        return summary
+    document_format, total_projects = _scan_document(path)
+    if document_format == 2:
+        yield "Validating format-2 import batch"
+        summary = import_format2_projects(
+            user,
+            lambda: _format2_projects(path),
+            force=force,
+            import_into_context=import_into_context,
+        )
+        yield "Import completed successfully!"
+        return summary
+    return (
+        yield from _iter_import_format1(
+            user,
+            _format1_projects(path),
+            total_projects,
             force=force,
             merge=merge,
             tolerance=tolerance,
@@ -370,6 +553,36 @@ def run_import(
         autumn_import=autumn_import,
         import_into_context=import_into_context,
     )
+    return _drain(gen, progress)
+
+
+def run_import_file(
+    user,
+    path,
+    *,
+    force=False,
+    merge=False,
+    tolerance=2,
+    verbose=False,
+    autumn_import=False,
+    import_into_context=None,
+    progress=None,
+) -> dict:
+    """Non-streaming wrapper around ``iter_import_file``; see ``run_import``."""
+    gen = iter_import_file(
+        user,
+        path,
+        force=force,
+        merge=merge,
+        tolerance=tolerance,
+        verbose=verbose,
+        autumn_import=autumn_import,
+        import_into_context=import_into_context,
+    )
+    return _drain(gen, progress)
+
+
+def _drain(gen, progress):
     while True:
         try:
             message = next(gen)
@@ -0,0 +1,276 @@
+"""Incremental reading of import files too large to load in one piece.
+
+Export files nest everything that grows (projects, sessions) one or two levels
+below the top-level object, so the importer only needs events at those
+levels: ``JsonStream.members`` walks an object's keys, after which the caller
+parses the value (``value``), walks an array's elements one parsed value at a
+time (``items``), or lets it be skipped. Each value is located with a regex
+scan over a bounded buffer and handed to ``json.loads``, so memory is bounded
+by the largest single value read, never by the file.
+
+``document_chunks`` supplies the text, transparently inflating a
+``json_compress`` envelope (base64 of zlib) chunk by chunk.
+
+Malformed input raises ``json.JSONDecodeError`` like ``json.loads`` would;
+positions are relative to the buffered window, not the file.
+"""
+
+import base64
+import codecs
+import json
+import re
+import zlib
+
+from core.utils import ZIPJSON_KEY
+
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+# A whole string, a bracket, or (last resort) the quote of an unfinished one.
+_STRUCTURE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]"]')
+_SCALAR_END = re.compile(r"[\s,\]}]")
+_STRING_STOP = re.compile(r'["\\]')
+
+
+class JsonStream:
+    """Pull parser over an iterator of text chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        # Set while a member's value has been announced but not consumed.
+        self._pending = False
+
+    def _error(self, message):
+        raise json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _fill(self):
+        """Append the next chunk; False once the input is exhausted."""
+        if self._eof:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += chunk
+                return True
+        self._eof = True
+        return False
+
+    def _compact(self):
+        if self._pos:
+            self._buffer = self._buffer[self._pos :]
+            self._pos = 0
+
+    def peek(self):
+        """The next non-whitespace character, or "" at the end of input."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            self._compact()
+            if not self._fill():
+                return ""
+
+    def _expect(self, character):
+        if self.peek() != character:
+            self._error(f"Expecting {character!r}")
+        self._pos += 1
+
+    def _scan(self):
+        """Advance past one value and return its text."""
+        first = self.peek()
+        self._compact()
+        if not first:
+            self._error("Expecting value")
+        if first == '"':
+            end = self._scan_string(0)
+        elif first in "{[":
+            end = self._scan_container()
+        else:
+            end = self._scan_scalar()
+        text = self._buffer[:end]
+        self._pos = end
+        return text
+
+    def _scan_string(self, start):
+        while True:
+            match = _STRING.match(self._buffer, start)
+            if match:
+                return match.end()
+            if not self._fill():
+                self._error("Unterminated string")
+
+    def _scan_container(self):
+        depth = 0
+        index = 0
+        while True:
+            match = _STRUCTURE.search(self._buffer, index)
+            if match is None:
+                index = len(self._buffer)
+                if not self._fill():
+                    self._error("Unterminated value")
+                continue
+            character = match.group()
+            if character == '"':
+                index = self._scan_string(match.start())
+                continue
+            index = match.end()
+            if len(character) > 1:
+                continue
+            # Bracket pairing is left to json.loads on the extracted text.
+            depth += 1 if character in "{[" else -1
+            if depth == 0:
+                return index
+
+    def _scan_scalar(self):
+        while True:
+            match = _SCALAR_END.search(self._buffer)
+            if match:
+                return match.start()
+            if not self._fill():
+                return len(self._buffer)
+
+    def value(self):
+        """Parse the next value in full."""
+        self._pending = False
+        return json.loads(self._scan())
+
+    def skip(self):
+        """Step over the next value without parsing it."""
+        self._pending = False
+        self._scan()
+
+    def members(self):
+        """Yield the keys of the next object, positioned at each value.
+
+        A value the caller leaves untouched is skipped before the next key.
+        """
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                self._error("Expecting property name enclosed in double quotes")
+            key = self.value()
+            self._expect(":")
+            self._pending = True
+            yield key
+            if self._pending:
+                self.skip()
+            separator = self.peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                self._error("Expecting ',' delimiter")
+
+    def items(self):
+        """Yield the elements of the next array, each parsed in full.
+
+        The array must be consumed to its end before the stream is used again.
+        """
+        self._pending = False
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                self._error("Expecting ',' delimiter")
+
+    def string_chunks(self):
+        """Yield the decoded contents of the next string value piecewise."""
+        self._pending = False
+        self._expect('"')
+        while True:
+            match = _STRING_STOP.search(self._buffer, self._pos)
+            if match is None:
+                if self._pos < len(self._buffer):
+                    yield self._buffer[self._pos :]
+                self._pos = len(self._buffer)
+                self._compact()
+                if not self._fill():
+                    self._error("Unterminated string")
+                continue
+            if match.start() > self._pos:
+                yield self._buffer[self._pos : match.start()]
+            self._pos = match.end()
+            if match.group() == '"':
+                return
+            self._compact()
+            while len(self._buffer) < 5 and self._fill():
+                pass
+            length = 5 if self._buffer.startswith("u") else 1
+            escape = self._buffer[:length]
+            try:
+                yield json.loads(f'"\\{escape}"')
+            except json.JSONDecodeError:
+                self._error("Invalid \\escape")
+            self._pos = length
+
+    def end(self):
+        """Require that nothing but whitespace follows."""
+        if self.peek():
+            self._error("Extra data")
+
+
+def _decoded(binary_file, chunk_size):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while chunk := binary_file.read(chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def _inflated(encoded_chunks, chunk_size):
+    """Decode base64-of-zlib text into at most ``chunk_size`` bytes per step."""
+    inflater = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    for piece in encoded_chunks:
+        pending += piece
+        usable = len(pending) - len(pending) % 4
+        compressed = base64.b64decode(pending[:usable])
+        pending = pending[usable:]
+        # Bounding each step keeps a highly compressible payload from
+        # expanding into one huge string.
+        while compressed:
+            yield decoder.decode(inflater.decompress(compressed, chunk_size))
+            compressed = inflater.unconsumed_tail
+    compressed = base64.b64decode(pending)
+    while compressed:
+        yield decoder.decode(inflater.decompress(compressed, chunk_size))
+        compressed = inflater.unconsumed_tail
+    yield decoder.decode(inflater.flush(), final=True)
+
+
+def _is_compressed(stream):
+    if stream.peek() != "{":
+        return False
+    members = stream.members()
+    return next(members, None) == ZIPJSON_KEY and stream.peek() == '"'
+
+
+def document_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield the JSON text of the export file at ``path`` in chunks.
+
+    A file holding only a ``json_compress`` envelope yields the inflated
+    document instead, mirroring ``json_decompress``.
+    """
+    with open(path, "rb") as binary_file:
+        stream = JsonStream(_decoded(binary_file, chunk_size))
+        if _is_compressed(stream):
+            yield from _inflated(stream.string_chunks(), chunk_size)
+            stream._expect("}")
+            stream.end()
+            return
+    with open(path, "rb") as binary_file:
+        yield from _decoded(binary_file, chunk_size)
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.utils import next_auto_stop_at, stop_expired_timers
+
+
+class Command(BaseCommand):
+    help = (
+        "Stop running timers at their auto-stop deadline. Sleeps until the "
+        "next deadline across all users (re-checking at least every "
+        "--interval seconds for newly started timers); run this alongside "
+        "TIMERS_BACKGROUND_AUTO_STOP=True so page and API reads never sweep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop every due timer once and exit instead of polling.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Timers to stop per transaction (default: 100).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Longest sleep between sweeps, in seconds (default: 5).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = options["interval"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if interval < 0:
+            raise CommandError("--interval cannot be negative")
+
+        while True:
+            self._sweep(batch_size)
+            if options["once"]:
+                return
+            time.sleep(self._sleep_for(interval))
+
+    def _sweep(self, batch_size):
+        """Stop due timers, one transaction per batch, until none are left."""
+        while True:
+            stopped = len(stop_expired_timers(limit=batch_size))
+            if stopped:
+                self.stdout.write(f"Stopped {stopped} timer(s)")
+            if stopped < batch_size:
+                return
+
+    def _sleep_for(self, interval):
+        due = next_auto_stop_at()
+        if due is None:
+            return interval
+        # A floor, so a due timer another transaction holds (and the sweep
+        # skipped) is retried shortly rather than in a busy loop.
+        return min(max((due - timezone.now()).total_seconds(), 0.1), interval)
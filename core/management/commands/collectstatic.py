@@ -0,0 +1,17 @@
+from django.contrib.staticfiles.management.commands.collectstatic import (
+    Command as CollectStaticCommand,
+)
+
+from core import static_manifest
+
+
+class Command(CollectStaticCommand):
+    """collectstatic, then the static version manifest for what it collected."""
+
+    def handle(self, **options):
+        result = super().handle(**options)
+        if not options["dry_run"]:
+            path, version = static_manifest.write()
+            if self.verbosity >= 1:
+                self.stdout.write(f"Wrote {len(version)} static versions to {path}")
+        return result
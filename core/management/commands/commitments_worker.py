@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.commitments import reconcile_due_commitments
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay stale commitment ledgers in the background. Commitments queue "
+        "themselves when a session edit dirties them or a period closes; run "
+        "this alongside COMMITMENTS_BACKGROUND_RECONCILE=True so page and API "
+        "reads never wait on a replay."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the whole queue once and exit instead of polling.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Commitments to reconcile per polling pass (default: 100).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when the queue is empty (default: 5).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = options["interval"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if interval < 0:
+            raise CommandError("--interval cannot be negative")
+
+        if options["once"]:
+            self._report(reconcile_due_commitments())
+            return
+
+        while True:
+            reconciled = reconcile_due_commitments(limit=batch_size)
+            self._report(reconciled)
+            if reconciled < batch_size:
+                time.sleep(interval)
+
+    def _report(self, reconciled):
+        if reconciled:
+            self.stdout.write(f"Reconciled {reconciled} commitment(s)")
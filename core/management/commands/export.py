@@ -7,7 +7,8 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db.models import Prefetch
 from AutumnWeb import settings
 from core.models import Projects, SubProjects, Context, Tag, Sessions
-from core.export2 import build_format2_export
+from core.archive3 import ARCHIVE_SUFFIX, iter_format3_archive
+from core.export2 import iter_format2_compressed, iter_format2_json
 from core.totals import annotate_project_totals, annotate_subproject_totals
 from core.utils import json_compress
 
@@ -24,9 +25,9 @@ class Command(BaseCommand):
         parser.add_argument(
             '--format',
             type=int,
-            choices=(1, 2),
+            choices=(1, 2, 3),
             default=2,
-            help='Export format version (default: 2)',
+            help='Export format version (default: 2; 3 writes a compact binary archive)',
         )
         parser.add_argument(
             '--context',
@@ -118,22 +119,33 @@ class Command(BaseCommand):
         if not os.path.exists(os.path.dirname(filepath)):
             os.makedirs(os.path.dirname(filepath))
 
-        if not filepath.endswith('.json'):
-            filepath += '.json'
+        suffix = ARCHIVE_SUFFIX if options['format'] == 3 else '.json'
+        if not filepath.endswith(suffix):
+            filepath = filepath.removesuffix('.json') + suffix
 
         autumn_compatible = options['autumn_compatible']
 
         project_data = {}
 
-        if options['format'] == 2:
-            project_data = build_format2_export(
-                Sessions.objects.filter(
-                    user=user,
-                    project_id__in=projects.values('id'),
-                    end_time__isnull=False,
-                )
+        if options['format'] in (2, 3):
+            sessions = Sessions.objects.filter(
+                user=user,
+                project_id__in=projects.values('id'),
+                end_time__isnull=False,
             )
-            projects = []
+            if options['format'] == 3:
+                with open(filepath, 'wb') as archive_writer:
+                    archive_writer.writelines(iter_format3_archive(sessions))
+            else:
+                chunks = (
+                    iter_format2_compressed(sessions)
+                    if options['compress']
+                    else iter_format2_json(sessions, indent=4)
+                )
+                with open(filepath, 'w') as json_writer:
+                    json_writer.writelines(chunks)
+            self.stdout.write(self.style.SUCCESS(f'Data successfully exported to {filepath}'))
+            return
 
         for project in projects:
             # For each project, collect its details
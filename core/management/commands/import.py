@@ -3,9 +3,9 @@ import json
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand, CommandError
 
-from core.importer import iter_import
+from core.archive3 import Format3ArchiveError
+from core.importer import iter_import_file
 from core.models import Context
-from core.utils import json_decompress
 
 
 # usage:  python manage.py import 'username' project_file.json --force/--merge --tolerance 0.5
@@ -93,20 +93,9 @@ class Command(BaseCommand):
                 )
 
         self.stdout.write(f'Reading data from {filepath}...')
-        try:
-            with open(filepath) as import_file:
-                try:
-                    data = json_decompress(import_file.read())
-                except RuntimeError:
-                    data = json.load(import_file)
-        except FileNotFoundError:
-            raise CommandError(f'File not found: {filepath}')
-        except json.JSONDecodeError:
-            raise CommandError(f'Invalid JSON file: {filepath}')
-
-        generator = iter_import(
+        generator = iter_import_file(
             user,
-            data,
+            filepath,
             force=options['force'],
             merge=options['merge'],
             tolerance=options['tolerance'],
@@ -121,6 +110,12 @@ class Command(BaseCommand):
             except StopIteration as stop:
                 summary = stop.value
                 break
+            except FileNotFoundError:
+                raise CommandError(f'File not found: {filepath}')
+            except json.JSONDecodeError:
+                raise CommandError(f'Invalid JSON file: {filepath}')
+            except Format3ArchiveError as exc:
+                raise CommandError(f'Invalid archive file: {filepath}: {exc}')
             self.stdout.write(message)
             if message.startswith('Error: Total time mismatch'):
                 mismatch_error = message.removeprefix('Error: ')
@@ -136,7 +131,7 @@ class Command(BaseCommand):
                 f"{summary['sessions_imported']} sessions imported."
             )
         )
-        if summary['skipped']:
+        if summary.get('skipped'):
             self.stdout.write(
                 self.style.WARNING(
                     'Skipped existing projects: ' + ', '.join(summary['skipped'])
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import static_manifest
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the static asset version manifest for the files in STATIC_ROOT. "
+        "collectstatic runs this automatically; run it by hand after copying "
+        "static files some other way."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--static-root",
+            default=None,
+            help="Directory to hash instead of STATIC_ROOT.",
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Manifest path (default: STATIC_VERSION_MANIFEST).",
+        )
+
+    def handle(self, *args, **options):
+        path, version = static_manifest.write(
+            base_static=options["static_root"] or settings.STATIC_ROOT,
+            path=options["output"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {len(version)} static versions to {path}")
+        )
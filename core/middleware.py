@@ -0,0 +1,12 @@
+from core.utils import RequestContexts
+
+
+class ActiveContextMiddleware:
+    """Share one resolution of the user's contexts across the request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.contexts_memo = RequestContexts(request)
+        return self.get_response(request)
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.16 on 2026-10-17 01:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0049_alter_commitmentperiod_revision'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timezone', models.CharField(max_length=64)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='session_rollup_state', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SessionDayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_day', models.DateField()),
+                ('end_day', models.DateField()),
+                ('numerator', models.BigIntegerField(default=0)),
+                ('elapsed_microseconds', models.BigIntegerField(default=0)),
+                ('session_count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_rollups', to='core.projects')),
+                ('subproject', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='day_rollups', to='core.subprojects')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='session_day_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'end_day'], name='rollup_user_end_day_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('subproject__isnull', False)), fields=('project', 'start_day', 'end_day', 'subproject'), name='unique_rollup_link_bucket'), models.UniqueConstraint(condition=models.Q(('subproject__isnull', True)), fields=('project', 'start_day', 'end_day'), name='unique_rollup_residual_bucket')],
+            },
+        ),
+    ]
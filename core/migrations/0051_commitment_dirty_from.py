@@ -0,0 +1,18 @@
+# Generated by Django 5.2.16 on 2026-10-17 01:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0050_session_day_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commitment',
+            name='dirty_from',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
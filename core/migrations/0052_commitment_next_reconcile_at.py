@@ -0,0 +1,18 @@
+# Generated by Django 5.2.16 on 2026-10-17 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0051_commitment_dirty_from'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commitment',
+            name='next_reconcile_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -332,6 +332,58 @@ class Sessions(models.Model):
         return self._compute_crosses_dst_transition(self.start_time, self.end_time)
 
 
+class SessionRollupState(models.Model):
+    """Marks a user's day rollup as built, and the timezone of its end days.
+
+    Rollup rows are only maintained (and only read) while this row exists;
+    deleting it sends reports back to raw session rows until the next build.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='session_rollup_state')
+    timezone = models.CharField(max_length=64)
+    built_at = models.DateTimeField(auto_now=True)
+
+
+class SessionDayRollup(models.Model):
+    """Completed-session credit per (UTC start day, local end day, project, subproject).
+
+    ``numerator`` is elapsed microseconds times basis points, exactly as
+    core.attribution computes it. Rows with no subproject carry the residual
+    credit plus every session's full elapsed time and count, so project-level
+    totals stay right even for legacy links that over-allocate.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='session_day_rollups')
+    start_day = models.DateField()
+    end_day = models.DateField()
+    project = models.ForeignKey(Projects, on_delete=models.CASCADE, related_name='day_rollups')
+    subproject = models.ForeignKey(
+        SubProjects,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='day_rollups',
+    )
+    numerator = models.BigIntegerField(default=0)
+    elapsed_microseconds = models.BigIntegerField(default=0)
+    session_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'end_day'], name='rollup_user_end_day_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'start_day', 'end_day', 'subproject'],
+                condition=models.Q(subproject__isnull=False),
+                name='unique_rollup_link_bucket',
+            ),
+            models.UniqueConstraint(
+                fields=['project', 'start_day', 'end_day'],
+                condition=models.Q(subproject__isnull=True),
+                name='unique_rollup_residual_bucket',
+            ),
+        ]
+
+
 period_choices = (
     ('daily', 'Daily'),
     ('weekly', 'Weekly'),
@@ -424,7 +476,13 @@ class Commitment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     last_reconciled = models.DateTimeField(null=True, blank=True)
     needs_recompute = models.BooleanField(default=False, db_default=False)
+    # Earliest instant whose accrual a session edit may have changed since the
+    # last replay; NULL while dirty means the whole ledger must be re-accrued.
+    dirty_from = models.DateTimeField(null=True, blank=True)
     ledger_start_at = models.DateTimeField(null=True, blank=True)
+    # When the current period closes (or a pending revision activates). Past
+    # this instant the ledger is stale and commitments_worker picks it up.
+    next_reconcile_at = models.DateTimeField(null=True, blank=True, db_index=True)
     generation = models.IntegerField(default=1, db_default=1)
     version = models.IntegerField(default=1, db_default=1)
 
@@ -572,3 +630,47 @@ class CommitmentAdjustment(models.Model):
                 name='unique_commitment_adjustment_seq',
             ),
         ]
+
+
+class DataGeneration(models.Model):
+    """Per-user counter bumped by every write that changes API read payloads.
+
+    Conditional GETs on the v2 read endpoints derive their ETag from it, so a
+    poll whose generation is unchanged is answered with 304 before any
+    report or list query runs.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='data_generation',
+    )
+    value = models.BigIntegerField(default=0)
+
+
+class ChangeLogEntry(models.Model):
+    """One write to a session, project or subproject, in per-user commit order.
+
+    The auto-increment id is the change sequence clients pass back as
+    ``since`` to /api/v2/changes/. Entries only name the row; whether it is
+    an upsert or a tombstone is read from the live table when the feed is
+    served, so a row edited many times between polls is sent once.
+    """
+    KIND_SESSION = 'session'
+    KIND_PROJECT = 'project'
+    KIND_SUBPROJECT = 'subproject'
+    KIND_CHOICES = (
+        (KIND_SESSION, 'Session'),
+        (KIND_PROJECT, 'Project'),
+        (KIND_SUBPROJECT, 'Subproject'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='change_log')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='changelog_user_seq_idx'),
+        ]
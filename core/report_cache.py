@@ -0,0 +1,80 @@
+"""Server-side cache of v2 report payloads.
+
+Entries are keyed by user, the normalized ``SessionFilterSpec``, the
+remaining query parameters (chart type, legacy chart filters), the active
+context and timezone, and the user's data generation. A write bumps the
+generation, so stale entries are never read again and simply age out of the
+LRU cache named by ``settings.REPORT_CACHE_ALIAS``; that cache's ``TIMEOUT``
+bounds how long clock-relative figures (the radar chart's "days since
+update") can lag.
+
+Hit and miss counters live in the same cache, so they are per process with
+the default local-memory backend and global with a shared one.
+"""
+
+import hashlib
+from dataclasses import fields
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+HITS_KEY = "report-cache:hits"
+MISSES_KEY = "report-cache:misses"
+
+
+def _cache():
+    return caches[settings.REPORT_CACHE_ALIAS]
+
+
+def _normalized(value):
+    if isinstance(value, frozenset):
+        return sorted(value)
+    return None if value is None else str(value)
+
+
+def make_key(*, user_id, spec, query_params, data_generation, zone, active_context):
+    """A fixed-length cache key for one report request."""
+    spec_fields = [field.name for field in fields(spec)]
+    parts = (
+        user_id,
+        tuple((field, _normalized(getattr(spec, field))) for field in spec_fields),
+        tuple(
+            (key, tuple(values))
+            for key, values in sorted(query_params.lists())
+            if key not in spec_fields
+        ),
+        data_generation,
+        zone,
+        active_context,
+    )
+    return "report:" + hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def _count(counter_key):
+    cache = _cache()
+    if not cache.add(counter_key, 1, timeout=None):
+        try:
+            cache.incr(counter_key)
+        except ValueError:
+            # Evicted between add and incr; losing one count is fine.
+            pass
+
+
+def lookup(key):
+    """The cached payload for ``key``, or None; counts the hit or miss."""
+    payload = _cache().get(key)
+    _count(MISSES_KEY if payload is None else HITS_KEY)
+    return payload
+
+
+def store(key, payload):
+    _cache().set(key, payload)
+
+
+def stats():
+    counters = _cache().get_many([HITS_KEY, MISSES_KEY])
+    return {
+        "hits": counters.get(HITS_KEY, 0),
+        "misses": counters.get(MISSES_KEY, 0),
+    }
@@ -0,0 +1,387 @@
+"""Materialized per-day session credit for report charts and tallies.
+
+Reports used to re-aggregate every raw ``Sessions`` row on each chart switch.
+``SessionDayRollup`` keeps one row per (UTC start day, local end day, project,
+subproject) holding the same ``elapsed microseconds * basis points`` numerators
+core.attribution computes, so the daily, project, context, status, tag and
+subproject views can be summed from a few rows per day instead.
+
+* The UTC start day is the bucket the daily charts group by (``TruncDate`` in
+  UTC); the end day, in the timezone recorded on ``SessionRollupState``, is
+  what the inclusive ``start_date``/``end_date`` report filters compare.
+* Rows without a subproject carry the residual credit and also every
+  session's full elapsed time and count, so project-level totals never depend
+  on the links adding up (legacy rows may over-allocate past 10,000 bp).
+* ``SessionMutationService`` keeps rows current inside its own transaction.
+  Writes that bypass it (destructive merges, admin edits) call ``invalidate``
+  and the next report rebuilds from raw rows.
+* Only project-level filters can be expressed over the rollup. Note, UUID and
+  session-level subproject filters make ``scoped_rollups`` return ``None`` and
+  callers fall back to raw rows.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import timedelta, timezone as datetime_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from core import generation
+from core.attribution import BASIS_POINTS, NO_SUBPROJECT, duration_from_numerator
+from core.models import Projects, SessionDayRollup, SessionRollupState, Sessions
+
+
+def _elapsed_microseconds(session):
+    elapsed = session.end_time - session.start_time
+    return (elapsed.days * 86400 + elapsed.seconds) * 1000000 + elapsed.microseconds
+
+
+def _contributions(session, zone):
+    """Return ``{(start_day, end_day, project_id, subproject_id): (numerator, elapsed)}``."""
+    if session.end_time is None:
+        return {}
+    microseconds = _elapsed_microseconds(session)
+    bucket = (
+        session.start_time.astimezone(datetime_timezone.utc).date(),
+        session.end_time.astimezone(zone).date(),
+        session.project_id,
+    )
+    contributions = {}
+    allocation_total = 0
+    for link in session.subproject_links.all():
+        contributions[(*bucket, link.subproject_id)] = (
+            microseconds * link.allocation_bp,
+            0,
+        )
+        allocation_total += link.allocation_bp
+    residual_bp = max(BASIS_POINTS - allocation_total, 0)
+    contributions[(*bucket, None)] = (microseconds * residual_bp, microseconds)
+    return contributions
+
+
+def _apply(user_id, contributions, sign, counts=None):
+    """Add ``sign`` times ``contributions`` to their buckets.
+
+    ``counts`` gives how many sessions a merged contribution covers (see
+    ``add_sessions``); otherwise each key is one session.
+    """
+    for key, (numerator, elapsed) in contributions.items():
+        count = counts[key] if counts is not None else 1
+        start_day, end_day, project_id, subproject_id = key
+        bucket = SessionDayRollup.objects.filter(
+            user_id=user_id,
+            start_day=start_day,
+            end_day=end_day,
+            project_id=project_id,
+            subproject_id=subproject_id,
+        )
+        updated = bucket.update(
+            numerator=F("numerator") + sign * numerator,
+            elapsed_microseconds=F("elapsed_microseconds") + sign * elapsed,
+            session_count=F("session_count") + sign * count,
+        )
+        if not updated and sign > 0:
+            SessionDayRollup.objects.create(
+                user_id=user_id,
+                start_day=start_day,
+                end_day=end_day,
+                project_id=project_id,
+                subproject_id=subproject_id,
+                numerator=numerator,
+                elapsed_microseconds=elapsed,
+                session_count=count,
+            )
+        elif sign < 0:
+            bucket.filter(session_count__lte=0).delete()
+
+
+def _locked_state(user_id):
+    # Serializes concurrent writers for the same user, and writers against a
+    # rebuild, on the generation row: a writer that waited on a first build
+    # then sees its state row and credits a session the build could not see.
+    generation.lock(user_id)
+    return SessionRollupState.objects.filter(user_id=user_id).first()
+
+
+def add_session(session):
+    """Credit ``session`` (with its current links) to a built rollup."""
+    state = _locked_state(session.user_id)
+    if state is not None:
+        _apply(session.user_id, _contributions(session, ZoneInfo(state.timezone)), 1)
+
+
+def add_sessions(user_id, sessions):
+    """``add_session`` for many of one user's sessions: one upsert per bucket."""
+    state = _locked_state(user_id)
+    if state is None:
+        return
+    zone = ZoneInfo(state.timezone)
+    merged = {}
+    counts = Counter()
+    for session in sessions:
+        for key, (numerator, elapsed) in _contributions(session, zone).items():
+            total_numerator, total_elapsed = merged.get(key, (0, 0))
+            merged[key] = (total_numerator + numerator, total_elapsed + elapsed)
+            counts[key] += 1
+    _apply(user_id, merged, 1, counts)
+
+
+def remove_session(session):
+    """Withdraw ``session``'s stored credit; call before changing or deleting it."""
+    state = _locked_state(session.user_id)
+    if state is not None:
+        _apply(session.user_id, _contributions(session, ZoneInfo(state.timezone)), -1)
+
+
+def invalidate(user):
+    """Drop a user's rollup so the next report rebuilds it from raw rows."""
+    user_id = getattr(user, "pk", user)
+    SessionRollupState.objects.filter(user_id=user_id).delete()
+    SessionDayRollup.objects.filter(user_id=user_id).delete()
+
+
+@transaction.atomic
+def rebuild(user, timezone_name):
+    """Recompute every rollup row for ``user`` from raw session rows.
+
+    Holds the lock session writers take in ``_locked_state`` for the whole
+    build, so no write lands between the snapshot and the state row.
+    """
+    generation.lock(user.pk)
+    zone = ZoneInfo(timezone_name)
+    SessionDayRollup.objects.filter(user=user).delete()
+    SessionRollupState.objects.update_or_create(
+        user=user,
+        defaults={"timezone": timezone_name},
+    )
+    rows = {}
+    sessions = Sessions.objects.filter(
+        user=user, end_time__isnull=False
+    ).prefetch_related("subproject_links")
+    for session in sessions.iterator(chunk_size=500):
+        for key, (numerator, elapsed) in _contributions(session, zone).items():
+            row = rows.get(key)
+            if row is None:
+                start_day, end_day, project_id, subproject_id = key
+                row = rows[key] = SessionDayRollup(
+                    user=user,
+                    start_day=start_day,
+                    end_day=end_day,
+                    project_id=project_id,
+                    subproject_id=subproject_id,
+                )
+            row.numerator += numerator
+            row.elapsed_microseconds += elapsed
+            row.session_count += 1
+    SessionDayRollup.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+def rollup_timezone(user):
+    """The timezone a user's rollup is keyed to: their profile's, falling
+    back to ``settings.TIME_ZONE`` like ``UserTimezoneMiddleware``."""
+    try:
+        return str(ZoneInfo(user.profile.timezone))
+    except (AttributeError, KeyError, ObjectDoesNotExist, ZoneInfoNotFoundError):
+        return settings.TIME_ZONE
+
+
+def ensure_built(user):
+    """Build the rollup if missing or keyed to another timezone; False on a race.
+
+    The rollup is keyed to the profile timezone, so requests activated in
+    another timezone (token-authenticated API calls run in
+    ``settings.TIME_ZONE``) read raw rows instead of rebuilding it.
+    """
+    timezone_name = rollup_timezone(user)
+    if timezone.get_current_timezone_name() != timezone_name:
+        return False
+    state = SessionRollupState.objects.filter(user=user).first()
+    if state is not None and state.timezone == timezone_name:
+        return True
+    try:
+        rebuild(user, timezone_name)
+    except IntegrityError:
+        # A concurrent request is building the same rollup; use raw rows.
+        return False
+    return True
+
+
+def rollup_compatible(spec):
+    """Whether ``SessionFilterSpec`` only narrows by project and end day."""
+    return (
+        spec.subproject_ids is None
+        and spec.exclude_subproject_ids is None
+        and spec.note_snippet is None
+        and spec.uuid is None
+        and spec.active is not True
+    )
+
+
+def scoped_rollups(user, spec, *, projects=None):
+    """Return rollup rows matching ``spec``, or ``None`` to use raw sessions.
+
+    ``projects`` optionally pre-narrows the project set (the chart page's
+    legacy context/tag/name filters); the spec's project-level filters are
+    applied on top of it.
+    """
+    if not rollup_compatible(spec) or not ensure_built(user):
+        return None
+    if projects is None:
+        projects = Projects.objects.filter(user=user)
+    if spec.project_ids is not None:
+        projects = projects.filter(id__in=spec.project_ids)
+    if spec.context_ids is not None:
+        projects = projects.filter(context_id__in=spec.context_ids)
+    if spec.tag_ids is not None:
+        projects = projects.filter(tags__id__in=spec.tag_ids)
+    if spec.exclude_project_ids is not None:
+        projects = projects.exclude(id__in=spec.exclude_project_ids)
+    if spec.exclude_tag_ids is not None:
+        projects = projects.exclude(tags__id__in=spec.exclude_tag_ids)
+
+    rows = SessionDayRollup.objects.filter(
+        user=user,
+        project_id__in=projects.order_by().values("pk"),
+    )
+    if spec.start_date is not None:
+        rows = rows.filter(end_day__gte=spec.start_date)
+    if spec.end_date is not None:
+        rows = rows.filter(end_day__lte=spec.end_date)
+    return rows.order_by()
+
+
+def _with_total(rows):
+    rows = list(rows)
+    for row in rows:
+        if "total_elapsed" in row:
+            row["total"] = timedelta(microseconds=row.pop("total_elapsed") or 0)
+        else:
+            row["total"] = duration_from_numerator(row.pop("total_numerator") or 0)
+    return rows
+
+
+def duration_rows(rollups, *fields, ordering=None, **aggregates):
+    """Full-duration ``total``/``session_count`` grouped by ``fields``.
+
+    Mirrors ``sessions.values(*fields).annotate(Sum(duration), Count("pk"))``;
+    extra ``aggregates`` are annotated alongside.
+    """
+    rows = _with_total(
+        rollups.values(*fields)
+        .annotate(
+            total_elapsed=Sum("elapsed_microseconds"),
+            session_count=Sum("session_count", filter=Q(subproject__isnull=True)),
+            **aggregates,
+        )
+        .order_by(*(ordering or fields))
+    )
+    for row in rows:
+        row["session_count"] = row["session_count"] or 0
+    return rows
+
+
+def rollup_totals(rollups):
+    row = rollups.aggregate(
+        total_elapsed=Sum("elapsed_microseconds"),
+        session_count=Sum("session_count", filter=Q(subproject__isnull=True)),
+    )
+    return {
+        "total": timedelta(microseconds=row["total_elapsed"] or 0),
+        "session_count": row["session_count"] or 0,
+    }
+
+
+def rollup_attribution(rollups):
+    """The ``core.attribution.report_attribution`` structure, from rollup rows."""
+    projects = {}
+    rows = rollups.values(
+        "project_id", "project__name", "subproject_id", "subproject__name"
+    ).annotate(
+        total_numerator=Sum("numerator"),
+        total_elapsed=Sum("elapsed_microseconds"),
+    )
+    for row in rows:
+        project = projects.setdefault(
+            row["project_id"],
+            {
+                "id": row["project_id"],
+                "name": row["project__name"],
+                "total_numerator": 0,
+                "children": {},
+                "residual_numerator": 0,
+            },
+        )
+        if row["subproject_id"] is None:
+            project["total_numerator"] += row["total_elapsed"] * BASIS_POINTS
+            project["residual_numerator"] += row["total_numerator"]
+        else:
+            project["children"][row["subproject_id"]] = {
+                "id": row["subproject_id"],
+                "name": row["subproject__name"],
+                "total_numerator": row["total_numerator"],
+            }
+    return projects
+
+
+def child_credit(rollups):
+    """``hierarchy_child_credit`` rows: weighted link credit by subproject ID."""
+    return list(
+        rollups.filter(subproject__isnull=False)
+        .values("subproject_id")
+        .annotate(total_numerator=Sum("numerator"))
+    )
+
+
+def daily_totals(rollups):
+    return _with_total(
+        rollups.annotate(date=F("start_day"))
+        .values("date")
+        .annotate(total_elapsed=Sum("elapsed_microseconds"))
+        .order_by("date")
+    )
+
+
+def daily_series(rollups):
+    """Per UTC day and project name, like ``chart_reports._daily_series``."""
+    return _with_total(
+        rollups.annotate(date=F("start_day"), series=F("project__name"))
+        .values("date", "series")
+        .annotate(total_elapsed=Sum("elapsed_microseconds"))
+        .order_by("date", "series")
+    )
+
+
+def subproject_daily_series(rollups):
+    """Per UTC day and subproject name, like ``attribution.subproject_daily_series``."""
+    rows_by_key = {}
+    rows = (
+        rollups.annotate(date=F("start_day"))
+        .values("date", "subproject_id", "subproject__name")
+        .annotate(total_numerator=Sum("numerator"))
+    )
+    for row in rows:
+        if row["subproject_id"] is None:
+            if not row["total_numerator"]:
+                continue
+            series = NO_SUBPROJECT
+        else:
+            series = row["subproject__name"]
+        key = (row["date"], series)
+        if key in rows_by_key:
+            rows_by_key[key]["total_numerator"] += row["total_numerator"]
+        else:
+            rows_by_key[key] = {
+                "date": row["date"],
+                "series": series,
+                "total_numerator": row["total_numerator"],
+            }
+    rows = _with_total(rows_by_key.values())
+    rows.sort(key=lambda row: (row["date"], row["series"]))
+    return rows
+
@@ -8,6 +8,7 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils import timezone
 
+from core import generation
 from core.commitments import (
     _ensure_ledger_initialized,
     snapshot_commitment_definition,
@@ -176,6 +177,7 @@ class CommitmentEditService:
             status=CommitmentRevision.STATUS_ACTIVE,
             **snapshot,
         )
+        generation.bump(commitment.user_id)
         return commitment
 
     @staticmethod
@@ -286,7 +288,11 @@ class CommitmentEditService:
 
         commitment.version += 1
         commitment.needs_recompute = True
-        commitment.save(update_fields=["active", "version", "needs_recompute"])
+        commitment.dirty_from = None
+        commitment.save(
+            update_fields=["active", "version", "needs_recompute", "dirty_from"]
+        )
+        generation.bump(commitment.user_id)
         return commitment
 
     @staticmethod
@@ -370,6 +376,7 @@ class CommitmentEditService:
         commitment.ledger_start_at = now
         commitment.balance = latest_balance if keep_balance else 0
         commitment.needs_recompute = True
+        commitment.dirty_from = None
         commitment.version += 1
         commitment.full_clean()
         commitment.save()
@@ -413,4 +420,5 @@ class CommitmentEditService:
                 effective_at=now,
                 reason="Balance carried into commitment restart",
             )
+        generation.bump(commitment.user_id)
         return commitment
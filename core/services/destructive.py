@@ -4,6 +4,8 @@ from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 
+from core import changelog, rollups, session_frame
+from core.commitments import commitments_affected_by, mark_commitments_dirty
 from core.models import (
     Commitment,
     Context,
@@ -31,9 +33,16 @@ def _ensure_unprotected(*, kind, target):
         )
 
 
-def _mark_commitments_dirty(user):
-    # This slice intentionally chooses the conservative user-wide invalidation.
-    Commitment.objects.filter(user=user).update(needs_recompute=True)
+def _affected_commitments(user, project_ids):
+    """Commitments that can count any session of ``project_ids``, as they stand now."""
+    return commitments_affected_by(
+        user.pk, [(project_id, None) for project_id in project_ids]
+    )
+
+
+def _mark_commitments_dirty(user, commitment_ids):
+    # Sessions move between scopes here, so affected ledgers replay in full.
+    mark_commitments_dirty(user.pk, commitment_ids=commitment_ids)
 
 
 class DestructiveMutationService:
@@ -49,6 +58,7 @@ class DestructiveMutationService:
         project2 = get_object_or_404(Projects, name=project2_name, user=user)
         _ensure_unprotected(kind="project", target=project1)
         _ensure_unprotected(kind="project", target=project2)
+        affected = _affected_commitments(user, [project1.pk, project2.pk])
 
         if Projects.objects.filter(user=user, name=new_project_name).exists():
             raise DestructiveOperationError(
@@ -77,11 +87,14 @@ class DestructiveMutationService:
             description=merged_description,
         )
 
+        moved_session_ids = []
         for session in project1.sessions.all():
+            moved_session_ids.append(session.pk)
             session.project = merged_project
             session.version = (session.version or 1) + 1
             session.save(update_fields=["project", "version"])
         for session in project2.sessions.all():
+            moved_session_ids.append(session.pk)
             session.project = merged_project
             session.version = (session.version or 1) + 1
             session.save(update_fields=["project", "version"])
@@ -118,9 +131,22 @@ class DestructiveMutationService:
             subproject.save(update_fields=["name", "parent_project"])
             existing_subproject_names.add(new_name)
 
+        project1_id, project2_id = project1.pk, project2.pk
         project1.delete()
         project2.delete()
-        _mark_commitments_dirty(user)
+        rollups.invalidate(user)
+        session_frame.invalidate(user.pk)
+        affected |= _affected_commitments(user, [merged_project.pk])
+        _mark_commitments_dirty(user, affected)
+        changelog.record(
+            user.pk,
+            sessions=moved_session_ids,
+            projects=[project1_id, project2_id, merged_project.pk],
+            subprojects=[
+                subproject.pk
+                for subproject in project1_subprojects + project2_subprojects
+            ],
+        )
         return merged_project, project1_subprojects + project2_subprojects
 
     @staticmethod
@@ -144,6 +170,7 @@ class DestructiveMutationService:
         )
         _ensure_unprotected(kind="subproject", target=subproject1)
         _ensure_unprotected(kind="subproject", target=subproject2)
+        affected = _affected_commitments(user, [parent_project.pk])
 
         if SubProjects.objects.filter(
             user=user, name=new_name, parent_project=parent_project
@@ -243,7 +270,15 @@ class DestructiveMutationService:
 
         subproject1.delete()
         subproject2.delete()
-        _mark_commitments_dirty(user)
+        rollups.invalidate(user)
+        session_frame.invalidate(user.pk)
+        affected |= _affected_commitments(user, [parent_project.pk])
+        _mark_commitments_dirty(user, affected)
+        changelog.record(
+            user.pk,
+            sessions=[session.pk for session in affected_sessions],
+            subprojects=[*source_ids, merged_subproject.pk],
+        )
         return merged_subproject
 
     @staticmethod
@@ -258,7 +293,8 @@ class DestructiveMutationService:
             raise DestructiveOperationError("Project name already exists")
         project.name = new_name
         project.save(update_fields=["name"])
-        _mark_commitments_dirty(user)
+        _mark_commitments_dirty(user, _affected_commitments(user, [project.pk]))
+        changelog.record(user.pk, projects=[project.pk])
         return project
 
     @staticmethod
@@ -281,7 +317,8 @@ class DestructiveMutationService:
             raise DestructiveOperationError("Subproject name already exists")
         subproject.name = new_name
         subproject.save(update_fields=["name"])
-        _mark_commitments_dirty(user)
+        _mark_commitments_dirty(user, _affected_commitments(user, [project.pk]))
+        changelog.record(user.pk, subprojects=[subproject.pk])
         return subproject
 
     @staticmethod
@@ -289,8 +326,20 @@ class DestructiveMutationService:
     def delete_project(*, user, project_name):
         project = get_object_or_404(Projects, name=project_name, user=user)
         _ensure_unprotected(kind="project", target=project)
+        affected = _affected_commitments(user, [project.pk])
+        # The cascade takes the project's sessions and subprojects with it.
+        session_ids = list(project.sessions.values_list("pk", flat=True))
+        subproject_ids = list(project.subprojects.values_list("pk", flat=True))
+        project_id = project.pk
         project.delete()
-        _mark_commitments_dirty(user)
+        session_frame.invalidate(user.pk)
+        _mark_commitments_dirty(user, affected)
+        changelog.record(
+            user.pk,
+            sessions=session_ids,
+            projects=[project_id],
+            subprojects=subproject_ids,
+        )
 
     @staticmethod
     @transaction.atomic
@@ -302,21 +351,41 @@ class DestructiveMutationService:
             user=user,
         )
         _ensure_unprotected(kind="subproject", target=subproject)
+        affected = _affected_commitments(user, [subproject.parent_project_id])
+        session_ids = list(
+            subproject.session_links.values_list("session_id", flat=True)
+        )
+        subproject_id = subproject.pk
         subproject.delete()
-        _mark_commitments_dirty(user)
+        # Unlinked credit moves to the residual bucket of the same days.
+        rollups.invalidate(user)
+        session_frame.invalidate(user.pk)
+        _mark_commitments_dirty(user, affected)
+        changelog.record(
+            user.pk, sessions=session_ids, subprojects=[subproject_id]
+        )
 
     @staticmethod
     @transaction.atomic
     def delete_context(*, user, context_name):
         context = get_object_or_404(Context, user=user, name=context_name)
         _ensure_unprotected(kind="context", target=context)
+        # Its projects fall out of the context: dirty what matched before or after.
+        project_ids = list(context.projects.values_list("pk", flat=True))
+        affected = _affected_commitments(user, project_ids)
         context.delete()
-        _mark_commitments_dirty(user)
+        affected |= _affected_commitments(user, project_ids)
+        _mark_commitments_dirty(user, affected)
+        changelog.record(user.pk, projects=project_ids)
 
     @staticmethod
     @transaction.atomic
     def delete_tag(*, user, tag_name):
         tag = get_object_or_404(Tag, user=user, name=tag_name)
         _ensure_unprotected(kind="tag", target=tag)
+        project_ids = list(tag.projects.values_list("pk", flat=True))
+        affected = _affected_commitments(user, project_ids)
         tag.delete()
-        _mark_commitments_dirty(user)
+        affected |= _affected_commitments(user, project_ids)
+        _mark_commitments_dirty(user, affected)
+        changelog.record(user.pk, projects=project_ids)
@@ -1,11 +1,16 @@
 """Atomic mutations for session rows."""
 
+from collections import defaultdict
 from datetime import datetime
 
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
 
-from core.models import Commitment, Sessions, SessionSubproject
+from core import changelog, rollups, session_frame
+from core.commitments import commitments_affected_by, mark_commitments_dirty
+from core.models import Sessions, SessionSubproject
 UNSET = object()
 
 
@@ -32,8 +37,30 @@ def even_split_bps(subproject_ids):
     return split
 
 
-def _mark_commitments_dirty(user_id):
-    Commitment.objects.filter(user_id=user_id).update(needs_recompute=True)
+def _mark_commitments_dirty(user_id, *instants, scopes=None):
+    """Dirty the user's commitments from the earliest touched instant.
+
+    Callers pass the start/end instants of the session before and after the
+    write; with none known (e.g. the admin) the whole ledger is replayed.
+    ``scopes`` are the session's ``(project_id, subproject_ids)`` before and
+    after the write; only commitments that can count them are flagged.
+    Without scopes every commitment of the user is.
+    """
+    instants = [instant for instant in instants if instant is not None]
+    mark_commitments_dirty(
+        user_id,
+        min(instants) if instants else None,
+        commitment_ids=(
+            None if scopes is None else commitments_affected_by(user_id, scopes)
+        ),
+    )
+
+
+def _session_scope(session):
+    return (
+        session.project_id,
+        set(session.subproject_links.values_list("subproject_id", flat=True)),
+    )
 
 
 def _floor_instant(value):
@@ -94,6 +121,32 @@ def _validate_allocations(session, allocations):
         raise ValidationError("Session allocations must not exceed 10000 basis points.")
 
 
+def _insert_each(user, pending, results):
+    """Insert ``pending`` rows one savepoint at a time after a batch conflict.
+
+    A row whose UUID another request inserted meanwhile is replaced in
+    ``results`` by a ``ValidationError``; any other integrity error propagates.
+    Returns the rows that were inserted.
+    """
+    inserted = []
+    for session, allocations in pending:
+        try:
+            with transaction.atomic():
+                session.save(force_insert=True)
+        except IntegrityError:
+            if not Sessions.objects.filter(user=user, uuid=session.uuid).exists():
+                raise
+            position = next(
+                index for index, result in enumerate(results) if result is session
+            )
+            results[position] = ValidationError(
+                {"uuid": ["A session with this UUID was created concurrently."]}
+            )
+            continue
+        inserted.append((session, allocations))
+    return inserted
+
+
 class SessionMutationService:
     """The single atomic write path for session rows."""
 
@@ -120,9 +173,98 @@ class SessionMutationService:
             split = even_split_bps(subproject.pk for subproject in subprojects)
             allocations = [(subproject, split[subproject.pk]) for subproject in subprojects]
         _set_allocations(session, allocations)
-        _mark_commitments_dirty(session.user_id)
+        rollups.add_session(session)
+        session_frame.invalidate(session.user_id)
+        scopes = [
+            (session.project_id, {subproject.pk for subproject, _ in allocations})
+        ]
+        _mark_commitments_dirty(
+            session.user_id, session.start_time, session.end_time, scopes=scopes
+        )
+        changelog.record_session_scopes(session.user_id, [session.pk], scopes)
         return session
 
+    @staticmethod
+    @transaction.atomic
+    def create_sessions(*, user, rows):
+        """Create many of ``user``'s sessions in one batch.
+
+        ``rows`` are ``create_session`` keyword dicts whose ``project`` and
+        ``allocations`` the caller has already resolved for ``user``. Returns
+        a list aligned with ``rows`` holding each created session, or the
+        ``ValidationError`` that rejected that row; rejected rows do not stop
+        the others.
+
+        Sessions and their links are two ``bulk_create`` calls, and rollups,
+        commitments and the changelog are updated once for the whole batch.
+        Uniqueness (the per-user UUID) is left to the caller and the database
+        constraint rather than checked row by row. If a concurrent request
+        inserts one of the UUIDs first, the batch falls back to row-by-row
+        inserts and only the conflicting rows are rejected.
+        """
+        results = []
+        pending = []
+        for fields in rows:
+            fields = dict(fields)
+            allocations = list(fields.pop("allocations"))
+            session = Sessions(user=user, **fields)
+            session.start_time = _floor_instant(session.start_time)
+            session.end_time = _floor_instant(session.end_time)
+            session.auto_stop_at = _floor_instant(session.auto_stop_at)
+            try:
+                _validate_buckets(session, [subproject for subproject, _ in allocations])
+                _validate_allocations(session, allocations)
+                # user and project are resolved objects; their clean() would
+                # cost an existence query per row.
+                session.full_clean(
+                    exclude=["user", "project"],
+                    validate_unique=False,
+                    validate_constraints=False,
+                )
+            except ValidationError as exc:
+                results.append(exc)
+                continue
+            results.append(session)
+            pending.append((session, allocations))
+        if not pending:
+            return results
+
+        try:
+            with transaction.atomic():
+                sessions = Sessions.objects.bulk_create(
+                    [session for session, _ in pending]
+                )
+        except IntegrityError:
+            pending = _insert_each(user, pending, results)
+            if not pending:
+                return results
+            sessions = [session for session, _ in pending]
+        SessionSubproject.objects.bulk_create(
+            [
+                SessionSubproject(
+                    session=session,
+                    subproject=subproject,
+                    allocation_bp=allocation_bp,
+                )
+                for session, allocations in pending
+                for subproject, allocation_bp in allocations
+            ]
+        )
+        prefetch_related_objects(sessions, "subproject_links")
+        rollups.add_sessions(user.pk, sessions)
+        session_frame.invalidate(user.pk)
+        scopes = [
+            (session.project_id, {subproject.pk for subproject, _ in allocations})
+            for session, allocations in pending
+        ]
+        _mark_commitments_dirty(
+            user.pk, *(session.start_time for session in sessions), scopes=scopes
+        )
+        changelog.record_session_scopes(
+            user.pk, [session.pk for session in sessions], scopes
+        )
+        return results
+
     @staticmethod
     @transaction.atomic
     def mutate_session(
@@ -146,6 +288,9 @@ class SessionMutationService:
         session = queryset.get(pk=session_id)
         if expected_version is not None and (session.version or 1) != expected_version:
             raise StaleVersionError(session)
+        rollups.remove_session(session)
+        previous_instants = (session.start_time, session.end_time)
+        previous_scope = _session_scope(session)
         # is_active is accepted for caller compatibility but ignored: the
         # column was dropped in S12 and the state derives from end_time.
         updates = {
@@ -182,10 +327,80 @@ class SessionMutationService:
                 session,
                 [(subproject, split[subproject.pk]) for subproject in final_subprojects],
             )
+        rollups.add_session(session)
 
-        _mark_commitments_dirty(session.user_id)
+        session_frame.invalidate(session.user_id)
+        scopes = [
+            previous_scope,
+            (session.project_id, {subproject.pk for subproject in final_subprojects}),
+        ]
+        _mark_commitments_dirty(
+            session.user_id,
+            *previous_instants,
+            session.start_time,
+            session.end_time,
+            scopes=scopes,
+        )
+        changelog.record_session_scopes(session.user_id, [session.pk], scopes)
         return session
 
+    @staticmethod
+    @transaction.atomic
+    def stop_due_timers(*, user=None, now=None, limit=None):
+        """Stop running timers whose ``auto_stop_at`` has passed; return them.
+
+        Each stop is ``mutate_session(end_time=auto_stop_at, auto_stop_at=None)``
+        done for the whole batch at once: one UPDATE, and one rollup, commitment
+        and changelog write per user. Rows are claimed with ``SELECT ... FOR
+        UPDATE SKIP LOCKED``, so concurrent sweeps never wait on each other or
+        on a request editing the same timer; a skipped row is stopped by the
+        next sweep.
+        """
+        queryset = Sessions.objects.filter(
+            end_time__isnull=True,
+            auto_stop_at__isnull=False,
+            auto_stop_at__lte=now or timezone.now(),
+        )
+        if user is not None:
+            queryset = queryset.filter(user=user)
+        queryset = queryset.select_for_update(skip_locked=True).order_by(
+            "auto_stop_at", "pk"
+        )
+        sessions = list(queryset[:limit] if limit else queryset)
+        if not sessions:
+            return []
+
+        prefetch_related_objects(sessions, "subproject_links")
+        by_user = defaultdict(list)
+        for session in sessions:
+            # Active sessions carry no rollup credit, so there is nothing to
+            # withdraw first.
+            session.end_time = _floor_instant(session.auto_stop_at)
+            session.auto_stop_at = None
+            session.version = (session.version or 1) + 1
+            by_user[session.user_id].append(session)
+        Sessions.objects.bulk_update(sessions, ["end_time", "auto_stop_at", "version"])
+
+        for user_id, stopped in by_user.items():
+            rollups.add_sessions(user_id, stopped)
+            session_frame.invalidate(user_id)
+            scopes = [
+                (
+                    session.project_id,
+                    {link.subproject_id for link in session.subproject_links.all()},
+                )
+                for session in stopped
+            ]
+            _mark_commitments_dirty(
+                user_id,
+                *(session.start_time for session in stopped),
+                scopes=scopes,
+            )
+            changelog.record_session_scopes(
+                user_id, [session.pk for session in stopped], scopes
+            )
+        return sessions
+
     @staticmethod
     @transaction.atomic
     def delete_session(session_id, *, user=None, expected_version=None):
@@ -198,8 +413,14 @@ class SessionMutationService:
             raise StaleVersionError(session)
         deleted_id = session.pk
         user_id = session.user_id
+        scope = _session_scope(session)
+        rollups.remove_session(session)
         session.delete()
-        _mark_commitments_dirty(user_id)
+        session_frame.invalidate(user_id)
+        _mark_commitments_dirty(
+            user_id, session.start_time, session.end_time, scopes=[scope]
+        )
+        changelog.record_session_scopes(user_id, [deleted_id], [scope])
         return deleted_id
 
     @staticmethod
@@ -221,9 +442,20 @@ class SessionMutationService:
 
         session.version = (session.version or 1) + 1
         session.full_clean()
+        previous_scope = _session_scope(session)
+        rollups.remove_session(session)
         _set_allocations(session, allocations)
+        rollups.add_session(session)
         session.save(update_fields=["version"])
-        _mark_commitments_dirty(session.user_id)
+        session_frame.invalidate(session.user_id)
+        scopes = [
+            previous_scope,
+            (session.project_id, {subproject.pk for subproject in subprojects}),
+        ]
+        _mark_commitments_dirty(
+            session.user_id, session.start_time, session.end_time, scopes=scopes
+        )
+        changelog.record_session_scopes(session.user_id, [session.pk], scopes)
         return session
 
     @staticmethod
@@ -1,5 +1,6 @@
 """Canonical client-owned session content used for UUID deduplication."""
 
+import hashlib
 from datetime import timezone as datetime_timezone
 
 from django.utils import timezone
@@ -30,6 +31,11 @@ def canonical_session_content(
     )
 
 
+def canonical_digest(content):
+    """A short, process-independent stand-in for a canonical content tuple."""
+    return hashlib.sha256(repr(content).encode()).hexdigest()
+
+
 def canonical_existing_session(session):
     allocations = (
         (link.subproject.name, link.allocation_bp)
@@ -0,0 +1,307 @@
+"""Columnar, cached snapshot of a user's completed sessions for chart payloads.
+
+Scatter, daily, heatmap and histogram charts each pulled the same session rows
+through the ORM with their own annotations. ``SessionFrame`` loads a user's
+completed sessions once into contiguous typed columns (``array`` from the
+standard library; NumPy is not a dependency) plus a CSR-style allocation table:
+
+* ``ids``, ``start_us``, ``end_us``, ``project_ids`` -- one slot per session,
+  instants as UTC epoch microseconds;
+* ``link_offsets`` -- session ``i``'s links are ``link_offsets[i]`` up to
+  ``link_offsets[i + 1]`` in ``link_subproject_ids``/``link_bps``.
+
+Frames cover a user's whole history and serve only unfiltered charts; a
+narrowed chart reads its sessions with an indexed query instead. They are
+cached per user in the report cache under the user's data generation
+(``core.generation``), which every session write bumps in its transaction, and
+also dropped when a writer commits. Names are resolved per payload rather than
+cached, so renames never go stale; project series follow the database's
+ordering of names, like the query builders.
+
+Builders return the same intermediate rows as the ORM paths in
+``core.chart_reports`` and ``core.attribution`` so formatting is shared.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as datetime_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core import generation
+from core.attribution import BASIS_POINTS, NO_SUBPROJECT, duration_from_numerator
+from core.models import Projects, Sessions, SubProjects
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=datetime_timezone.utc)
+#: Upper bounds (exclusive) of chart_reports.HISTOGRAM_LABELS buckets 0-5.
+HISTOGRAM_BOUNDS_US = [
+    int(timedelta(minutes=minutes).total_seconds()) * 1_000_000
+    for minutes in (15, 30, 60, 120, 240, 480)
+]
+CACHE_TIMEOUT = 60 * 60
+
+
+def _cache():
+    return caches[settings.REPORT_CACHE_ALIAS]
+
+
+def _cache_key(user_id):
+    return f"session_frame:{user_id}"
+
+
+def _epoch_us(value):
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _instant(epoch_us):
+    return EPOCH + timedelta(microseconds=epoch_us)
+
+
+def invalidate(user_id):
+    """Drop ``user_id``'s cached frame once the current transaction commits."""
+    transaction.on_commit(lambda: _cache().delete(_cache_key(user_id)))
+
+
+class SessionFrame:
+    __slots__ = (
+        "ids",
+        "start_us",
+        "end_us",
+        "project_ids",
+        "link_offsets",
+        "link_subproject_ids",
+        "link_bps",
+    )
+
+    def __init__(
+        self,
+        ids,
+        start_us,
+        end_us,
+        project_ids,
+        link_offsets,
+        link_subproject_ids,
+        link_bps,
+    ):
+        self.ids = ids
+        self.start_us = start_us
+        self.end_us = end_us
+        self.project_ids = project_ids
+        self.link_offsets = link_offsets
+        self.link_subproject_ids = link_subproject_ids
+        self.link_bps = link_bps
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def load(cls, user_id):
+        ids, start_us, end_us, project_ids = (
+            array("q"), array("q"), array("q"), array("q")
+        )
+        link_offsets = array("q", [0])
+        link_subproject_ids, link_bps = array("q"), array("q")
+        # One LEFT JOIN row per link (or one bare row per unlinked session),
+        # ordered so each session's links arrive together.
+        rows = (
+            Sessions.objects.filter(user_id=user_id, end_time__isnull=False)
+            .order_by("pk", "subproject_links__subproject_id")
+            .values_list(
+                "pk",
+                "start_time",
+                "end_time",
+                "project_id",
+                "subproject_links__subproject_id",
+                "subproject_links__allocation_bp",
+            )
+        )
+        for pk, start_time, end_time, project_id, subproject_id, allocation_bp in rows.iterator(
+            chunk_size=2000
+        ):
+            if not ids or ids[-1] != pk:
+                if ids:
+                    link_offsets.append(len(link_subproject_ids))
+                ids.append(pk)
+                start_us.append(_epoch_us(start_time))
+                end_us.append(_epoch_us(end_time))
+                project_ids.append(project_id)
+            if subproject_id is not None:
+                link_subproject_ids.append(subproject_id)
+                link_bps.append(allocation_bp)
+        if ids:
+            link_offsets.append(len(link_subproject_ids))
+        return cls(
+            ids,
+            start_us,
+            end_us,
+            project_ids,
+            link_offsets,
+            link_subproject_ids,
+            link_bps,
+        )
+
+    @classmethod
+    def for_user(cls, user, data_generation=None):
+        """The user's cached frame, reloaded once their data generation moved.
+
+        Pass ``data_generation`` when the caller already looked it up (see
+        ``generation.for_request``).
+        """
+        user_id = getattr(user, "pk", user)
+        if data_generation is None:
+            data_generation = generation.current(user_id)
+        cached = _cache().get(_cache_key(user_id))
+        if cached is not None and cached[0] == data_generation:
+            return cached[1]
+        frame = cls.load(user_id)
+        _cache().set(_cache_key(user_id), (data_generation, frame), CACHE_TIMEOUT)
+        return frame
+
+    def _project_names(self):
+        """``({pk: name}, {name: rank})``, ranked in the database's name order."""
+        names = {}
+        ranks = {}
+        for pk, name in (
+            Projects.objects.filter(pk__in=set(self.project_ids))
+            .order_by("name")
+            .values_list("pk", "name")
+        ):
+            names[pk] = name
+            ranks.setdefault(name, len(ranks))
+        return names, ranks
+
+    def _subproject_names(self):
+        return dict(
+            SubProjects.objects.filter(
+                pk__in=set(self.link_subproject_ids)
+            ).values_list("pk", "name")
+        )
+
+    def _elapsed(self, index):
+        return self.end_us[index] - self.start_us[index]
+
+    def _start_day(self, index):
+        return _instant(self.start_us[index]).date()
+
+    def _weighted_buckets(self, index, subproject_names):
+        """(series, numerator) pairs matching core.attribution's link/residual split."""
+        elapsed = self._elapsed(index)
+        first, last = self.link_offsets[index], self.link_offsets[index + 1]
+        allocation_total = 0
+        for position in range(first, last):
+            allocation_total += self.link_bps[position]
+            yield (
+                subproject_names[self.link_subproject_ids[position]],
+                elapsed * self.link_bps[position],
+            )
+        residual_bp = BASIS_POINTS - allocation_total
+        if residual_bp > 0:
+            yield NO_SUBPROJECT, elapsed * residual_bp
+
+    def histogram_buckets(self):
+        counts = defaultdict(int)
+        for index in range(len(self)):
+            counts[bisect_right(HISTOGRAM_BOUNDS_US, self._elapsed(index))] += 1
+        return [
+            {"bucket": bucket, "count": counts[bucket]} for bucket in sorted(counts)
+        ]
+
+    def intervals(self):
+        order = sorted(range(len(self)), key=lambda index: -self.end_us[index])
+        return [
+            {
+                "start_time": _instant(self.start_us[index]),
+                "end_time": _instant(self.end_us[index]),
+            }
+            for index in order
+        ]
+
+    def session_points(self, use_subprojects=False):
+        if not use_subprojects:
+            names, ranks = self._project_names()
+            rows = [
+                {
+                    "end_time": _instant(self.end_us[index]),
+                    "series": names[self.project_ids[index]],
+                    "duration_value": timedelta(microseconds=self._elapsed(index)),
+                }
+                for index in range(len(self))
+            ]
+            series_rank = ranks.__getitem__
+        else:
+            subproject_names = self._subproject_names()
+            rows = []
+            for index in range(len(self)):
+                numerators = defaultdict(int)
+                for series, numerator in self._weighted_buckets(index, subproject_names):
+                    numerators[series] += numerator
+                end_time = _instant(self.end_us[index])
+                rows.extend(
+                    {
+                        "end_time": end_time,
+                        "series": series,
+                        "duration_value": duration_from_numerator(numerator),
+                    }
+                    for series, numerator in numerators.items()
+                )
+            # core.attribution sorts subproject series in Python too.
+            series_rank = str
+        rows.sort(key=lambda row: series_rank(row["series"]))
+        rows.sort(key=lambda row: row["end_time"], reverse=True)
+        return rows
+
+    def daily_series(self, use_subprojects=False):
+        if not use_subprojects:
+            names, ranks = self._project_names()
+            totals = defaultdict(int)
+            for index in range(len(self)):
+                key = (self._start_day(index), names[self.project_ids[index]])
+                totals[key] += self._elapsed(index)
+            return [
+                {
+                    "date": day,
+                    "series": series,
+                    "total": timedelta(microseconds=total),
+                }
+                for (day, series), total in sorted(
+                    totals.items(), key=lambda item: (item[0][0], ranks[item[0][1]])
+                )
+            ]
+
+        subproject_names = self._subproject_names()
+        numerators = defaultdict(int)
+        for index in range(len(self)):
+            day = self._start_day(index)
+            for series, numerator in self._weighted_buckets(index, subproject_names):
+                numerators[(day, series)] += numerator
+        return [
+            {
+                "date": day,
+                "series": series,
+                "total": duration_from_numerator(numerator),
+            }
+            for (day, series), numerator in sorted(numerators.items())
+        ]
+
+    def daily_totals(self):
+        totals = defaultdict(int)
+        for index in range(len(self)):
+            totals[self._start_day(index)] += self._elapsed(index)
+        return [
+            {"date": day, "total": timedelta(microseconds=total)}
+            for day, total in sorted(totals.items())
+        ]
@@ -145,16 +145,28 @@ function invalidateChartData() {
     chartDataCache.clear();
 }
 
+/**
+ * Every chart type the picker offers, plus `type` should it be missing.
+ */
+function pickerChartTypes(type) {
+    const types = $('#chart_type option')
+        .map(function() { return String($(this).val()); })
+        .get()
+        .filter(Boolean);
+    if (!types.includes(type)) types.push(type);
+    return types;
+}
+
 function get_project_data(type, start_date = "", end_date = "", project_name = "", context_id = "", tag_ids = [], exclude_ids = [], include_ids = []) {
-    // Every chart type is served by the v2 charts endpoint; the server picks
-    // the payload shape from chart_type (legacy tally/hierarchy shapes for
+    // The v2 batch endpoint resolves the filters once and returns every chart
+    // type the picker offers, so touring the types after the first draw costs
+    // no further round trips. The server picks each payload shape from its
+    // chart type (legacy tally/hierarchy shapes for
     // pie/bar/context/status/bubble/treemap/radar).
     const url_base = $('#chart_data_link').val();
-    let url = url_base;
 
     // Build query string safely
     const qs = new URLSearchParams();
-    qs.set('chart_type', type);
     if (project_name) qs.set('project_name', project_name);
     if (start_date) qs.set('start_date', start_date);
     if (end_date) qs.set('end_date', end_date);
@@ -171,32 +183,36 @@ function get_project_data(type, start_date = "", end_date = "", project_name = "
         exclude_ids.forEach(id => qs.append('exclude_projects', id));
     }
 
-    const query = qs.toString();
-    if (query) url += '?' + query;
-
-    console.log('Fetching chart data:', url);
-
-    if (chartDataCache.has(url)) {
-        return chartDataCache.get(url);
-    }
-
-    const request = new Promise((resolve, reject) => {
-        $.ajax({
-            url: url,
-            type: 'GET',
-            dataType: 'json',
-            success: function(data) {
-                resolve(data);
-            },
-            error: function(error) {
-                chartDataCache.delete(url);
-                reject(error);
-            }
+    // One cache entry per filter set; it holds the payload of every type.
+    const filters = qs.toString();
+    let request = chartDataCache.get(filters);
+    if (!request || !(type in request.types)) {
+        const types = pickerChartTypes(type);
+        qs.set('chart_types', types.join(','));
+        const url = url_base + '?' + qs.toString();
+        console.log('Fetching chart data:', url);
+
+        const charts = new Promise((resolve, reject) => {
+            $.ajax({
+                url: url,
+                type: 'GET',
+                dataType: 'json',
+                success: function(data) {
+                    resolve(data.charts);
+                },
+                error: function(error) {
+                    chartDataCache.delete(filters);
+                    reject(error);
+                }
+            });
         });
-    });
-
-    chartDataCache.set(url, request);
-    return request;
+        request = {
+            types: Object.fromEntries(types.map(t => [t, true])),
+            charts: charts
+        };
+        chartDataCache.set(filters, request);
+    }
+    return request.charts.then(charts => charts[type]);
 }
 
 // ============================================================================
@@ -391,7 +407,8 @@ $(document).ready(function() {
        selects in focus_desk.js, except the redraw is client-side so there is no
        form submit to make. Safe to fire on every change: render() reads all its
        inputs live from the DOM, renderGeneration discards out-of-order
-       responses, and chartDataCache makes a type you have already seen instant.
+       responses, and chartDataCache already holds every type for the current
+       filters, so switching is instant.
 
        The narrowing controls keep their explicit Apply, because those DO reload
        the page to update the URL and the filter pills. */
@@ -401,8 +418,8 @@ $(document).ready(function() {
     });
 
     /* The one thing a redraw alone cannot do: pick up time tracked since the
-       page loaded. chartDataCache holds a payload per URL for the life of the
-       page, so refreshing has to drop it first. */
+       page loaded. chartDataCache holds the payloads per filter set for the
+       life of the page, so refreshing has to drop it first. */
     refresh.on('click', function() {
         invalidateChartData();
         render();
@@ -14,7 +14,7 @@
      3. ACTIVITY RANGE     week / 2 weeks / month over the 30 pre-rendered
                            calendar cells.
 
-   The running-timer cards are re-rendered server-side every five seconds by
+   The running-timer cards are re-rendered server-side when they change by
    timer_poll.js, which fires `autumn:timers-refreshed` afterwards. Nothing
    here holds a reference to a card across that swap: every tick re-queries.
    ==========================================================================*/
@@ -153,8 +153,8 @@
 
        the chart's SHAPE changes a timer started or stopped, a session was
                                  edited elsewhere. Only then is a refetch
-                                 worth a request, and the five-second timer
-                                 poll already tells us when the running set
+                                 worth a request, and the timer poll
+                                 already tells us when the running set
                                  changed. TIMELINE_HEARTBEAT_MS is the slow
                                  backstop for changes made outside this tab
                                  (CLI, API, another device).
@@ -1,11 +1,17 @@
 /* ============================================================================
    AUTUMN — ACTIVE-TIMER FRAGMENT POLL                            timer_poll.js
    ----------------------------------------------------------------------------
-   Re-fetches the #active-timers fragment every five seconds and swaps it in, so
-   a timer started from the CLI, the API or another tab shows up here without a
-   reload. The container carries its own data-refresh-url and data-timer-surface
-   because the two surfaces (dashboard, timers) render different partials from
-   the same endpoint.
+   Keeps the #active-timers fragment current, so a timer started from the CLI,
+   the API or another tab shows up here without a reload. The container carries
+   its own data-wait-url and data-timer-surface because the two surfaces
+   (dashboard, timers) render different partials from the same endpoint.
+
+   The wait endpoint is a long-poll keyed on X-Timer-State, the fingerprint of
+   the running timers this page last rendered: it answers 200 with fresh markup
+   once they differ (or an auto-stop fires) and 204 when nothing changed. Under
+   ASGI the server holds a quiet request for a while, so the next one goes out
+   straight away; when it answers at once (the WSGI default) the next one waits
+   out the rest of SYNC_INTERVAL_MS. Either way an idle tab never re-renders.
 
    It only replaces markup. Anything that needs to re-run against the new nodes
    listens for `autumn:timers-refreshed`, which is dispatched on document after
@@ -15,7 +21,8 @@
    inside this fragment; swapping it out mid-edit would discard what the user
    was typing. So the poll skips a beat whenever the note editor is focused or
    marked data-dirty, and re-checks after the response arrives, since the user
-   can start typing while it is in flight.
+   can start typing while it is in flight. A skipped swap keeps the old state,
+   so the next poll returns the change again.
 
    Was dynamic_timers.js (chunk 13). It also carried an updateDurations() that
    ticked `.timer-duration` once a second — dead code: that class only appears
@@ -28,7 +35,9 @@
 
   var SELECTOR = "#active-timers";
   var SYNC_INTERVAL_MS = 5000;
-  var refreshInFlight = false;
+  /* Empty until the first response, so the first round (one interval after
+     load) swaps in the current fragment and learns its state. */
+  var timerState = "";
 
   function isBeingEdited(container) {
     var active = document.activeElement;
@@ -38,41 +47,54 @@
     return !!container.querySelector('[data-timer-note-editor][data-dirty="true"]');
   }
 
-  function refreshTimerSection() {
-    var container = document.querySelector(SELECTOR);
-    if (refreshInFlight || !container) { return; }
+  function scheduleNext(startedAt) {
+    var elapsed = Date.now() - startedAt;
+    setTimeout(waitForChange, Math.max(SYNC_INTERVAL_MS - elapsed, 0));
+  }
 
-    var url = container.getAttribute("data-refresh-url");
-    var surface = container.getAttribute("data-timer-surface");
-    if (!url || !surface) { return; }
-    if (isBeingEdited(container)) { return; }
+  function waitForChange() {
+    var startedAt = Date.now();
+    var container = document.querySelector(SELECTOR);
+    var url = container && container.getAttribute("data-wait-url");
+    var surface = container && container.getAttribute("data-timer-surface");
+    if (!url || !surface || isBeingEdited(container)) {
+      scheduleNext(startedAt);
+      return;
+    }
 
-    refreshInFlight = true;
-    fetch(url + "?surface=" + encodeURIComponent(surface), {
+    var newState = timerState;
+    fetch(url + "?surface=" + encodeURIComponent(surface) +
+          "&state=" + encodeURIComponent(timerState), {
       credentials: "same-origin",
       headers: { "X-Requested-With": "XMLHttpRequest" }
     })
       .then(function (response) {
         if (!response.ok) { throw new Error(response.status); }
-        return response.text();
+        newState = response.headers.get("X-Timer-State") || "";
+        return response.status === 204 ? null : response.text();
       })
       .then(function (html) {
+        if (html === null) {
+          timerState = newState;
+          return;
+        }
         /* Re-read the container: this is the post-await re-check, and the
            element may have been replaced or the user may have started typing
            while the request was in flight. */
         var current = document.querySelector(SELECTOR);
         if (!current || isBeingEdited(current)) { return; }
         current.outerHTML = html;
+        timerState = newState;
         document.dispatchEvent(new CustomEvent("autumn:timers-refreshed"));
       })
       .catch(function () {
         /* Offline, a 500, a redirect to the login page — all transient from
-           here. Leave the markup alone; the next tick tries again. */
+           here. Leave the markup alone; the next round tries again. */
       })
       .then(function () {
-        refreshInFlight = false;
+        scheduleNext(startedAt);
       });
   }
 
-  setInterval(refreshTimerSection, SYNC_INTERVAL_MS);
+  setTimeout(waitForChange, SYNC_INTERVAL_MS);
 })();
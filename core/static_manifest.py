@@ -0,0 +1,88 @@
+"""Cache-busting versions for ``core`` static assets.
+
+Templates append ``?v={{ static_version.<name> }}`` to script and stylesheet
+URLs. ``<name>`` is a file's stem, or a subdirectory's name for bundles such
+as ``js/charts/``.
+
+Production versions are content hashes written once to
+``settings.STATIC_VERSION_MANIFEST`` by ``collectstatic`` (or
+``manage.py static_manifest``) and read when the context processor module is
+imported. ``scan`` with modification times remains for development and for
+deployments that have not written a manifest yet.
+"""
+
+import hashlib
+import json
+import os
+
+from django.conf import settings
+
+
+ASSET_DIRS = ("js", "css")
+
+
+def _entries(base_static):
+    """``(name, [file paths])`` for every versioned asset under ``base_static``."""
+    for asset_dir in ASSET_DIRS:
+        dir_path = os.path.join(base_static, "core", asset_dir)
+        if not os.path.exists(dir_path):
+            continue
+        for entry in sorted(os.listdir(dir_path)):
+            entry_path = os.path.join(dir_path, entry)
+            if os.path.isfile(entry_path):
+                yield os.path.splitext(entry)[0], [entry_path]
+            elif os.path.isdir(entry_path):
+                # For subdirectories, version the files directly inside it
+                # under the directory's name (e.g. "charts" for js/charts/).
+                files = [
+                    os.path.join(entry_path, sub_file)
+                    for sub_file in sorted(os.listdir(entry_path))
+                ]
+                files = [path for path in files if os.path.isfile(path)]
+                if files:
+                    yield entry, files
+
+
+def scan(base_static):
+    """Versions as the newest modification time of each asset."""
+    version = {}
+    for name, paths in _entries(base_static):
+        mtime = int(max(os.path.getmtime(path) for path in paths))
+        version[name] = max(version.get(name, 0), mtime)
+    return version
+
+
+def build(base_static):
+    """Versions as a short hash of each asset's contents."""
+    digests = {}
+    for name, paths in _entries(base_static):
+        # js/foo.js and css/foo.css share a key; hash them together.
+        digest = digests.setdefault(name, hashlib.sha256())
+        for path in paths:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return {name: digest.hexdigest()[:12] for name, digest in digests.items()}
+
+
+def write(base_static=None, path=None):
+    """Build the manifest for ``base_static`` and write it to ``path``."""
+    base_static = base_static or settings.STATIC_ROOT
+    path = path or settings.STATIC_VERSION_MANIFEST
+    version = build(base_static)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(version, f, indent=2, sort_keys=True)
+    # Workers starting mid-write must never read half a manifest.
+    os.replace(tmp_path, path)
+    return path, version
+
+
+def load(path=None):
+    """The written manifest, or None if there is none (or it is unreadable)."""
+    path = path or settings.STATIC_VERSION_MANIFEST
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
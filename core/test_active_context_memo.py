@@ -0,0 +1,72 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.middleware import ActiveContextMiddleware
+from core.models import Context, Projects
+from core.utils import (
+    ACTIVE_CONTEXT_SESSION_KEY,
+    filter_by_active_context,
+    get_active_context,
+)
+
+
+def context_queries(queries):
+    return [query for query in queries if 'FROM "core_context"' in query["sql"]]
+
+
+class ActiveContextMemoTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="context-memo", email="context-memo@example.com", password="pw"
+        )
+        self.work = Context.objects.create(user=self.user, name="Work")
+        self.home = Context.objects.create(user=self.user, name="Home")
+        Projects.objects.create(user=self.user, name="Report", context=self.work)
+        Projects.objects.create(user=self.user, name="Garden", context=self.home)
+
+    def request(self, active=None):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        request.session = {ACTIVE_CONTEXT_SESSION_KEY: active} if active else {}
+        ActiveContextMiddleware(lambda request: None)(request)
+        return request
+
+    def test_repeated_resolution_reads_contexts_once(self):
+        request = self.request(active=str(self.work.pk))
+        projects = Projects.objects.filter(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_active_context(request), (self.work, "single"))
+            self.assertEqual(
+                list(filter_by_active_context(projects, request).values_list("name", flat=True)),
+                ["Report"],
+            )
+            self.assertEqual(
+                get_active_context(request, override_context_id="home"),
+                (self.home, "single"),
+            )
+            self.assertEqual(request.contexts_memo.all, [self.home, self.work])
+        self.assertEqual(len(context_queries(queries)), 1)
+
+    def test_unknown_and_all_resolve_to_all(self):
+        request = self.request(active="missing")
+        self.assertEqual(get_active_context(request), (None, "all"))
+        self.assertEqual(get_active_context(request, "ALL"), (None, "all"))
+        self.assertEqual(get_active_context(request, str(10**9)), (None, "all"))
+
+    def test_memo_follows_the_request_user(self):
+        request = self.request()
+        self.assertEqual(len(request.contexts_memo.all), 2)
+        request.user = AnonymousUser()
+        self.assertEqual(request.contexts_memo.all, [])
+
+    def test_rendered_page_reads_contexts_once(self):
+        self.client.login(username="context-memo", password="pw")
+        session = self.client.session
+        session[ACTIVE_CONTEXT_SESSION_KEY] = str(self.home.pk)
+        session.save()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/contexts/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(context_queries(queries)), 1)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Projects, Sessions
+from core.services import SessionMutationService
+from core.views.timers import active_timer_state
+
+
+@override_settings(TIMER_WAIT_SECONDS=0)
+class ActiveTimersWaitTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="timer-wait", email="timer-wait@example.com", password="pw"
+        )
+        self.project = Projects.objects.create(user=self.user, name="Focus")
+        self.client.login(username="timer-wait", password="pw")
+
+    def start(self, **fields):
+        return SessionMutationService.create_session(
+            user=self.user,
+            project=self.project,
+            start_time=timezone.now() - timedelta(minutes=5),
+            is_active=True,
+            **fields,
+        )
+
+    def wait(self, state="", surface="timers"):
+        return self.client.get(
+            reverse("active_timers_wait"), {"surface": surface, "state": state}
+        )
+
+    def test_unchanged_state_answers_204_without_rendering(self):
+        self.start()
+        first = self.wait()
+        self.assertEqual(first.status_code, 200)
+        self.assertContains(first, "Focus")
+        state = first["X-Timer-State"]
+
+        with CaptureQueriesContext(connection) as queries:
+            quiet = self.wait(state)
+        self.assertEqual(quiet.status_code, 204)
+        self.assertEqual(quiet["X-Timer-State"], state)
+        self.assertFalse(
+            [query for query in queries if "core_sessions_subprojects" in query["sql"]]
+        )
+
+    def test_timer_writes_change_the_state(self):
+        timer = self.start()
+        state = self.wait()["X-Timer-State"]
+        SessionMutationService.mutate_session(timer.pk, user=self.user, note="Drafting")
+        changed = self.wait(state)
+        self.assertEqual(changed.status_code, 200)
+        self.assertContains(changed, "Drafting")
+
+        state = changed["X-Timer-State"]
+        SessionMutationService.mutate_session(
+            timer.pk, user=self.user, end_time=timezone.now(), is_active=False
+        )
+        self.assertEqual(self.wait(state).status_code, 200)
+
+    def test_fragment_and_wait_agree_on_the_state(self):
+        self.start()
+        fragment = self.client.get(
+            reverse("active_timers_fragment"), {"surface": "dashboard"}
+        )
+        self.assertEqual(
+            self.wait(fragment["X-Timer-State"], surface="dashboard").status_code, 204
+        )
+
+    @override_settings(TIMER_WAIT_SECONDS=5, TIMER_WAIT_CHECK_SECONDS=5)
+    def test_held_request_wakes_to_stop_a_due_timer(self):
+        timer = self.start(auto_stop_at=timezone.now() + timedelta(seconds=2))
+        state = self.wait()["X-Timer-State"]
+
+        response = self.wait(state)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, f'id="timer-{timer.pk}"')
+        timer.refresh_from_db()
+        self.assertIsNotNone(timer.end_time)
+
+    def test_poll_stops_a_timer_that_is_already_overdue(self):
+        timer = self.start(auto_stop_at=timezone.now() + timedelta(minutes=1))
+        # The deadline passes between polls; nothing else writes meanwhile.
+        Sessions.objects.filter(pk=timer.pk).update(
+            auto_stop_at=timezone.now() - timedelta(minutes=1)
+        )
+        state, _ = active_timer_state(self.user)
+
+        response = self.wait(state)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, f'id="timer-{timer.pk}"')
+        timer.refresh_from_db()
+        self.assertIsNotNone(timer.end_time)
+
+    def test_rejects_unknown_surface_and_anonymous_users(self):
+        self.assertEqual(self.wait(surface="nope").status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.wait().status_code, 302)
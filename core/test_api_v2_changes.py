@@ -0,0 +1,169 @@
+from datetime import datetime, timezone as datetime_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Projects, SubProjects
+from core.services import DestructiveMutationService, SessionMutationService
+
+
+UTC = datetime_timezone.utc
+
+
+class V2ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="v2-changes", email="v2-changes@example.com"
+        )
+        self.project = Projects.objects.create(user=self.user, name="Main")
+        self.subproject = SubProjects.objects.create(
+            user=self.user, parent_project=self.project, name="Alpha"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def changes(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        response = self.client.get("/api/v2/changes/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def create_session(self, hour):
+        return SessionMutationService.create_session(
+            user=self.user,
+            project=self.project,
+            subprojects=[self.subproject],
+            start_time=datetime(2026, 7, 16, hour, tzinfo=UTC),
+            end_time=datetime(2026, 7, 16, hour, 30, tzinfo=UTC),
+            is_active=False,
+        )
+
+    def test_head_then_poll_returns_only_rows_written_since(self):
+        head = self.changes()
+        self.assertEqual(head["next_since"], head["since"])
+        self.assertEqual(head["sessions"], [])
+
+        first = self.create_session(9)
+        second = self.create_session(11)
+        SessionMutationService.mutate_session(
+            first.pk, user=self.user, note="edited"
+        )
+        SessionMutationService.mutate_session(
+            first.pk, user=self.user, note="edited again"
+        )
+        SessionMutationService.delete_session(second.pk, user=self.user)
+
+        payload = self.changes(head["next_since"])
+        self.assertFalse(payload["has_more"])
+        self.assertEqual([row["id"] for row in payload["sessions"]], [first.pk])
+        self.assertEqual(payload["sessions"][0]["note"], "edited again")
+        self.assertEqual(payload["sessions"][0]["version"], 3)
+        self.assertEqual(payload["deleted"]["sessions"], [second.pk])
+        # Session writes touch the totals of their project and subprojects.
+        [project] = payload["projects"]
+        self.assertEqual(project["session_count"], 1)
+        self.assertEqual(
+            [row["id"] for row in payload["subprojects"]], [self.subproject.pk]
+        )
+
+        quiet = self.changes(payload["next_since"])
+        self.assertEqual(quiet["next_since"], payload["next_since"])
+        self.assertEqual(quiet["sessions"], [])
+        self.assertEqual(quiet["projects"], [])
+        self.assertEqual(quiet["deleted"]["sessions"], [])
+
+    def test_batches_walk_the_sequence(self):
+        since = self.changes()["next_since"]
+        sessions = [self.create_session(hour) for hour in range(6, 10)]
+
+        seen = set()
+        for _ in range(20):
+            payload = self.changes(since, limit=2)
+            seen.update(row["id"] for row in payload["sessions"])
+            self.assertGreaterEqual(payload["next_since"], since)
+            since = payload["next_since"]
+            if not payload["has_more"]:
+                break
+        self.assertEqual(seen, {session.pk for session in sessions})
+
+    def test_destructive_mutations_emit_tombstones(self):
+        session = self.create_session(9)
+        other = Projects.objects.create(user=self.user, name="Other")
+        since = self.changes()["next_since"]
+
+        merged, _ = DestructiveMutationService.merge_projects(
+            user=self.user,
+            project1_name="Main",
+            project2_name="Other",
+            new_project_name="Merged",
+        )
+        payload = self.changes(since)
+        self.assertEqual([row["id"] for row in payload["projects"]], [merged.pk])
+        self.assertEqual(
+            payload["deleted"]["projects"], sorted([self.project.pk, other.pk])
+        )
+        [row] = payload["sessions"]
+        self.assertEqual(row["project"]["id"], merged.pk)
+        self.assertEqual(payload["subprojects"][0]["project_id"], merged.pk)
+
+        DestructiveMutationService.delete_project(
+            user=self.user, project_name="Merged"
+        )
+        payload = self.changes(payload["next_since"])
+        self.assertEqual(payload["deleted"]["projects"], [merged.pk])
+        self.assertEqual(payload["deleted"]["sessions"], [session.pk])
+        self.assertEqual(payload["deleted"]["subprojects"], [self.subproject.pk])
+
+    def test_project_and_tag_writes_through_the_api_are_recorded(self):
+        since = self.changes()["next_since"]
+        tag = self.client.post("/api/v2/tags/", {"name": "Focus"}, format="json")
+        created = self.client.post(
+            "/api/v2/projects/",
+            {"name": "New", "tag_ids": [tag.json()["id"]]},
+            format="json",
+        ).json()
+        payload = self.changes(since)
+        self.assertEqual([row["id"] for row in payload["projects"]], [created["id"]])
+
+        self.client.patch(
+            f"/api/v2/tags/{tag.json()['id']}", {"name": "Deep"}, format="json"
+        )
+        payload = self.changes(payload["next_since"])
+        [project] = payload["projects"]
+        self.assertEqual(project["tags"][0]["name"], "Deep")
+
+    def test_feed_is_scoped_to_the_user(self):
+        since = self.changes()["next_since"]
+        stranger = User.objects.create_user(
+            username="v2-stranger", email="v2-stranger@example.com"
+        )
+        project = Projects.objects.create(user=stranger, name="Theirs")
+        SessionMutationService.create_session(
+            user=stranger,
+            project=project,
+            start_time=datetime(2026, 7, 16, 9, tzinfo=UTC),
+            end_time=datetime(2026, 7, 16, 10, tzinfo=UTC),
+            is_active=False,
+        )
+        payload = self.changes(since)
+        self.assertEqual(payload["next_since"], since)
+        self.assertEqual(payload["sessions"], [])
+
+    def test_poll_query_count_is_constant(self):
+        since = self.changes()["next_since"]
+        self.create_session(9)
+        with CaptureQueriesContext(connection) as one:
+            self.changes(since)
+        for hour in range(10, 14):
+            self.create_session(hour)
+        with CaptureQueriesContext(connection) as five:
+            self.changes(since)
+        self.assertEqual(len(five), len(one))
+
+    def test_rejects_negative_since(self):
+        response = self.client.get("/api/v2/changes/", {"since": -1})
+        self.assertEqual(response.status_code, 400)
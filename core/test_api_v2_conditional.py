@@ -0,0 +1,157 @@
+from datetime import date, datetime, timezone as datetime_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+from rest_framework.test import APIClient
+
+from core import generation
+from core.commitments import reconcile_commitment, reconcile_due_commitments
+from core.models import Commitment, Projects
+from core.services import SessionMutationService
+
+
+UTC = datetime_timezone.utc
+
+
+class V2ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="v2-etag", email="v2-etag@example.com"
+        )
+        self.project = Projects.objects.create(user=self.user, name="Main")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_session(self, hour=9):
+        return SessionMutationService.create_session(
+            user=self.user,
+            project=self.project,
+            start_time=datetime(2026, 7, 16, hour, tzinfo=UTC),
+            end_time=datetime(2026, 7, 16, hour, 30, tzinfo=UTC),
+            is_active=False,
+        )
+
+    def get(self, url, etag=None, **params):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(url, params, **headers)
+
+    def test_unchanged_poll_is_answered_with_304_before_any_list_query(self):
+        self.create_session()
+        first = self.get("/api/v2/projects/")
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        with CaptureQueriesContext(connection) as queries:
+            again = self.get("/api/v2/projects/", etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], etag)
+        self.assertEqual(len(queries), 1)
+
+        # Strong and list forms of the same tag match too.
+        self.assertEqual(
+            self.get("/api/v2/projects/", f'"x", {etag[2:]}').status_code, 304
+        )
+
+    def test_writes_and_parameters_change_the_etag(self):
+        etag = self.get("/api/v2/projects/")["ETag"]
+        self.assertNotEqual(
+            self.get("/api/v2/projects/", search="Ma")["ETag"], etag
+        )
+
+        self.create_session()
+        response = self.get("/api/v2/projects/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["projects"][0]["session_count"], 1)
+
+        etag = response["ETag"]
+        self.client.patch(
+            f"/api/v2/projects/{self.project.pk}", {"status": "paused"}, format="json"
+        )
+        self.assertEqual(self.get("/api/v2/projects/", etag).status_code, 200)
+
+    def test_context_and_tag_writes_bump_their_lists(self):
+        contexts = self.get("/api/v2/contexts/")["ETag"]
+        tags = self.get("/api/v2/tags/")["ETag"]
+        created = self.client.post(
+            "/api/v2/contexts/", {"name": "Work"}, format="json"
+        ).json()
+        self.assertEqual(self.get("/api/v2/contexts/", contexts).status_code, 200)
+        self.assertEqual(self.get("/api/v2/tags/", tags).status_code, 200)
+
+        contexts = self.get("/api/v2/contexts/")["ETag"]
+        self.client.patch(
+            f"/api/v2/contexts/{created['id']}", {"description": "Day job"}, format="json"
+        )
+        response = self.get("/api/v2/contexts/", contexts)
+        self.assertEqual(response.status_code, 200)
+        [work] = [
+            row for row in response.json()["contexts"] if row["id"] == created["id"]
+        ]
+        self.assertEqual(work["description"], "Day job")
+
+    def test_etags_are_per_user(self):
+        etag = self.get("/api/v2/tags/")["ETag"]
+        other = User.objects.create_user(
+            username="v2-etag-other", email="v2-etag-other@example.com"
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.get("/api/v2/tags/", etag).status_code, 200)
+
+    @freeze_time("2026-07-17 10:00:05+00:00")
+    def test_profile_timezone_changes_the_etag(self):
+        # Web requests run in the profile timezone, which report days and
+        # commitment periods depend on but which bumps no generation.
+        self.create_session()
+        self.client.force_authenticate(None)
+        self.client.force_login(self.user)
+        etag = self.get("/api/v2/reports/totals/")["ETag"]
+        self.assertEqual(self.get("/api/v2/reports/totals/", etag).status_code, 304)
+
+        self.user.profile.timezone = "America/New_York"
+        self.user.profile.save()
+        self.assertEqual(self.get("/api/v2/reports/totals/", etag).status_code, 200)
+
+    def test_report_etags_expire_with_the_clock(self):
+        self.create_session()
+        with freeze_time("2026-07-17 10:00:05+00:00") as frozen:
+            etag = self.get("/api/v2/reports/totals/")["ETag"]
+            self.assertEqual(
+                self.get("/api/v2/reports/totals/", etag).status_code, 304
+            )
+            frozen.tick(60)
+            self.assertEqual(
+                self.get("/api/v2/reports/totals/", etag).status_code, 200
+            )
+
+    @override_settings(COMMITMENTS_BACKGROUND_RECONCILE=True)
+    @freeze_time("2026-01-05 12:00:00+00:00")
+    def test_background_replay_bumps_the_generation(self):
+        commitment = Commitment.objects.create(
+            user=self.user,
+            project=self.project,
+            aggregation_type="project",
+            commitment_type="sessions",
+            period="daily",
+            start_date=date(2026, 1, 1),
+            target=1,
+        )
+        reconcile_commitment(commitment)
+        SessionMutationService.create_session(
+            user=self.user,
+            project=self.project,
+            start_time=datetime(2026, 1, 2, 9, tzinfo=UTC),
+            end_time=datetime(2026, 1, 2, 10, tzinfo=UTC),
+            is_active=False,
+        )
+        etag = self.get("/api/v2/commitments/")["ETag"]
+        before = generation.current(self.user.pk)
+        self.assertEqual(reconcile_due_commitments(), 1)
+        self.assertEqual(generation.current(self.user.pk), before + 1)
+        response = self.get("/api/v2/commitments/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["commitments"][0]["stale"])
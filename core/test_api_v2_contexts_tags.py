@@ -288,7 +288,7 @@ class V2ContextsTagsTests(TestCase):
         self.assertFalse(project.tags.filter(pk=tag.id).exists())
         self.assertTrue(Projects.objects.filter(pk=project.id).exists())
 
-    def test_list_endpoints_each_use_one_query(self):
+    def test_list_endpoints_each_use_one_list_query(self):
         contexts = [
             Context.objects.create(user=self.user, name=f"Context {index:02d}")
             for index in range(10)
@@ -301,9 +301,10 @@ class V2ContextsTagsTests(TestCase):
             project = self._project(f"Project {index:02d}", context)
             project.tags.add(*tags[: index + 1])
 
-        with self.assertNumQueries(1):
+        # One list query plus the data-generation lookup for the ETag.
+        with self.assertNumQueries(2):
             contexts_response = self.client.get(reverse("api_v2:contexts"))
-        with self.assertNumQueries(1):
+        with self.assertNumQueries(2):
             tags_response = self.client.get(reverse("api_v2:tags"))
 
         self.assertEqual(contexts_response.status_code, 200)
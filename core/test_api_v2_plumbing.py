@@ -58,6 +58,8 @@ class V2EndpointTests(TestCase):
                     "commitments",
                     "export",
                     "import",
+                    "changes",
+                    "sessions_bulk",
                 ],
                 "user": {
                     "id": self.user.id,
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone as datetime_timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Projects
+from core.services import SessionMutationService
+
+
+UTC = datetime_timezone.utc
+REPORT_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "reports": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "report-cache-tests",
+    },
+}
+
+
+@override_settings(CACHES=REPORT_CACHES)
+class V2ReportCacheTests(TestCase):
+    def setUp(self):
+        caches["reports"].clear()
+        self.user = User.objects.create_user(
+            username="report-cache", email="report-cache@example.com"
+        )
+        self.alpha = Projects.objects.create(user=self.user, name="Alpha")
+        self.beta = Projects.objects.create(user=self.user, name="Beta")
+        self.track(self.alpha, 9)
+        self.track(self.beta, 11)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def track(self, project, hour):
+        SessionMutationService.create_session(
+            user=self.user,
+            project=project,
+            start_time=datetime(2026, 7, 16, hour, tzinfo=UTC),
+            end_time=datetime(2026, 7, 16, hour, 45, tzinfo=UTC),
+            is_active=False,
+        )
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_repeated_report_is_served_without_reading_sessions(self):
+        url = "/api/v2/reports/totals/"
+        first = self.get(url, project_ids=f"{self.alpha.pk},{self.beta.pk}")
+        self.assertEqual(first["X-Report-Cache"], "miss")
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.get(url, project_ids=f"{self.beta.pk},{self.alpha.pk}")
+        self.assertEqual(second["X-Report-Cache"], "hit")
+        self.assertEqual(second.json(), first.json())
+        self.assertFalse(
+            [query for query in queries if '"core_sessions"' in query["sql"]]
+        )
+
+    def test_writes_and_other_parameters_miss(self):
+        url = "/api/v2/reports/charts/"
+        self.get(url, chart_type="pie")
+        self.assertEqual(self.get(url, chart_type="pie")["X-Report-Cache"], "hit")
+        self.assertEqual(self.get(url, chart_type="bar")["X-Report-Cache"], "miss")
+
+        totals = self.get("/api/v2/reports/totals/").json()
+        self.track(self.alpha, 13)
+        response = self.get("/api/v2/reports/totals/")
+        self.assertEqual(response["X-Report-Cache"], "miss")
+        self.assertEqual(
+            response.json()["session_count"], totals["session_count"] + 1
+        )
+
+    def test_entries_are_per_user(self):
+        self.get("/api/v2/reports/hierarchy/")
+        other = User.objects.create_user(
+            username="report-cache-other", email="report-cache-other@example.com"
+        )
+        self.client.force_authenticate(other)
+        response = self.get("/api/v2/reports/hierarchy/")
+        self.assertEqual(response["X-Report-Cache"], "miss")
+        self.assertEqual(response.json(), {"projects": []})
+
+    def test_stats_count_hits_and_misses_for_staff_only(self):
+        self.get("/api/v2/reports/tallies/", by="project")
+        self.get("/api/v2/reports/tallies/", by="project")
+        self.get("/api/v2/reports/tallies/", by="context")
+
+        self.assertEqual(self.client.get("/api/v2/reports/cache/").status_code, 403)
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+        self.assertEqual(
+            self.get("/api/v2/reports/cache/").json(), {"hits": 1, "misses": 2}
+        )
@@ -186,6 +186,10 @@ class V2ReportsTests(TestCase):
         web_client.force_login(self.user)
         response = web_client.get(reverse("charts"))
         self.assertEqual(response.status_code, 200)
-        self.assertContains(response, reverse("api_v2:report-charts"))
+        # One batch request serves every type in the picker.
+        self.assertContains(
+            response,
+            f'id="chart_data_link" value="{reverse("api_v2:report-charts-batch")}"',
+        )
         self.assertNotContains(response, "/api/chart_data/")
         self.assertNotContains(response, "api_chart_data")
@@ -0,0 +1,187 @@
+from datetime import date, datetime, timedelta, timezone as datetime_timezone
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core import changelog
+from core.models import Commitment, Projects, Sessions, SessionSubproject, SubProjects
+from core.totals import derived_project_totals
+
+
+UTC = datetime_timezone.utc
+URL = "/api/v2/sessions/bulk/"
+
+
+class V2SessionBulkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="v2-bulk", email="v2-bulk@example.com"
+        )
+        self.project = Projects.objects.create(user=self.user, name="Main")
+        self.alpha = SubProjects.objects.create(
+            user=self.user, parent_project=self.project, name="Alpha"
+        )
+        self.beta = SubProjects.objects.create(
+            user=self.user, parent_project=self.project, name="Beta"
+        )
+        other = User.objects.create_user(
+            username="v2-bulk-other", email="v2-bulk-other@example.com"
+        )
+        self.foreign = Projects.objects.create(user=other, name="Foreign")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def item(self, day=1, **overrides):
+        start = datetime(2026, 2, day, 9, tzinfo=UTC)
+        payload = {
+            "project_id": self.project.pk,
+            "start": start.isoformat().replace("+00:00", "Z"),
+            "end": (start + timedelta(hours=1)).isoformat().replace("+00:00", "Z"),
+        }
+        payload.update(overrides)
+        return payload
+
+    def post(self, items):
+        response = self.client.post(URL, {"sessions": items}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_batch_creates_sessions_with_allocations_and_hooks(self):
+        commitment = Commitment.objects.create(
+            user=self.user,
+            project=self.project,
+            aggregation_type="project",
+            commitment_type="time",
+            period="weekly",
+            start_date=date(2026, 1, 1),
+            target=60,
+        )
+        Commitment.objects.filter(pk=commitment.pk).update(needs_recompute=False)
+        head = changelog.head(self.user)
+
+        body = self.post(
+            [
+                self.item(1, subproject_ids=[self.alpha.pk, self.beta.pk]),
+                self.item(
+                    2,
+                    subproject_allocations=[
+                        {"subproject_id": self.alpha.pk, "allocation_bp": 2500}
+                    ],
+                    note="Planning",
+                ),
+                self.item(3),
+            ]
+        )
+
+        self.assertEqual((body["created"], body["existing"], body["failed"]), (3, 0, 0))
+        self.assertEqual([result["index"] for result in body["results"]], [0, 1, 2])
+        first, second, _ = (result["session"] for result in body["results"])
+        self.assertEqual(
+            sorted(
+                (row["subproject_id"], row["allocation_bp"])
+                for row in first["subproject_allocations"]
+            ),
+            [(self.alpha.pk, 5000), (self.beta.pk, 5000)],
+        )
+        self.assertEqual(second["note"], "Planning")
+        self.assertEqual(Sessions.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(SessionSubproject.objects.count(), 3)
+        self.assertEqual(
+            derived_project_totals(self.user, [self.project.pk])[self.project.pk], 180.0
+        )
+        commitment.refresh_from_db()
+        self.assertTrue(commitment.needs_recompute)
+        ids, _, _ = changelog.changes_since(self.user, head, 100)
+        self.assertEqual(len(ids["session"]), 3)
+
+    def test_bad_items_fail_alone_with_the_single_endpoint_errors(self):
+        body = self.post(
+            [
+                self.item(1),
+                self.item(2, project_id=self.foreign.pk),
+                self.item(3, end="2026-02-03T08:00:00Z"),
+                {"project_id": "x"},
+                self.item(4, subproject_ids=[self.alpha.pk, 10**9]),
+            ]
+        )
+        self.assertEqual((body["created"], body["failed"]), (1, 4))
+        codes = [
+            result["error"] and result["error"]["code"] for result in body["results"]
+        ]
+        self.assertEqual(
+            codes,
+            [None, "not_found", "validation_error", "validation_error", "validation_error"],
+        )
+        self.assertIn("end", body["results"][2]["error"]["details"])
+        self.assertIn("subproject_ids", body["results"][4]["error"]["details"])
+        self.assertEqual(Sessions.objects.filter(user=self.user).count(), 1)
+
+    def test_uuid_replays_are_idempotent_and_conflicts_reported(self):
+        stored, repeated, clashing = str(uuid4()), str(uuid4()), str(uuid4())
+        self.post([self.item(1, uuid=stored)])
+
+        body = self.post(
+            [
+                self.item(1, uuid=stored),
+                self.item(1, uuid=stored, note="changed"),
+                self.item(2, uuid=repeated),
+                self.item(2, uuid=repeated),
+                self.item(3, uuid=clashing),
+                self.item(4, uuid=clashing),
+            ]
+        )
+
+        statuses = [result["status"] for result in body["results"]]
+        self.assertEqual(
+            statuses, ["existing", "error", "created", "existing", "created", "error"]
+        )
+        self.assertEqual(body["results"][1]["error"]["code"], "uuid_conflict")
+        self.assertEqual(
+            body["results"][3]["session"]["id"], body["results"][2]["session"]["id"]
+        )
+        self.assertIn("uuid", body["results"][5]["error"]["details"])
+        self.assertEqual(Sessions.objects.filter(user=self.user).count(), 3)
+
+    def test_uuid_inserted_concurrently_fails_only_its_item(self):
+        taken = str(uuid4())
+        self.post([self.item(1, uuid=taken)])
+
+        # Another request inserts the UUID after this batch looked it up.
+        with patch(
+            "core.api_v2.views._session_queryset",
+            return_value=Sessions.objects.none(),
+        ):
+            body = self.post(
+                [self.item(2, uuid=str(uuid4())), self.item(1, uuid=taken), self.item(3)]
+            )
+
+        self.assertEqual((body["created"], body["existing"], body["failed"]), (2, 0, 1))
+        self.assertIn("uuid", body["results"][1]["error"]["details"])
+        self.assertEqual(Sessions.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(
+            derived_project_totals(self.user, [self.project.pk])[self.project.pk], 180.0
+        )
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def count_queries(days):
+            with CaptureQueriesContext(connection) as queries:
+                self.post(
+                    [
+                        self.item(day, uuid=str(uuid4()), subproject_ids=[self.alpha.pk])
+                        for day in days
+                    ]
+                )
+            return len(queries)
+
+        count_queries([1])  # Creates the per-user generation row.
+        self.assertEqual(count_queries(range(2, 4)), count_queries(range(4, 14)))
+
+    def test_envelope_is_validated(self):
+        response = self.client.post(URL, {"sessions": []}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"]["code"], "validation_error")
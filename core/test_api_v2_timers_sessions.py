@@ -240,6 +240,45 @@ class V2TimersSessionsTests(TestCase):
         self.assertEqual(response.json()["sessions"][0]["note"], "second")
         self.assertNotEqual(older.id, tied_first.id)
 
+    def test_sessions_list_cursor_walks_ties_without_total(self):
+        tied_end = datetime(2026, 7, 15, 10, 0, tzinfo=UTC)
+        sessions = [
+            self._create_completed(end=tied_end - timedelta(hours=1)),
+            self._create_completed(end=tied_end),
+            self._create_completed(end=tied_end),
+            self._create_completed(end=tied_end + timedelta(microseconds=1)),
+            self._create_completed(end=tied_end - timedelta(days=1)),
+        ]
+        expected = [sessions[3].id, sessions[2].id, sessions[1].id, sessions[0].id, sessions[4].id]
+
+        seen = []
+        params = {"limit": 2, "total": "false"}
+        while True:
+            # The page and its allocation prefetch; no COUNT, no OFFSET scan.
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse("api_v2:sessions"), params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertIsNone(body["total"])
+            seen.extend(item["id"] for item in body["sessions"])
+            if body["next_cursor"] is None:
+                break
+            params["cursor"] = body["next_cursor"]
+        self.assertEqual(seen, expected)
+
+        first = self.client.get(reverse("api_v2:sessions"), {"limit": 5}).json()
+        self.assertEqual(first["total"], 5)
+        self.assertIsNone(first["next_cursor"])
+
+        response = self.client.get(
+            reverse("api_v2:sessions"), {"cursor": "not-a-cursor"}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(
+            reverse("api_v2:sessions"), {"cursor": params["cursor"], "offset": 1}
+        )
+        self.assertEqual(response.status_code, 400)
+
     @freeze_time("2026-01-20 12:00:00")
     def test_sessions_list_date_range_uses_user_timezone(self):
         self.user.profile.timezone = "America/New_York"
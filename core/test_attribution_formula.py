@@ -10,6 +10,9 @@ from core.api_helpers import _get_active_sessions
 from core.attribution import (
     BASIS_POINTS,
     hierarchy_child_credit,
+    report_attribution,
+    subproject_daily_series,
+    subproject_session_points,
     subproject_tally,
 )
 from core.models import Projects, Sessions, SessionSubproject, SubProjects
@@ -143,6 +146,61 @@ class AttributionFormulaTests(TestCase):
             40 * 1000000 * BASIS_POINTS,
         )
 
+    def test_grouped_queries_handle_over_allocation(self):
+        over = self._session(0, 60)
+        self._link(over, self.sub_a, 10000)
+        self._link(over, self.sub_b, 10000)
+        partial = self._session(7200, 100)
+        self._link(partial, self.sub_a, 2500)
+        self._session(14400, 30)
+        sessions = Sessions.objects.filter(user=self.user)
+
+        # Linked credit is grouped in one query and the residual in another;
+        # report_attribution also sums whole project durations.
+        with self.assertNumQueries(2):
+            rows = subproject_tally(sessions, group_by_id=True)
+        self.assertEqual(
+            [(row["subproject_id"], row["total_numerator"]) for row in rows],
+            [
+                (None, (100 * 7500 + 30 * BASIS_POINTS) * 1000000),
+                (self.sub_a.id, (60 * 10000 + 100 * 2500) * 1000000),
+                (self.sub_b.id, 60 * 10000 * 1000000),
+            ],
+        )
+
+        with self.assertNumQueries(2):
+            points = subproject_session_points(sessions)
+        self.assertEqual(
+            [(row["series"], row["duration_value"]) for row in points],
+            [
+                ("no subproject", timedelta(seconds=30)),
+                ("A", timedelta(seconds=25)),
+                ("no subproject", timedelta(seconds=75)),
+                ("A", timedelta(seconds=60)),
+                ("B", timedelta(seconds=60)),
+            ],
+        )
+
+        with self.assertNumQueries(2):
+            daily = subproject_daily_series(sessions)
+        self.assertEqual(
+            [(row["series"], row["total"]) for row in daily],
+            [
+                ("A", timedelta(seconds=85)),
+                ("B", timedelta(seconds=60)),
+                ("no subproject", timedelta(seconds=105)),
+            ],
+        )
+
+        with self.assertNumQueries(3):
+            project = report_attribution(sessions)[self.project.id]
+        self.assertEqual(project["total_numerator"], 190 * 1000000 * BASIS_POINTS)
+        self.assertEqual(project["residual_numerator"], 105 * 1000000 * BASIS_POINTS)
+        self.assertEqual(
+            project["children"][self.sub_a.id]["total_numerator"],
+            85 * 1000000 * BASIS_POINTS,
+        )
+
     def test_hierarchy_children_receive_link_credit_without_residual(self):
         session = self._session(0, 40)
         self._link(session, self.sub_a, 2500)
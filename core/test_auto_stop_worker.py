@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+from rest_framework.test import APIClient
+
+from core import changelog, generation
+from core.models import Projects, Sessions, SubProjects
+from core.services import SessionMutationService
+from core.totals import derived_project_totals
+from core.utils import next_auto_stop_at, stop_expired_timers
+
+
+UTC = dt_timezone.utc
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=UTC)
+
+
+@freeze_time(NOW)
+class AutoStopSweepTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="sweep-user", email="sweep-user@example.com"
+        )
+        self.project = Projects.objects.create(user=self.user, name="Deep work")
+        self.subproject = SubProjects.objects.create(
+            user=self.user, parent_project=self.project, name="Draft"
+        )
+
+    def start(self, user=None, project=None, minutes_ago=60, stop_after=30, **fields):
+        start_time = NOW - timedelta(minutes=minutes_ago)
+        return SessionMutationService.create_session(
+            user=user or self.user,
+            project=project or self.project,
+            start_time=start_time,
+            auto_stop_at=start_time + timedelta(minutes=stop_after),
+            is_active=True,
+            **fields,
+        )
+
+    def test_due_timers_stop_at_their_deadline_in_one_batch(self):
+        other = User.objects.create_user(
+            username="sweep-other", email="sweep-other@example.com"
+        )
+        other_project = Projects.objects.create(user=other, name="Errands")
+        first = self.start(subprojects=[self.subproject])
+        second = self.start(minutes_ago=50)
+        third = self.start(user=other, project=other_project)
+        pending = self.start(stop_after=90)
+        head = changelog.head(self.user)
+        before = generation.current(self.user.pk)
+
+        stopped = stop_expired_timers()
+
+        self.assertEqual(
+            sorted(session.pk for session in stopped),
+            sorted([first.pk, second.pk, third.pk]),
+        )
+        for session in (first, second, third):
+            session.refresh_from_db()
+            self.assertEqual(session.end_time, session.start_time + timedelta(minutes=30))
+            self.assertIsNone(session.auto_stop_at)
+            self.assertEqual(session.version, 2)
+        pending.refresh_from_db()
+        self.assertIsNone(pending.end_time)
+        self.assertEqual(
+            derived_project_totals(self.user, [self.project.pk])[self.project.pk], 60.0
+        )
+        self.assertGreater(generation.current(self.user.pk), before)
+        ids, _, _ = changelog.changes_since(self.user, head, 100)
+        self.assertEqual(ids["session"], {first.pk, second.pk})
+        self.assertEqual(ids["subproject"], {self.subproject.pk})
+        self.assertEqual(next_auto_stop_at(), pending.auto_stop_at)
+
+    def test_batches_are_limited_and_ordered_by_deadline(self):
+        later = self.start(minutes_ago=40)
+        earlier = self.start(minutes_ago=50)
+        self.assertEqual(
+            [session.pk for session in stop_expired_timers(limit=1)], [earlier.pk]
+        )
+        self.assertEqual([session.pk for session in stop_expired_timers()], [later.pk])
+        self.assertIsNone(next_auto_stop_at())
+
+    def test_sweep_update_is_one_statement_for_the_batch(self):
+        for minutes_ago in (40, 45, 50):
+            self.start(minutes_ago=minutes_ago)
+        with CaptureQueriesContext(connection) as queries:
+            stop_expired_timers()
+        updates = [
+            query
+            for query in queries
+            if query["sql"].startswith('UPDATE "core_sessions"')
+        ]
+        self.assertEqual(len(updates), 1)
+
+    @override_settings(TIMERS_BACKGROUND_AUTO_STOP=True)
+    def test_background_mode_leaves_request_paths_to_the_worker(self):
+        timer = self.start()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get("/api/v2/timers/").json()["count"], 1)
+        self.assertEqual(stop_expired_timers(self.user), [])
+
+        out = StringIO()
+        call_command("auto_stop_worker", "--once", stdout=out)
+        self.assertIn("Stopped 1 timer(s)", out.getvalue())
+        timer.refresh_from_db()
+        self.assertIsNotNone(timer.end_time)
+        self.assertEqual(client.get("/api/v2/timers/").json()["count"], 0)
+        self.assertTrue(Sessions.objects.filter(pk=timer.pk, auto_stop_at=None).exists())
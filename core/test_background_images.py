@@ -0,0 +1,65 @@
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.templatetags import background_images
+
+
+BING_PAYLOAD = {
+    "images": [
+        {
+            "url": "/th?id=OHR.Autumn.jpg",
+            "title": "Falling leaves",
+            "desc": "A forest in October",
+            "copyright": "Someone",
+        }
+    ]
+}
+
+
+def bing_response():
+    return Mock(json=Mock(return_value=BING_PAYLOAD), raise_for_status=Mock())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class BackgroundImageCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fetch_is_shared_through_the_cache(self):
+        with patch.object(
+            background_images.requests, "get", return_value=bing_response()
+        ) as get:
+            url = background_images.bing_background()
+            self.assertEqual(url, "https://www.bing.com/th?id=OHR.Autumn.jpg")
+            self.assertEqual(background_images.bing_background_title(), "Falling leaves")
+            self.assertEqual(
+                background_images.bing_background_description(),
+                "A forest in October (© Someone)",
+            )
+        get.assert_called_once()
+        self.assertEqual(cache.get(background_images.BING_CACHE_KEY)["url"], url)
+
+    def test_failed_refresh_serves_the_last_image_and_backs_off(self):
+        with patch.object(
+            background_images.requests, "get", return_value=bing_response()
+        ):
+            url = background_images.bing_background()
+        cache.delete(background_images.BING_CACHE_KEY)
+
+        with patch.object(
+            background_images.requests, "get", side_effect=OSError("offline")
+        ) as get:
+            self.assertEqual(background_images.bing_background(), url)
+            self.assertEqual(background_images.bing_background(), url)
+        get.assert_called_once()
+
+    def test_failed_first_fetch_renders_nothing(self):
+        with patch.object(
+            background_images.requests, "get", side_effect=OSError("offline")
+        ):
+            self.assertEqual(background_images.nasa_apod_background(), "")
+            self.assertEqual(background_images.nasa_apod_title(), "")
@@ -317,6 +317,37 @@ class ChartApiRegressionTests(TestCase):
             },
         )
 
+    def test_batch_payloads_match_single_chart_requests(self):
+        # Every type the charts page picker offers; it loads them in one batch.
+        chart_types = [
+            "scatter", "line", "calendar", "heatmap", "histogram", "wordcloud",
+            "stacked_area", "cumulative", "pie", "bar", "context", "status",
+            "bubble", "treemap", "radar",
+        ]
+        for params in ({}, {"project_name": "Alpha"}, {"tags": [self.shared.id]}):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    "/api/v2/reports/charts/batch/",
+                    {"chart_types": ",".join(chart_types), **params},
+                )
+                self.assertEqual(response.status_code, 200)
+                charts = response.json()["charts"]
+                self.assertEqual(list(charts), chart_types)
+                for chart_type in chart_types:
+                    self.assertEqual(
+                        charts[chart_type],
+                        self._get_chart(chart_type, **params).json(),
+                    )
+
+    def test_batch_rejects_missing_and_unknown_chart_types(self):
+        for chart_types in ("", "pie,not-a-chart"):
+            with self.subTest(chart_types=chart_types):
+                response = self.client.get(
+                    "/api/v2/reports/charts/batch/", {"chart_types": chart_types}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("chart_types", response.json()["error"]["details"])
+
     def test_empty_histogram_preserves_empty_chart_state(self):
         Sessions.objects.filter(user=self.user).delete()
         self.assertEqual(self._get_chart("histogram").json(), [])
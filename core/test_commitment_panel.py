@@ -0,0 +1,168 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.commitments import (
+    build_commitment_panel_items,
+    calculate_commitment_streak,
+    commitment_actuals,
+    get_commitment_progress,
+    get_commitment_sessions_queryset,
+)
+from core.models import Commitment, Context, Projects, Sessions, SubProjects, Tag
+from core.utils import get_period_bounds
+
+
+class CommitmentPanelBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="panel", password="pw")
+        self.client.force_login(self.user)
+        self.work = Context.objects.create(user=self.user, name="Work")
+        self.focus = Tag.objects.create(user=self.user, name="Focus")
+        self.alpha = Projects.objects.create(user=self.user, name="Alpha", context=self.work)
+        self.alpha.tags.add(self.focus)
+        self.beta = Projects.objects.create(user=self.user, name="Beta", context=self.work)
+        self.home = Context.objects.create(user=self.user, name="Home")
+        self.gamma = Projects.objects.create(user=self.user, name="Gamma", context=self.home)
+        self.gamma.tags.add(self.focus)
+        self.design = SubProjects.objects.create(
+            user=self.user, name="design", parent_project=self.alpha
+        )
+        self.build = SubProjects.objects.create(
+            user=self.user, name="build", parent_project=self.alpha
+        )
+
+        today, _ = get_period_bounds("daily", timezone.now())
+        for offset, project, subprojects, minutes in [
+            (-30, self.alpha, [self.design], 45),
+            (-2, self.alpha, [self.design, self.build], 30),
+            (-1, self.beta, [], 20),
+            (-1, self.gamma, [], 50),
+            (0, self.alpha, [self.build], 15),
+            (0, self.beta, [], 25),
+            (0, self.gamma, [], 10),
+        ]:
+            start = today + timedelta(days=offset, hours=1)
+            if start + timedelta(minutes=minutes) > timezone.now():
+                start = timezone.now() - timedelta(minutes=minutes + 1)
+            session = Sessions.objects.create(
+                user=self.user,
+                project=project,
+                start_time=start,
+                end_time=start + timedelta(minutes=minutes),
+            )
+            session.subprojects.add(*subprojects)
+
+    def commitment(self, aggregation_type, target_object, **fields):
+        commitment = Commitment.objects.create(
+            user=self.user,
+            aggregation_type=aggregation_type,
+            **{aggregation_type: target_object},
+            commitment_type=fields.pop("commitment_type", "time"),
+            period=fields.pop("period", "daily"),
+            target=30,
+            start_date=timezone.localdate() - timedelta(days=40),
+        )
+        for field, values in fields.items():
+            getattr(commitment, field).add(*values)
+        return commitment
+
+    def prefetched(self):
+        return Commitment.objects.filter(user=self.user).prefetch_related(
+            "include_projects",
+            "exclude_projects",
+            "include_subprojects",
+            "exclude_subprojects",
+            "include_contexts",
+            "exclude_contexts",
+            "include_tags",
+            "exclude_tags",
+        ).order_by("pk")
+
+    def all_shapes(self):
+        self.commitment("project", self.alpha, exclude_subprojects=[self.build])
+        self.commitment("subproject", self.build, commitment_type="sessions")
+        self.commitment("context", self.work, include_tags=[self.focus])
+        self.commitment("tag", self.focus, exclude_projects=[self.gamma], period="weekly")
+        self.commitment(
+            "context",
+            self.home,
+            include_projects=[self.gamma],
+            commitment_type="sessions",
+        )
+
+    def test_batched_actuals_match_the_queryset_per_commitment(self):
+        self.all_shapes()
+        commitments = list(self.prefetched())
+        actuals = commitment_actuals(commitments)
+        for commitment in commitments:
+            with self.subTest(aggregation_type=commitment.aggregation_type):
+                period_start, period_end = get_period_bounds(commitment.period)
+                sessions = get_commitment_sessions_queryset(
+                    commitment, period_start, period_end
+                )
+                if commitment.commitment_type == "time":
+                    expected = sum(
+                        (session.end_time - session.start_time).total_seconds() / 60
+                        for session in sessions
+                    )
+                else:
+                    expected = sessions.count()
+                self.assertAlmostEqual(actuals[commitment.pk], expected)
+
+    def test_actuals_read_only_the_owners_sessions(self):
+        self.all_shapes()
+        commitments = list(self.prefetched())
+        expected = commitment_actuals(commitments)
+
+        other = User.objects.create_user(
+            username="panel-other", email="panel-other@example.com", password="pw"
+        )
+        other_project = Projects.objects.create(user=other, name="Alpha")
+        now = timezone.now()
+        Sessions.objects.bulk_create(
+            Sessions(
+                user=other,
+                project=other_project,
+                start_time=now - timedelta(minutes=minutes + 5),
+                end_time=now - timedelta(minutes=5),
+            )
+            for minutes in range(1, 51)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(commitment_actuals(commitments), expected)
+        self.assertEqual(len(queries), 1)
+        # Each commitment's scope names its user inside the aggregate; the
+        # outer WHERE must too, so the (user, end_time) index bounds the scan.
+        table = connection.ops.quote_name(Sessions._meta.db_table)
+        outer_where = queries[0]["sql"].rpartition(f"FROM {table}")[2]
+        self.assertIn(f"{table}.{connection.ops.quote_name('user_id')}", outer_where)
+
+    def test_panel_items_match_single_commitment_helpers(self):
+        self.all_shapes()
+        items = build_commitment_panel_items(self.prefetched(), include_streak=True)
+        for item in items:
+            commitment = Commitment.objects.get(pk=item["commitment"].pk)
+            self.assertEqual(item["progress"], get_commitment_progress(commitment))
+            self.assertEqual(item["streak"], calculate_commitment_streak(commitment))
+
+    def test_dashboard_query_count_does_not_grow_with_commitments(self):
+        self.commitment("project", self.alpha)
+        self.client.get(reverse("home"))
+        with CaptureQueriesContext(connection) as one:
+            self.assertEqual(self.client.get(reverse("home")).status_code, 200)
+
+        self.commitment("project", self.beta, commitment_type="sessions")
+        self.commitment("context", self.work, include_tags=[self.focus])
+        self.commitment("subproject", self.design, period="weekly")
+        self.client.get(reverse("home"))
+        with CaptureQueriesContext(connection) as four:
+            self.assertEqual(self.client.get(reverse("home")).status_code, 200)
+
+        self.assertEqual(len(four), len(one))
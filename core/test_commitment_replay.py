@@ -1,5 +1,6 @@
 from datetime import date, datetime, timedelta, timezone as dt_timezone
 from importlib import import_module
+from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
 from django.apps import apps
@@ -10,6 +11,8 @@ from freezegun import freeze_time
 from rest_framework.test import APIClient
 
 from core.commitments import (
+    _revision_accruals,
+    mark_commitments_dirty,
     mutation_affects_ledger,
     reconcile_commitment,
     recompute_commitment,
@@ -20,9 +23,16 @@ from core.models import (
     CommitmentAdjustment,
     CommitmentPeriod,
     CommitmentRevision,
+    Context,
     Projects,
+    SubProjects,
+    Tag,
+)
+from core.services import (
+    CommitmentEditService,
+    DestructiveMutationService,
+    SessionMutationService,
 )
-from core.services import SessionMutationService
 
 
 UTC = dt_timezone.utc
@@ -106,6 +116,89 @@ class CommitmentReplayTests(TestCase):
         row = commitment.period_rows.get()
         self.assertEqual((row.carryover_in, row.balance_out), (200, 100))
 
+    @freeze_time("2026-01-06 12:00:00+00:00")
+    def test_session_edit_replays_only_periods_from_its_watermark(self):
+        commitment = self.commitment(start_date=date(2026, 1, 1), target=60)
+        sessions = [
+            self.session(
+                datetime(2026, 1, day, 9, tzinfo=UTC),
+                datetime(2026, 1, day, 9 + day % 3, tzinfo=UTC),
+            )
+            for day in range(1, 6)
+        ]
+        reconcile_commitment(commitment)
+
+        SessionMutationService.mutate_session(
+            sessions[3].pk,
+            user=self.user,
+            end_time=datetime(2026, 1, 4, 12, tzinfo=UTC),
+        )
+        commitment.refresh_from_db()
+        self.assertTrue(commitment.needs_recompute)
+        self.assertEqual(commitment.dirty_from, datetime(2026, 1, 4, 9, tzinfo=UTC))
+
+        def ledger():
+            return list(
+                commitment.period_rows.order_by("period_start").values_list(
+                    "period_start", "accrued_numerator", "carryover_in", "balance_out"
+                )
+            )
+
+        with patch(
+            "core.commitments._revision_accruals", wraps=_revision_accruals
+        ) as incremental_accruals:
+            recompute_commitment(commitment)
+        incremental = ledger()
+        commitment.refresh_from_db()
+        self.assertEqual(
+            (commitment.needs_recompute, commitment.dirty_from), (False, None)
+        )
+
+        Commitment.objects.filter(pk=commitment.pk).update(
+            needs_recompute=True, dirty_from=None
+        )
+        with patch(
+            "core.commitments._revision_accruals", wraps=_revision_accruals
+        ) as full_accruals:
+            recompute_commitment(commitment)
+        self.assertEqual(ledger(), incremental)
+
+        def accrued_periods(accruals):
+            (_, ranges), _ = accruals.call_args
+            return [start for start, _ in ranges]
+
+        # Days 1-3 closed before the 4 Jan 09:00 watermark and are not re-read;
+        # every replayed period of a revision is accrued by a single scan.
+        self.assertEqual(incremental_accruals.call_count, 1)
+        self.assertEqual(
+            accrued_periods(incremental_accruals),
+            [row[0] for row in incremental[3:]],
+        )
+        self.assertEqual(incremental[3][0], datetime(2026, 1, 4, tzinfo=PRAGUE))
+        self.assertEqual(
+            [row[1] for row in incremental],
+            [60 * 10000, 120 * 10000, 0, 180 * 10000, 120 * 10000],
+        )
+        self.assertEqual(full_accruals.call_count, 1)
+        self.assertEqual(len(accrued_periods(full_accruals)), len(incremental))
+
+    def test_unscoped_dirtying_clears_an_earlier_watermark(self):
+        commitment = self.commitment(
+            needs_recompute=True,
+            dirty_from=datetime(2026, 1, 4, tzinfo=UTC),
+        )
+        mark_commitments_dirty(self.user.pk, datetime(2026, 1, 2, tzinfo=UTC))
+        commitment.refresh_from_db()
+        self.assertEqual(commitment.dirty_from, datetime(2026, 1, 2, tzinfo=UTC))
+
+        mark_commitments_dirty(self.user.pk, datetime(2026, 1, 3, tzinfo=UTC))
+        commitment.refresh_from_db()
+        self.assertEqual(commitment.dirty_from, datetime(2026, 1, 2, tzinfo=UTC))
+
+        mark_commitments_dirty(self.user.pk)
+        commitment.refresh_from_db()
+        self.assertEqual((commitment.needs_recompute, commitment.dirty_from), (True, None))
+
     @freeze_time("2026-01-01 08:00:00+00:00")
     def test_manual_adjustment_is_unclamped_until_close(self):
         commitment = self.commitment(start_date=date(2026, 1, 1), max_balance=600)
@@ -313,3 +406,119 @@ class CommitmentReplayTests(TestCase):
         self.assertEqual(rows[0].accrued_numerator, 600_000)
         self.assertTrue(all(row.balance_out == 42 for row in rows))
         self.assertEqual(commitment.balance, 42)
+
+
+class CommitmentScopeInvalidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="scope-user")
+        self.job = Context.objects.create(user=self.user, name="Job")
+        self.deep = Tag.objects.create(user=self.user, name="deep")
+        self.work = Projects.objects.create(user=self.user, name="Work", context=self.job)
+        self.work.tags.add(self.deep)
+        self.personal = Projects.objects.create(user=self.user, name="Personal")
+        self.meetings = SubProjects.objects.create(
+            user=self.user, name="meetings", parent_project=self.work
+        )
+        create = CommitmentEditService.create
+        self.by_project = create(
+            self.user,
+            {
+                "aggregation_type": "project",
+                "project": self.work,
+                "target": 60,
+                "exclude_subprojects": [self.meetings],
+            },
+        )
+        self.by_context = create(
+            self.user, {"aggregation_type": "context", "context": self.job, "target": 60}
+        )
+        self.by_tag = create(
+            self.user, {"aggregation_type": "tag", "tag": self.deep, "target": 60}
+        )
+        self.by_subproject = create(
+            self.user,
+            {"aggregation_type": "subproject", "subproject": self.meetings, "target": 60},
+        )
+        Commitment.objects.filter(user=self.user).update(needs_recompute=False)
+
+    def dirty(self):
+        return set(
+            Commitment.objects.filter(user=self.user, needs_recompute=True).values_list(
+                "pk", flat=True
+            )
+        )
+
+    def session(self, project, subprojects=()):
+        start = timezone.now() - timedelta(hours=2)
+        return SessionMutationService.create_session(
+            user=self.user,
+            project=project,
+            subprojects=subprojects,
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+        )
+
+    def test_unrelated_project_session_dirties_nothing(self):
+        session = self.session(self.personal)
+        self.assertEqual(self.dirty(), set())
+
+        SessionMutationService.mutate_session(
+            session.pk, user=self.user, note="still personal"
+        )
+        self.assertEqual(self.dirty(), set())
+
+    def test_exclusions_and_subprojects_narrow_the_flag(self):
+        self.session(self.work, [self.meetings])
+        self.assertEqual(
+            self.dirty(),
+            {self.by_context.pk, self.by_tag.pk, self.by_subproject.pk},
+        )
+
+        Commitment.objects.filter(user=self.user).update(needs_recompute=False)
+        self.session(self.work)
+        self.assertEqual(
+            self.dirty(), {self.by_project.pk, self.by_context.pk, self.by_tag.pk}
+        )
+
+    def test_moving_a_session_dirties_both_scopes(self):
+        session = self.session(self.personal)
+        SessionMutationService.mutate_session(
+            session.pk, user=self.user, project=self.work, subprojects=[self.meetings]
+        )
+        self.assertEqual(
+            self.dirty(),
+            {self.by_context.pk, self.by_tag.pk, self.by_subproject.pk},
+        )
+
+        Commitment.objects.filter(user=self.user).update(needs_recompute=False)
+        SessionMutationService.delete_session(session.pk, user=self.user)
+        self.assertEqual(
+            self.dirty(),
+            {self.by_context.pk, self.by_tag.pk, self.by_subproject.pk},
+        )
+
+    def test_destructive_paths_dirty_only_affected_projects(self):
+        DestructiveMutationService.rename_project(
+            user=self.user, project_name="Personal", new_name="Home"
+        )
+        self.assertEqual(self.dirty(), set())
+
+        spare = Tag.objects.create(user=self.user, name="spare")
+        self.personal.tags.add(spare)
+        Commitment.objects.filter(user=self.user).update(needs_recompute=False)
+        DestructiveMutationService.delete_tag(user=self.user, tag_name="spare")
+        self.assertEqual(self.dirty(), set())
+
+        other = Tag.objects.create(user=self.user, name="other")
+        self.work.tags.add(other)
+        Commitment.objects.filter(user=self.user).update(needs_recompute=False)
+        DestructiveMutationService.delete_tag(user=self.user, tag_name="other")
+        self.assertEqual(
+            self.dirty(),
+            {
+                self.by_project.pk,
+                self.by_context.pk,
+                self.by_tag.pk,
+                self.by_subproject.pk,
+            },
+        )
@@ -0,0 +1,121 @@
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
+from rest_framework.test import APIClient
+
+from core.commitments import (
+    build_commitment_panel_items,
+    due_commitments,
+    reconcile_commitment,
+    reconcile_due_commitments,
+)
+from core.models import Commitment, Projects
+from core.services import SessionMutationService
+
+
+UTC = dt_timezone.utc
+
+
+@freeze_time("2026-01-05 12:00:00+00:00")
+class CommitmentWorkerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="worker-user")
+        self.project = Projects.objects.create(user=self.user, name="Queued")
+        self.commitment = Commitment.objects.create(
+            user=self.user,
+            project=self.project,
+            aggregation_type="project",
+            commitment_type="sessions",
+            period="daily",
+            start_date=date(2026, 1, 1),
+            target=1,
+            max_balance=10,
+            min_balance=-10,
+        )
+        reconcile_commitment(self.commitment)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_session(self, day):
+        SessionMutationService.create_session(
+            user=self.user,
+            project=self.project,
+            start_time=datetime(2026, 1, day, 9, tzinfo=UTC),
+            end_time=datetime(2026, 1, day, 10, tzinfo=UTC),
+            is_active=False,
+        )
+
+    def commitment_payload(self):
+        response = self.client.get(f"/api/v2/commitments/{self.commitment.pk}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_reconciled_commitment_is_not_queued(self):
+        self.commitment.refresh_from_db()
+        self.assertEqual(
+            self.commitment.next_reconcile_at, datetime(2026, 1, 5, 23, tzinfo=UTC)
+        )
+        self.assertFalse(due_commitments().exists())
+        payload = self.commitment_payload()
+        self.assertFalse(payload["stale"])
+        self.assertEqual(payload["last_reconciled"], "2026-01-05T12:00:00+00:00")
+
+    @override_settings(COMMITMENTS_BACKGROUND_RECONCILE=True)
+    def test_reads_serve_last_state_until_the_worker_replays(self):
+        self.add_session(2)
+        self.assertEqual(list(due_commitments()), [self.commitment])
+
+        payload = self.commitment_payload()
+        self.assertTrue(payload["stale"])
+        self.assertEqual(payload["balance"], -4)
+        self.commitment.refresh_from_db()
+        self.assertTrue(self.commitment.needs_recompute)
+        [item] = build_commitment_panel_items(
+            Commitment.objects.filter(pk=self.commitment.pk)
+        )
+        self.assertTrue(item["stale"])
+
+        out = StringIO()
+        call_command("commitments_worker", "--once", stdout=out)
+        self.assertIn("Reconciled 1 commitment(s)", out.getvalue())
+
+        payload = self.commitment_payload()
+        self.assertFalse(payload["stale"])
+        self.assertEqual(payload["balance"], -3)
+        self.assertFalse(due_commitments().exists())
+
+    @override_settings(COMMITMENTS_BACKGROUND_RECONCILE=True)
+    def test_period_close_queues_the_commitment(self):
+        with freeze_time("2026-01-05 23:00:00+00:00"):
+            self.assertEqual(list(due_commitments()), [self.commitment])
+            self.assertTrue(self.commitment_payload()["stale"])
+            self.assertEqual(reconcile_due_commitments(), 1)
+            payload = self.commitment_payload()
+        self.assertFalse(payload["stale"])
+        self.assertEqual(payload["balance"], -5)
+
+    def test_failed_replay_is_logged_and_stays_queued(self):
+        other = Commitment.objects.create(
+            user=self.user,
+            project=Projects.objects.create(user=self.user, name="Other"),
+            aggregation_type="project",
+            commitment_type="sessions",
+            period="daily",
+            start_date=date(2026, 1, 1),
+            target=1,
+        )
+        self.add_session(2)
+        with patch(
+            "core.commitments.recompute_commitment",
+            side_effect=[RuntimeError("boom"), True],
+        ), self.assertLogs("main", level="ERROR"):
+            self.assertEqual(reconcile_due_commitments(), 2)
+        self.assertEqual(
+            sorted(due_commitments().values_list("pk", flat=True)),
+            sorted([self.commitment.pk, other.pk]),
+        )
@@ -6,12 +6,15 @@ from pathlib import Path
 from unittest.mock import patch
 
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.management import call_command
 from rest_framework.test import APIClient
 
 from core.export2 import build_format2_export
+from core.importer2 import import_format2
 from core.models import (
     Context,
     Projects,
@@ -25,6 +28,10 @@ from core.totals import derived_project_totals, derived_subproject_totals
 from core.utils import json_decompress
 
 
+def streamed_json(response):
+    return json.loads(b"".join(response.streaming_content))
+
+
 class Format2ExportImportTests(TestCase):
     def setUp(self):
         self.source = User.objects.create_user(
@@ -218,6 +225,35 @@ class Format2ExportImportTests(TestCase):
         self.assertEqual(session.note, "Changed note")
         self.assertEqual(session.version, old_version + 1)
 
+    def test_import_query_count_does_not_grow_with_the_session_count(self):
+        for hour in range(13, 19):
+            SessionMutationService.create_session(
+                user=self.source,
+                project=self.project,
+                allocations=[(self.planning, 10000)],
+                start_time=self.at(2024, 1, 3, hour),
+                end_time=self.at(2024, 1, 3, hour + 1),
+                is_active=False,
+            )
+        document = self.export_document()
+        small = copy.deepcopy(document)
+        del small["projects"][0]["sessions"][2:]
+
+        def count_queries(username, document):
+            user = User.objects.create_user(
+                username=username, email=f"{username}@example.com"
+            )
+            with CaptureQueriesContext(connection) as queries:
+                summary = import_format2(user, document)
+            self.assertEqual(
+                summary["sessions_imported"], len(document["projects"][0]["sessions"])
+            )
+            return len(queries)
+
+        self.assertEqual(
+            count_queries("format2-small", small), count_queries("format2-large", document)
+        )
+
     def test_duplicate_uuid_in_batch_is_rejected(self):
         duplicate = copy.deepcopy(self.document)
         duplicate["projects"][0]["sessions"][1]["uuid"] = duplicate["projects"][0]["sessions"][0]["uuid"]
@@ -343,12 +379,12 @@ class Format2ExportImportTests(TestCase):
 
         v2_response = self.client.get(reverse("api_v2:export"))
         self.assertEqual(v2_response.status_code, 200)
-        self.assertEqual(v2_response.json(), self.document)
+        self.assertEqual(streamed_json(v2_response), self.document)
         compressed = self.client.get(reverse("api_v2:export"), {"compress": "true"})
-        self.assertEqual(json_decompress(compressed.json()), self.document)
+        self.assertEqual(json_decompress(streamed_json(compressed)), self.document)
 
         web_default = self.client.post(reverse("export"), {})
-        self.assertEqual(web_default.json()["format"], 2)
+        self.assertEqual(streamed_json(web_default)["format"], 2)
         web_legacy = self.client.post(reverse("export"), {"legacy_format": "on"})
         self.assertNotIn("format", web_legacy.json())
 
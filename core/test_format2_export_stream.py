@@ -0,0 +1,132 @@
+import gzip
+import json
+from datetime import datetime, timezone as datetime_timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.export2 import (
+    build_format2_export,
+    iter_format2_compressed,
+    iter_format2_json,
+)
+from core.models import Context, Projects, Sessions, SubProjects, Tag
+from core.services import SessionMutationService
+from core.utils import json_compress
+
+
+UTC = datetime_timezone.utc
+
+
+class StreamingFormat2ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="export-stream", email="export-stream@example.com"
+        )
+        context = Context.objects.create(user=self.user, name="Café")
+        tag = Tag.objects.create(user=self.user, name="zeta")
+        # Names are ordered by code point, as build_format2_export sorts them,
+        # whatever the database collation would say.
+        projects = [
+            Projects.objects.create(user=self.user, name=name, status=status, context=context)
+            for name, status in (
+                ("Beta", "active"),
+                ("Älpha", "archived"),
+                ("beta line", "paused"),
+            )
+        ]
+        projects[0].tags.add(tag)
+        for index, project in enumerate(projects):
+            planning = SubProjects.objects.create(
+                user=self.user, parent_project=project, name="planning"
+            )
+            review = SubProjects.objects.create(
+                user=self.user, parent_project=project, name="Review"
+            )
+            for hour in (11, 9, 9):
+                SessionMutationService.create_session(
+                    user=self.user,
+                    project=project,
+                    subprojects=[review, planning],
+                    start_time=datetime(2024, 1, 2 + index, hour, tzinfo=UTC),
+                    end_time=datetime(2024, 1, 2 + index, hour, 45, tzinfo=UTC),
+                    is_active=False,
+                    note=f"Note {index}/{hour} — ✓",
+                )
+        self.sessions = Sessions.objects.filter(user=self.user, end_time__isnull=False)
+        self.document = build_format2_export(self.sessions)
+
+    def test_streamed_text_matches_the_in_memory_document(self):
+        self.assertEqual(
+            [project["name"] for project in self.document["projects"]],
+            ["Beta", "beta line", "Älpha"],
+        )
+        for dumps_kwargs in (
+            {},
+            {"indent": 4},
+            {"indent": "\t", "ensure_ascii": False},
+            {"separators": (",", ":"), "ensure_ascii": False},
+        ):
+            for chunk_size in (1, 2000):
+                with self.subTest(dumps_kwargs=dumps_kwargs, chunk_size=chunk_size):
+                    streamed = "".join(
+                        iter_format2_json(
+                            self.sessions, chunk_size=chunk_size, **dumps_kwargs
+                        )
+                    )
+                    self.assertEqual(streamed, json.dumps(self.document, **dumps_kwargs))
+
+    def test_empty_export_and_compressed_envelope(self):
+        empty = self.sessions.none()
+        self.assertEqual(
+            "".join(iter_format2_json(empty, indent=4)),
+            json.dumps(build_format2_export(empty), indent=4),
+        )
+        self.assertEqual(
+            "".join(iter_format2_compressed(self.sessions, chunk_size=1)),
+            json.dumps(json_compress(self.document)),
+        )
+
+    def test_api_stream_matches_the_json_renderer(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for params in ({}, {"compress": "true"}):
+            document = json_compress(self.document) if params else self.document
+            with self.subTest(params=params):
+                response = client.get(reverse("api_v2:export"), params)
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertEqual(
+                    b"".join(response.streaming_content),
+                    JSONRenderer().render(document),
+                )
+
+        response = client.get(
+            reverse("api_v2:export"), HTTP_ACCEPT="application/json; indent=2"
+        )
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            JSONRenderer().render(self.document, "application/json; indent=2"),
+        )
+
+    def test_web_export_is_gzipped_when_accepted(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("export"), {}, HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertIn("attachment;", response["Content-Disposition"])
+        self.assertEqual(
+            gzip.decompress(b"".join(response.streaming_content)).decode(),
+            json.dumps(self.document, indent=4),
+        )
+
+        plain = self.client.post(reverse("export"), {})
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertEqual(
+            b"".join(plain.streaming_content).decode(),
+            json.dumps(self.document, indent=4),
+        )
@@ -0,0 +1,106 @@
+import copy
+from uuid import UUID
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from core.importer2 import (
+    Format2ConflictError,
+    Format2ValidationError,
+    import_format2,
+)
+from core.models import Projects, Sessions
+
+
+SERIAL = override_settings(IMPORT_VALIDATION_PARALLEL_SESSIONS=0)
+PARALLEL = override_settings(
+    IMPORT_VALIDATION_PARALLEL_SESSIONS=3, IMPORT_VALIDATION_WORKERS=2
+)
+
+
+def session(uuid_number, hour, links=(("planning", 10000),)):
+    return {
+        "uuid": str(UUID(int=uuid_number)),
+        "start": f"2024-01-02T{hour:02d}:00:00Z",
+        "end": f"2024-01-02T{hour:02d}:30:00Z",
+        "note": None,
+        "allocation_mode": "partitioned",
+        "links": [
+            {"subproject": name, "allocation_bp": allocation_bp}
+            for name, allocation_bp in links
+        ],
+    }
+
+
+def project(name, sessions):
+    return {
+        "name": name,
+        "status": "active",
+        "description": "",
+        "context": None,
+        "tags": [],
+        "start_date": "2024-01-02",
+        "subprojects": [{"name": "planning", "description": ""}],
+        "sessions": sessions,
+    }
+
+
+class ParallelFormat2ValidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="format2-parallel", email="format2-parallel@example.com"
+        )
+        self.document = {
+            "format": 2,
+            "projects": [
+                project(f"Project {index}", [session(index * 10 + hour, hour) for hour in range(2)])
+                for index in range(6)
+            ],
+        }
+
+    def rejection(self, document):
+        with self.assertRaises(Format2ValidationError) as raised:
+            import_format2(self.user, copy.deepcopy(document))
+        return raised.exception.errors
+
+    def test_pool_imports_the_same_rows_as_the_serial_path(self):
+        with PARALLEL:
+            summary = import_format2(self.user, self.document)
+        self.assertEqual(summary["sessions_imported"], 12)
+        self.assertEqual(Projects.objects.filter(user=self.user).count(), 6)
+
+        with PARALLEL:
+            self.assertEqual(import_format2(self.user, self.document)["sessions_skipped"], 12)
+        self.assertEqual(Sessions.objects.filter(user=self.user).count(), 12)
+
+        edited = copy.deepcopy(self.document)
+        edited["projects"][5]["sessions"][1]["note"] = "Edited elsewhere"
+        with PARALLEL, self.assertRaises(Format2ConflictError) as raised:
+            import_format2(self.user, edited)
+        self.assertEqual(raised.exception.conflicts, [str(UUID(int=51))])
+
+    def test_batch_wide_errors_keep_document_order(self):
+        projects = self.document["projects"]
+        projects[2]["name"] = "Project 0"
+        projects[2]["status"] = "unknown"
+        projects[4]["sessions"][1]["uuid"] = projects[1]["sessions"][0]["uuid"]
+        projects[4]["sessions"][1]["links"][0]["allocation_bp"] = 0
+        projects[5] = "not a project"
+
+        with SERIAL:
+            expected = self.rejection(self.document)
+        with PARALLEL:
+            self.assertEqual(self.rejection(self.document), expected)
+        self.assertEqual(
+            expected,
+            [
+                "projects[2].name: duplicate project name 'Project 0'",
+                "projects[2].status: invalid status 'unknown'",
+                "projects[4].sessions[1].uuid: duplicate UUID "
+                f"{UUID(int=10)} in batch",
+                "projects[4].sessions[1].links[0].allocation_bp: must be an "
+                "integer from 1 to 10000",
+                "projects[5]: expected an object",
+            ],
+        )
+        self.assertFalse(Projects.objects.filter(user=self.user).exists())
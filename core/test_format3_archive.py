@@ -0,0 +1,259 @@
+import os
+import tempfile
+from datetime import datetime, timezone as datetime_timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.archive3 import (
+    ARCHIVE_CONTENT_TYPE,
+    MAGIC,
+    Format3Archive,
+    Format3ArchiveError,
+    _block,
+    _packed,
+    _string_columns,
+    iter_format3_archive,
+)
+from core.export2 import build_format2_export
+from core.importer import iter_import_file
+from core.models import Context, Projects, Sessions, SubProjects, Tag
+from core.services import SessionMutationService
+from core.test_import_streaming import consume
+
+
+UTC = datetime_timezone.utc
+
+
+class Format3ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="archive-source", email="archive-source@example.com"
+        )
+        self.target = User.objects.create_user(
+            username="archive-target", email="archive-target@example.com"
+        )
+        context = Context.objects.create(user=self.user, name="Focus")
+        tag = Tag.objects.create(user=self.user, name="client")
+        for index, name in enumerate(("Client Work", "Ünicode ✓")):
+            project = Projects.objects.create(
+                user=self.user,
+                name=name,
+                description="" if index else "Billable",
+                context=None if index else context,
+                start_date=datetime(2024, 1, 2, tzinfo=UTC),
+            )
+            if not index:
+                project.tags.add(tag)
+            planning = SubProjects.objects.create(
+                user=self.user, parent_project=project, name="planning"
+            )
+            review = SubProjects.objects.create(
+                user=self.user, parent_project=project, name="review", description="QA"
+            )
+            for hour, note, subprojects in (
+                (9, "Standup", [planning]),
+                (11, None, [planning, review]),
+                (13, "Standup", []),
+                (15, "", [review]),
+            ):
+                SessionMutationService.create_session(
+                    user=self.user,
+                    project=project,
+                    subprojects=subprojects,
+                    start_time=datetime(2024, 1, 2 + index, hour, tzinfo=UTC),
+                    end_time=datetime(2024, 1, 2 + index, hour, 45, 30, tzinfo=UTC),
+                    is_active=False,
+                    note=note,
+                )
+        self.sessions = Sessions.objects.filter(user=self.user, end_time__isnull=False)
+
+    def write_archive(self, data):
+        handle, path = tempfile.mkstemp(suffix=".autumn")
+        with os.fdopen(handle, "wb") as destination:
+            destination.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def archive_bytes(self, chunk_size=3):
+        return b"".join(iter_format3_archive(self.sessions, chunk_size=chunk_size))
+
+    def test_archive_holds_exactly_the_format2_entries(self):
+        document = build_format2_export(self.sessions)
+        for chunk_size in (1, 3, 2000):
+            with self.subTest(chunk_size=chunk_size):
+                path = self.write_archive(self.archive_bytes(chunk_size))
+                with Format3Archive(path) as archive:
+                    self.assertEqual(archive.verify(), (2, 8))
+                    self.assertEqual(list(archive.projects()), document["projects"])
+
+    def test_damage_is_found_without_decoding(self):
+        data = self.archive_bytes()
+        flipped = bytearray(data)
+        flipped[len(MAGIC) + 40] ^= 0xFF
+        for damaged, message in (
+            (bytes(flipped), "checksum mismatch"),
+            (data[:-12], "truncated"),
+            (data[: data.rindex(b"END\x00")], "missing END block"),
+            (b"{}", "not a format-3 archive"),
+            (b"", "not a format-3 archive"),
+        ):
+            with self.subTest(message=message):
+                with self.assertRaisesMessage(Format3ArchiveError, message):
+                    with Format3Archive(self.write_archive(damaged)) as archive:
+                        archive.verify()
+
+    def crafted_archive(self, *, project_strings=None, start_date=0, sessions=None):
+        """One project holding one session, with any column replaced."""
+        project_strings = project_strings or _string_columns(
+            ["Client Work", "active", "", None]
+        )
+        sessions = {
+            "starts": [1704186000],
+            "ends": [1704189600],
+            "strings": _string_columns(["Standup"]),
+            **(sessions or {}),
+        }
+        blocks = [
+            _block(
+                b"PROJ",
+                [_packed("q", [start_date]), _packed("I", [0, 0]), *project_strings],
+            ),
+            _block(
+                b"SESS",
+                [
+                    bytes(16),
+                    _packed("q", sessions["starts"]),
+                    _packed("q", sessions["ends"]),
+                    _packed("I", [0]),
+                    _packed("I", [0]),
+                    b"",
+                    b"",
+                    *sessions["strings"],
+                ],
+            ),
+            _block(b"END\x00", [_packed("Q", [1, 1])]),
+        ]
+        return self.write_archive(MAGIC + b"".join(blocks))
+
+    def test_strings_that_are_not_utf8_are_found_by_verify(self):
+        offsets, heap, nulls = _string_columns(["Café", "active", "", None])
+        invalid = b"\xff" + heap[1:]
+        split = _packed("I", [0, 4, 11, 11, 11])  # Inside the two bytes of "é".
+        bad_note = self.crafted_archive(
+            sessions={"strings": [_packed("I", [0, 2]), b"\xc3(", b"\x00"]}
+        )
+        for path, message in (
+            (self.crafted_archive(), None),
+            (
+                self.crafted_archive(project_strings=[offsets, invalid, nulls]),
+                "PROJ block: strings are not UTF-8",
+            ),
+            (
+                self.crafted_archive(project_strings=[split, heap, nulls]),
+                "PROJ block: string splits a UTF-8 character",
+            ),
+            (bad_note, "SESS block: strings are not UTF-8"),
+        ):
+            with self.subTest(message=message), Format3Archive(path) as archive:
+                if message is None:
+                    self.assertEqual(archive.verify(), (1, 1))
+                    continue
+                with self.assertRaisesMessage(Format3ArchiveError, message):
+                    archive.verify()
+        with self.assertRaisesMessage(Format3ArchiveError, "not UTF-8"):
+            consume(iter_import_file(self.target, bad_note))
+
+    def test_timestamps_outside_datetime_are_found_by_verify(self):
+        for fields, message in (
+            ({"start_date": -(2**62)}, "PROJ block: start date out of range"),
+            ({"sessions": {"starts": [2**62]}}, "SESS block: timestamp out of range"),
+            ({"sessions": {"ends": [-(2**40)]}}, "SESS block: timestamp out of range"),
+        ):
+            with self.subTest(message=message):
+                path = self.crafted_archive(**fields)
+                with Format3Archive(path) as archive:
+                    with self.assertRaisesMessage(Format3ArchiveError, message):
+                        archive.verify()
+                with self.assertRaisesMessage(Format3ArchiveError, message):
+                    consume(iter_import_file(self.target, path))
+        self.assertFalse(Projects.objects.filter(user=self.target).exists())
+
+    def test_import_restores_the_archive_and_then_skips_it(self):
+        path = self.write_archive(self.archive_bytes())
+
+        messages, summary = consume(iter_import_file(self.target, path))
+        self.assertEqual(messages[0], "Verifying format-3 archive")
+        self.assertEqual(summary["sessions_imported"], 8)
+        self.assertEqual(
+            build_format2_export(Sessions.objects.filter(user=self.target)),
+            build_format2_export(self.sessions),
+        )
+
+        _, summary = consume(iter_import_file(self.target, path))
+        self.assertEqual(summary["sessions_skipped"], 8)
+        self.assertEqual(Sessions.objects.filter(user=self.target).count(), 8)
+
+    def test_damaged_archive_is_rejected_before_writing(self):
+        data = bytearray(self.archive_bytes())
+        data[-20] ^= 0xFF
+        with self.assertRaises(Format3ArchiveError):
+            consume(iter_import_file(self.target, self.write_archive(bytes(data))))
+        self.assertFalse(Projects.objects.filter(user=self.target).exists())
+
+    def test_api_imports_an_uploaded_archive(self):
+        client = APIClient()
+        client.force_authenticate(self.target)
+
+        def post(data, **fields):
+            upload = SimpleUploadedFile("export.autumn", data, ARCHIVE_CONTENT_TYPE)
+            return client.post(
+                reverse("api_v2:import"), {"archive": upload, **fields}, format="multipart"
+            )
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ):
+            response = post(self.archive_bytes())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["sessions_imported"], 8)
+            self.assertEqual(
+                build_format2_export(Sessions.objects.filter(user=self.target)),
+                build_format2_export(self.sessions),
+            )
+            self.assertEqual(post(self.archive_bytes()).json()["sessions_skipped"], 8)
+
+            damaged = bytearray(self.archive_bytes())
+            damaged[-20] ^= 0xFF
+            response = post(bytes(damaged))
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("archive", response.json()["error"]["details"])
+            self.assertEqual(post(b'{"format": 2}').status_code, 400)
+            self.assertEqual(post(self.archive_bytes(), merge="true").status_code, 400)
+            self.assertEqual(os.listdir(os.path.join(media_root, "temp")), [])
+
+    def test_api_and_command_export_archives(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse("api_v2:export"), {"export_format": "3"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], ARCHIVE_CONTENT_TYPE)
+        self.assertIn('filename="export.autumn"', response["Content-Disposition"])
+        self.assertEqual(b"".join(response.streaming_content), self.archive_bytes(2000))
+
+        with tempfile.TemporaryDirectory() as temp_dir, patch(
+            "core.management.commands.export.settings.BASE_DIR", Path(temp_dir)
+        ):
+            call_command(
+                "export", self.user.username, output_file="backup.json", format=3
+            )
+            path = Path(temp_dir) / "Exports" / "backup.autumn"
+            self.assertEqual(path.read_bytes(), self.archive_bytes(2000))
+            call_command("import", self.target.username, str(path))
+        self.assertEqual(Sessions.objects.filter(user=self.target).count(), 8)
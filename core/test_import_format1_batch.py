@@ -0,0 +1,123 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.importer import run_import
+from core.models import Projects, Sessions, SubProjects
+from core.services import SessionMutationService
+
+
+def session_row(start, end, subprojects=("Planning",), date="01-02-2024"):
+    return {
+        "Date": date,
+        "Start Time": start,
+        "End Time": end,
+        "Sub-Projects": list(subprojects),
+        "Note": "",
+    }
+
+
+def project_payload(history):
+    return {
+        "Start Date": "01-02-2024",
+        "Last Updated": "01-02-2024",
+        "Total Time": 0.0,
+        "Status": "active",
+        "Description": "",
+        "Tags": [],
+        "Sub Projects": {
+            "Planning": {
+                "Start Date": "01-02-2024",
+                "Last Updated": "01-02-2024",
+                "Description": "",
+            }
+        },
+        "Session History": history,
+    }
+
+
+class BatchedFormat1ImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="batch-import", email="batch-import@example.com"
+        )
+
+    def test_duplicates_are_probed_against_stored_and_accepted_sessions(self):
+        project = Projects.objects.create(user=self.user, name="Client Work")
+        planning = SubProjects.objects.create(
+            user=self.user, parent_project=project, name="planning"
+        )
+        SessionMutationService.create_session(
+            user=self.user,
+            project=project,
+            subprojects=[planning],
+            start_time=timezone.make_aware(datetime(2024, 1, 2, 9)),
+            end_time=timezone.make_aware(datetime(2024, 1, 2, 10)),
+            is_active=False,
+        )
+        history = [
+            session_row("09:01:30", "10:02:00"),  # within 2 minutes
+            session_row("09:00:00", "10:00:00", subprojects=()),  # other buckets
+            session_row("09:02:01", "10:00:00"),  # just outside
+            session_row("14:00:00", "15:00:00"),
+            session_row("14:01:00", "14:59:00"),  # repeats the previous row
+            session_row("23:30:00", "00:30:00"),  # crosses midnight
+        ]
+
+        summary = run_import(
+            self.user, {"Client Work": project_payload(history)}, merge=True
+        )
+
+        self.assertEqual(summary["sessions_imported"], 4)
+        sessions = Sessions.objects.filter(user=self.user).order_by("start_time")
+        self.assertEqual(
+            [
+                (
+                    timezone.localtime(session.start_time).time().isoformat(),
+                    sorted(session.subprojects.values_list("name", flat=True)),
+                )
+                for session in sessions
+            ],
+            [
+                ("23:30:00", ["planning"]),
+                ("09:00:00", ["planning"]),
+                ("09:00:00", []),
+                ("09:02:01", ["planning"]),
+                ("14:00:00", ["planning"]),
+            ],
+        )
+        self.assertEqual(
+            timezone.localtime(sessions.first().start_time).date().isoformat(),
+            "2024-01-01",
+        )
+
+    def count_queries(self, username, sessions):
+        user = User.objects.create_user(username=username, email=f"{username}@example.com")
+        history = [
+            session_row(f"{hour:02d}:00:00", f"{hour:02d}:30:00", date=f"01-{day:02d}-2024")
+            for day in range(1, sessions // 10 + 1)
+            for hour in range(8, 18)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            summary = run_import(user, {"Client Work": project_payload(history)}, merge=True)
+        self.assertEqual(summary["sessions_imported"], sessions)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_the_session_count(self):
+        self.assertEqual(
+            self.count_queries("batch-small", 10), self.count_queries("batch-large", 60)
+        )
+
+    def test_commitments_are_dirtied_once_per_import(self):
+        payload = {
+            name: project_payload([session_row("09:00:00", "10:00:00")])
+            for name in ("First", "Second")
+        }
+        with patch("core.importer.mark_commitments_dirty") as mark_dirty:
+            run_import(self.user, payload, merge=True)
+        mark_dirty.assert_called_once_with(self.user.pk)
@@ -0,0 +1,177 @@
+import copy
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as datetime_timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from core.export2 import build_format2_export
+from core.importer import iter_import, iter_import_file
+from core.importer2 import Format2ValidationError, import_format2
+from core.json_stream import JsonStream, document_chunks
+from core.models import Projects, Sessions, SubProjects
+from core.services import SessionMutationService
+from core.test_import_command_consolidation import format_one_payload
+from core.utils import json_compress
+
+
+UTC = datetime_timezone.utc
+
+
+def write_document(document):
+    handle, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(handle, "w") as destination:
+        json.dump(document, destination)
+    return path
+
+
+def consume(generator):
+    messages = []
+    while True:
+        try:
+            messages.append(next(generator))
+        except StopIteration as stop:
+            return messages, stop.value
+
+
+class JsonStreamTests(TestCase):
+    document = {
+        'a "}{': {"x": [1, {"y": "]\\"}], "z": None},
+        "rows": [1, "two", {"3": [3]}, []],
+        "skipped": {"deep": [[[]]]},
+        "dé": "x/\né",
+    }
+
+    def test_values_survive_every_chunk_boundary(self):
+        text = json.dumps(self.document, ensure_ascii=False)
+        for size in (1, 2, 5, 64):
+            stream = JsonStream(text[i : i + size] for i in range(0, len(text), size))
+            seen = {}
+            for key in stream.members():
+                if key == "rows":
+                    seen[key] = list(stream.items())
+                elif key != "skipped":
+                    seen[key] = stream.value()
+            stream.end()
+            expected = dict(self.document)
+            del expected["skipped"]
+            self.assertEqual(seen, expected)
+
+    def test_compressed_documents_inflate_in_bounded_chunks(self):
+        document = {"rows": ["x" * 40] * 2000}
+        for stored in (document, json_compress(document)):
+            path = write_document(stored)
+            self.addCleanup(os.remove, path)
+            chunks = list(document_chunks(path, chunk_size=256))
+            self.assertLessEqual(max(map(len, chunks)), 256)
+            self.assertEqual(json.loads("".join(chunks)), document)
+
+    def test_malformed_json_raises_decode_errors(self):
+        for text in ('{"a" 1}', '{"a": 1,}', '{"a": [1}', '{"a": 1} x', ""):
+            stream = JsonStream([text])
+            with self.assertRaises(json.JSONDecodeError):
+                for _ in stream.members():
+                    stream.value()
+                stream.end()
+
+
+class StreamingImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="stream-import", email="stream-import@example.com"
+        )
+        self.reference = User.objects.create_user(
+            username="stream-import-ref", email="stream-import-ref@example.com"
+        )
+
+    def import_file(self, document, **options):
+        path = write_document(document)
+        self.addCleanup(os.remove, path)
+        return consume(iter_import_file(self.user, path, **options))
+
+    def state(self, user):
+        return sorted(
+            (
+                session.project.name,
+                session.start_time,
+                session.end_time,
+                session.note,
+                tuple(sorted(link.subproject.name for link in session.subproject_links.all())),
+            )
+            for session in Sessions.objects.filter(user=user)
+            .select_related("project")
+            .prefetch_related("subproject_links__subproject")
+        )
+
+    def test_format1_file_matches_the_in_memory_import(self):
+        payload = format_one_payload()
+        payload["Side Work"] = copy.deepcopy(payload["Client Work"])
+
+        expected = consume(iter_import(self.reference, copy.deepcopy(payload)))
+        self.assertEqual(self.import_file(json_compress(payload)), expected)
+        self.assertIn("Processing project 2/2: Side Work", expected[0])
+        self.assertEqual(self.state(self.user), self.state(self.reference))
+
+    def test_format2_file_matches_the_in_memory_import(self):
+        project = Projects.objects.create(
+            user=self.reference,
+            name="Client Work",
+            start_date=datetime(2024, 1, 2, tzinfo=UTC),
+        )
+        planning = SubProjects.objects.create(
+            user=self.reference,
+            parent_project=project,
+            name="planning",
+            start_date=project.start_date,
+        )
+        for hour in (9, 11):
+            SessionMutationService.create_session(
+                user=self.reference,
+                project=project,
+                subprojects=[planning],
+                start_time=datetime(2024, 1, 2, hour, tzinfo=UTC),
+                end_time=datetime(2024, 1, 2, hour, 45, tzinfo=UTC),
+                is_active=False,
+            )
+        document = build_format2_export(Sessions.objects.filter(user=self.reference))
+
+        messages, summary = self.import_file(document)
+        self.assertEqual(
+            messages, ["Validating format-2 import batch", "Import completed successfully!"]
+        )
+        self.assertEqual(summary["sessions_imported"], 2)
+        self.assertEqual(self.state(self.user), self.state(self.reference))
+
+        # A second run skips every session, exactly like the in-memory path.
+        self.assertEqual(
+            self.import_file(document)[1], import_format2(self.user, document)
+        )
+
+    def test_format2_errors_anywhere_reject_the_batch_before_writing(self):
+        document = {
+            "format": 2,
+            "projects": [
+                {
+                    "name": name,
+                    "status": "active",
+                    "description": "",
+                    "context": None,
+                    "tags": [],
+                    "start_date": "2024-01-02",
+                    "subprojects": [],
+                    "sessions": [],
+                }
+                for name in ("First", "Second", "First")
+            ],
+        }
+        with self.assertRaisesMessage(
+            Format2ValidationError, "projects[2].name: duplicate project name"
+        ):
+            self.import_file(document)
+        self.assertFalse(Projects.objects.filter(user=self.user).exists())
+
+        del document["projects"]
+        with self.assertRaisesMessage(Format2ValidationError, "projects: expected a list"):
+            self.import_file(document)
@@ -7,6 +7,7 @@ compatibility is what half of these pin down. The other half pin the order the
 two lists compose in: include narrows the field first, then exclude subtracts.
 """
 
+import json
 from datetime import timedelta
 
 from django.contrib.auth.models import User
@@ -174,7 +175,8 @@ class ExportModeTests(ProjectFilterModeTestCase):
     def _exported_names(self, payload):
         response = self.client.post(reverse("export"), payload)
         self.assertEqual(response.status_code, 200)
-        return {project["name"] for project in response.json()["projects"]}
+        document = json.loads(b"".join(response.streaming_content))
+        return {project["name"] for project in document["projects"]}
 
     def test_include_keeps_only_the_named_projects(self):
         self.assertEqual(
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone as datetime_timezone
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import generation
+from core.chart_reports import build_chart_payload
+from core.models import Projects, Sessions, SessionSubproject, SubProjects
+from core.services import SessionMutationService
+from core.session_frame import SessionFrame, invalidate
+from core.test_api_v2_report_cache import REPORT_CACHES
+
+
+UTC = datetime_timezone.utc
+FRAME_CHARTS = ("scatter", "line", "stacked_area", "calendar", "cumulative", "heatmap", "histogram")
+
+
+@override_settings(CACHES=REPORT_CACHES)
+class SessionFrameTests(TestCase):
+    def setUp(self):
+        caches["reports"].clear()
+        self.user = User.objects.create_user(username="frame", password="pw")
+        self.alpha = Projects.objects.create(user=self.user, name="Alpha")
+        self.beta = Projects.objects.create(user=self.user, name="Beta")
+        self.design = SubProjects.objects.create(
+            user=self.user, name="design", parent_project=self.alpha
+        )
+        self.build = SubProjects.objects.create(
+            user=self.user, name="build", parent_project=self.alpha
+        )
+        start = datetime(2026, 3, 1, 23, 30, tzinfo=UTC)
+        self._create(self.alpha, start, 95, allocations=[(self.design, 3333)])
+        self._create(
+            self.alpha,
+            start + timedelta(hours=2),
+            20,
+            allocations=[(self.design, 5000), (self.build, 5000)],
+        )
+        self._create(self.beta, start + timedelta(days=1), 500)
+        self._create(self.beta, start + timedelta(days=1), 7)
+        # Legacy links may over-allocate; the residual bucket must then vanish.
+        over = self._create(self.alpha, start + timedelta(days=2), 45)
+        SessionSubproject.objects.create(session=over, subproject=self.design, allocation_bp=10000)
+        SessionSubproject.objects.create(session=over, subproject=self.build, allocation_bp=10000)
+        SessionMutationService.create_session(
+            user=self.user, project=self.beta, start_time=start
+        )
+
+    def _create(self, project, start, minutes, **fields):
+        return SessionMutationService.create_session(
+            user=self.user,
+            project=project,
+            start_time=start,
+            end_time=start + timedelta(minutes=minutes),
+            **fields,
+        )
+
+    def _completed(self):
+        return Sessions.objects.filter(user=self.user, end_time__isnull=False)
+
+    def assertFrameMatchesQueries(self):
+        frame = SessionFrame.for_user(self.user)
+        sessions = self._completed()
+        for chart_type in FRAME_CHARTS:
+            for use_subprojects in (False, True):
+                with self.subTest(chart_type=chart_type, use_subprojects=use_subprojects):
+                    self.assertEqual(
+                        build_chart_payload(
+                            chart_type, sessions, use_subprojects=use_subprojects, frame=frame
+                        ),
+                        build_chart_payload(
+                            chart_type, sessions, use_subprojects=use_subprojects
+                        ),
+                    )
+
+    def test_payloads_match_query_builders(self):
+        self.assertFrameMatchesQueries()
+
+    def test_frame_holds_completed_sessions_in_csr_form(self):
+        frame = SessionFrame.for_user(self.user)
+        self.assertEqual(len(frame), 5)
+        self.assertEqual(list(frame.link_offsets), [0, 1, 3, 3, 3, 5])
+        self.assertEqual(list(frame.link_bps), [3333, 5000, 5000, 10000, 10000])
+
+    def test_cached_frame_is_keyed_on_the_data_generation(self):
+        SessionFrame.for_user(self.user)
+        # The generation lookup only on a hit; it plus the load on a miss.
+        with self.assertNumQueries(1):
+            SessionFrame.for_user(self.user)
+        data_generation = generation.current(self.user.pk)
+        with self.assertNumQueries(0):
+            SessionFrame.for_user(self.user, data_generation)
+
+        session = self._completed().filter(project=self.beta).first()
+        session.end_time += timedelta(minutes=5)
+        session.save()
+        generation.bump(self.user.pk)
+        with self.assertNumQueries(2):
+            SessionFrame.for_user(self.user)
+        self.assertFrameMatchesQueries()
+
+        SessionSubproject.objects.filter(subproject=self.build).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate(self.user.pk)
+        self.assertFrameMatchesQueries()
+
+    def test_only_unfiltered_charts_read_the_frame(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse("api_v2:report-charts")
+        with patch.object(
+            SessionFrame, "for_user", wraps=SessionFrame.for_user
+        ) as for_user:
+            response = client.get(url, {"chart_type": "scatter"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(for_user.call_count, 1)
+
+            for params in (
+                {"project_name": "Beta"},
+                {"start_date": "2026-03-02"},
+                {"exclude": "Alpha"},
+            ):
+                with self.subTest(params=params):
+                    response = client.get(url, {"chart_type": "scatter", **params})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(for_user.call_count, 1)
@@ -0,0 +1,298 @@
+from datetime import datetime, timedelta, timezone as datetime_timezone
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core import generation, rollups
+from core.models import (
+    Projects,
+    SessionDayRollup,
+    SessionRollupState,
+    SubProjects,
+)
+from core.services import DestructiveMutationService, SessionMutationService
+
+
+UTC = datetime_timezone.utc
+
+
+def _snapshot(user):
+    return sorted(
+        SessionDayRollup.objects.filter(user=user).values_list(
+            "start_day",
+            "end_day",
+            "project_id",
+            "subproject_id",
+            "numerator",
+            "elapsed_microseconds",
+            "session_count",
+        ),
+        key=repr,
+    )
+
+
+class SessionRollupMaintenanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="rollup", password="pw")
+        self.alpha = Projects.objects.create(user=self.user, name="Alpha")
+        self.beta = Projects.objects.create(user=self.user, name="Beta")
+        self.design = SubProjects.objects.create(
+            user=self.user, name="design", parent_project=self.alpha
+        )
+        self.build = SubProjects.objects.create(
+            user=self.user, name="build", parent_project=self.alpha
+        )
+        rollups.rebuild(self.user, "UTC")
+
+    def _create(self, project, start, minutes, **fields):
+        return SessionMutationService.create_session(
+            user=self.user,
+            project=project,
+            start_time=start,
+            end_time=start + timedelta(minutes=minutes),
+            **fields,
+        )
+
+    def assertMatchesRebuild(self):
+        maintained = _snapshot(self.user)
+        rollups.rebuild(self.user, "UTC")
+        self.assertEqual(maintained, _snapshot(self.user))
+
+    def test_service_mutations_keep_rollup_equal_to_a_rebuild(self):
+        start = datetime(2026, 3, 1, 23, 30, tzinfo=UTC)
+        first = self._create(self.alpha, start, 90, subprojects=[self.design])
+        second = self._create(
+            self.alpha,
+            start + timedelta(hours=2),
+            45,
+            allocations=[(self.design, 2500), (self.build, 5000)],
+        )
+        self._create(self.beta, start, 30)
+        self.assertMatchesRebuild()
+
+        SessionMutationService.mutate_session(
+            first.pk,
+            user=self.user,
+            project=self.beta,
+            subprojects=[],
+            end_time=start + timedelta(minutes=20),
+        )
+        self.assertMatchesRebuild()
+
+        SessionMutationService.set_allocations(
+            second.pk, user=self.user, allocations=[(self.build, 10000)]
+        )
+        self.assertMatchesRebuild()
+
+        SessionMutationService.delete_session(second.pk, user=self.user)
+        self.assertMatchesRebuild()
+        self.assertFalse(
+            SessionDayRollup.objects.filter(subproject=self.build).exists()
+        )
+
+    def test_active_sessions_contribute_only_once_stopped(self):
+        start = datetime(2026, 3, 2, 9, tzinfo=UTC)
+        session = SessionMutationService.create_session(
+            user=self.user, project=self.alpha, start_time=start
+        )
+        self.assertEqual(_snapshot(self.user), [])
+
+        SessionMutationService.mutate_session(
+            session.pk, user=self.user, end_time=start + timedelta(hours=1)
+        )
+        self.assertMatchesRebuild()
+        row = SessionDayRollup.objects.get(user=self.user, subproject=None)
+        self.assertEqual(row.elapsed_microseconds, 3_600_000_000)
+        self.assertEqual(row.session_count, 1)
+
+    def test_batch_writes_keep_rollup_equal_to_a_rebuild(self):
+        self._create(self.alpha, datetime(2026, 3, 2, 9, tzinfo=UTC), 30)
+        start = datetime(2026, 3, 2, 11, tzinfo=UTC)
+        rows = [
+            {
+                "project": self.alpha,
+                "allocations": [(self.design, 6000), (self.build, 4000)],
+                "start_time": start + timedelta(hours=offset),
+                "end_time": start + timedelta(hours=offset, minutes=45),
+            }
+            for offset in range(3)
+        ] + [
+            {
+                "project": self.beta,
+                "allocations": [],
+                "start_time": start,
+                "end_time": start + timedelta(days=1, hours=2),
+            }
+        ]
+        SessionMutationService.create_sessions(user=self.user, rows=rows)
+        self.assertMatchesRebuild()
+
+        # Sweeping credits auto-stopped timers like any other stop.
+        timer = SessionMutationService.create_session(
+            user=self.user, project=self.beta, start_time=start
+        )
+        SessionMutationService.stop_due_timers(now=start)
+        self.assertMatchesRebuild()
+        SessionMutationService.mutate_session(
+            timer.pk, user=self.user, auto_stop_at=start + timedelta(minutes=20)
+        )
+        SessionMutationService.create_session(
+            user=self.user,
+            project=self.beta,
+            start_time=start,
+            auto_stop_at=start + timedelta(minutes=35),
+        )
+        stopped = SessionMutationService.stop_due_timers(now=start + timedelta(hours=1))
+        self.assertEqual(len(stopped), 2)
+        self.assertMatchesRebuild()
+
+    def test_rebuild_and_writers_serialize_on_the_generation_row(self):
+        # A writer blocked behind a first build must see its state row once
+        # the build commits; both sides lock the same per-user row.
+        other = User.objects.create_user(
+            username="rollup-first", email="rollup-first@example.com", password="pw"
+        )
+        project = Projects.objects.create(user=other, name="First")
+        with patch("core.rollups.generation.lock", wraps=generation.lock) as lock:
+            rollups.rebuild(other, "UTC")
+            lock.assert_called_once_with(other.pk)
+            self.assertEqual(generation.current(other.pk), 0)
+
+            lock.reset_mock()
+            start = datetime(2026, 3, 1, 9, tzinfo=UTC)
+            SessionMutationService.create_session(
+                user=other,
+                project=project,
+                start_time=start,
+                end_time=start + timedelta(minutes=30),
+            )
+            lock.assert_called_with(other.pk)
+        self.assertEqual(SessionDayRollup.objects.get(user=other).session_count, 1)
+
+    def test_unbuilt_rollup_is_not_maintained(self):
+        rollups.invalidate(self.user)
+        self._create(self.alpha, datetime(2026, 3, 3, 9, tzinfo=UTC), 30)
+        self.assertFalse(SessionRollupState.objects.filter(user=self.user).exists())
+        self.assertEqual(_snapshot(self.user), [])
+
+    def test_project_merge_invalidates_rollup(self):
+        self._create(self.alpha, datetime(2026, 3, 4, 9, tzinfo=UTC), 30)
+        self._create(self.beta, datetime(2026, 3, 4, 11, tzinfo=UTC), 30)
+        DestructiveMutationService.merge_projects(
+            user=self.user,
+            project1_name="Alpha",
+            project2_name="Beta",
+            new_project_name="Gamma",
+        )
+        self.assertFalse(SessionRollupState.objects.filter(user=self.user).exists())
+        self.assertEqual(_snapshot(self.user), [])
+
+
+class SessionRollupReportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="rollup-api", password="pw")
+        self.user.profile.timezone = "America/New_York"
+        self.user.profile.save()
+        self.project = Projects.objects.create(user=self.user, name="Alpha")
+        self.subproject = SubProjects.objects.create(
+            user=self.user, name="design", parent_project=self.project
+        )
+        # 02:00 UTC on the 2nd is still the 1st in New York.
+        SessionMutationService.create_session(
+            user=self.user,
+            project=self.project,
+            start_time=datetime(2026, 3, 2, 1, tzinfo=UTC),
+            end_time=datetime(2026, 3, 2, 2, tzinfo=UTC),
+            note="late review",
+            allocations=[(self.subproject, 5000)],
+        )
+        SessionMutationService.create_session(
+            user=self.user,
+            project=self.project,
+            start_time=datetime(2026, 3, 2, 15, tzinfo=UTC),
+            end_time=datetime(2026, 3, 2, 15, 30, tzinfo=UTC),
+            note="standup",
+        )
+        self.client = APIClient()
+        self.client.force_login(self.user)
+
+    def _tally(self, **params):
+        response = self.client.get("/api/v2/reports/tallies/", {"by": "subproject", **params})
+        self.assertEqual(response.status_code, 200)
+        return {
+            (entry["kind"], entry["name"]): entry["total_minutes"]
+            for entry in response.json()["entries"]
+        }
+
+    def test_first_report_builds_rollup_in_the_profile_timezone(self):
+        self.assertEqual(
+            self._tally(),
+            {("subproject", "design"): 30.0, ("residual", None): 60.0},
+        )
+        state = SessionRollupState.objects.get(user=self.user)
+        self.assertEqual(state.timezone, "America/New_York")
+
+        self.assertEqual(
+            self._tally(start_date="2026-03-01", end_date="2026-03-01"),
+            {("subproject", "design"): 30.0, ("residual", None): 30.0},
+        )
+
+    def test_requests_in_another_timezone_read_raw_rows_without_rebuilding(self):
+        self._tally()
+        state = SessionRollupState.objects.get(user=self.user)
+
+        # Token/basic-auth API requests are not activated in the profile
+        # timezone; alternating with the web must not thrash the rollup.
+        api = APIClient()
+        api.force_authenticate(self.user)
+        with patch("core.rollups.rebuild") as rebuild:
+            response = api.get(
+                "/api/v2/reports/tallies/",
+                {"by": "subproject", "start_date": "2026-03-02", "end_date": "2026-03-02"},
+            )
+        self.assertEqual(response.status_code, 200)
+        rebuild.assert_not_called()
+        self.assertEqual(
+            {
+                (entry["kind"], entry["name"]): entry["total_minutes"]
+                for entry in response.json()["entries"]
+            },
+            {("subproject", "design"): 30.0, ("residual", None): 60.0},
+        )
+        self.assertEqual(SessionRollupState.objects.get(user=self.user), state)
+        self.assertEqual(self._tally(), {("subproject", "design"): 30.0, ("residual", None): 60.0})
+        self.assertEqual(
+            SessionRollupState.objects.get(user=self.user).timezone, "America/New_York"
+        )
+
+    def test_note_snippet_falls_back_to_raw_sessions(self):
+        self.assertEqual(
+            self._tally(note_snippet="standup"),
+            {("residual", None): 30.0},
+        )
+        self.assertFalse(SessionRollupState.objects.filter(user=self.user).exists())
+
+    def test_charts_read_rollup_after_service_writes(self):
+        rows = self.client.get(
+            "/api/v2/reports/charts/", {"chart_type": "calendar"}
+        ).json()
+        self.assertEqual(rows, [{"date": "2026-03-02", "hours": 1.5}])
+
+        SessionMutationService.create_session(
+            user=self.user,
+            project=self.project,
+            start_time=datetime(2026, 3, 3, 9, tzinfo=UTC),
+            end_time=datetime(2026, 3, 3, 10, tzinfo=UTC),
+        )
+        rows = self.client.get(
+            "/api/v2/reports/charts/", {"chart_type": "calendar"}
+        ).json()
+        self.assertEqual(
+            rows,
+            [
+                {"date": "2026-03-02", "hours": 1.5},
+                {"date": "2026-03-03", "hours": 1.0},
+            ],
+        )
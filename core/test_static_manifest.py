@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core import context_processors, static_manifest
+
+
+class StaticManifestTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.manifest = os.path.join(self.root, "core", "versions.json")
+        self.write("js/app.js", "console.log(1);")
+        self.write("css/app.css", "body {}")
+        self.write("js/charts/pie.js", "pie();")
+        self.write("js/charts/bar.js", "bar();")
+
+    def write(self, relative, content):
+        path = os.path.join(self.root, "core", relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_versions_are_content_hashes_per_stem_and_bundle(self):
+        version = static_manifest.build(self.root)
+        self.assertEqual(sorted(version), ["app", "charts"])
+        self.assertEqual(static_manifest.build(self.root), version)
+
+        self.write("js/charts/bar.js", "bar(2);")
+        changed = static_manifest.build(self.root)
+        self.assertEqual(changed["app"], version["app"])
+        self.assertNotEqual(changed["charts"], version["charts"])
+
+        self.assertEqual(sorted(static_manifest.scan(self.root)), ["app", "charts"])
+
+    def test_command_writes_the_manifest_that_load_reads(self):
+        out = StringIO()
+        with override_settings(
+            STATIC_ROOT=self.root, STATIC_VERSION_MANIFEST=self.manifest
+        ):
+            call_command("static_manifest", stdout=out)
+            self.assertEqual(
+                static_manifest.load(), static_manifest.build(self.root)
+            )
+        self.assertIn("Wrote 2 static versions", out.getvalue())
+        with open(self.manifest) as f:
+            self.assertEqual(json.load(f), static_manifest.build(self.root))
+
+    def test_missing_or_corrupt_manifest_loads_as_none(self):
+        self.assertIsNone(static_manifest.load(self.manifest))
+        self.write("versions.json", "{not json")
+        self.assertIsNone(static_manifest.load(self.manifest))
+
+    def test_context_processor_serves_the_manifest_without_touching_disk(self):
+        version = {"app": "abc123"}
+        with patch.object(context_processors, "_static_manifest", version), patch.object(
+            static_manifest, "scan"
+        ) as scan:
+            self.assertEqual(
+                context_processors.static_version(None), {"static_version": version}
+            )
+        scan.assert_not_called()
+
+    def test_collectstatic_writes_the_manifest(self):
+        with override_settings(
+            STATIC_ROOT=self.root, STATIC_VERSION_MANIFEST=self.manifest
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+        version = static_manifest.load(self.manifest)
+        self.assertIn("timer_poll", version)
+        self.assertEqual(version, static_manifest.build(self.root))
@@ -1,4 +1,6 @@
 from django.test import TestCase, Client, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from core.models import Projects, SubProjects, Sessions, Commitment, Tag
@@ -19,6 +21,7 @@ from rest_framework.authtoken.models import Token
 from core.utils import (
     get_period_bounds,
     calculate_daily_activity_streak,
+    iter_period_bounds,
 )
 from core.commitments import (
     calculate_commitment_streak,
@@ -1301,6 +1304,22 @@ class PeriodBoundsTests(TestCase):
 
         self.assertEqual((end - start).days, 14)
 
+    def test_iter_period_bounds_matches_walking_get_period_bounds(self):
+        """Stepped edges agree with get_period_bounds across DST and 53-week years."""
+        first = timezone.make_aware(datetime(2025, 12, 20, 23, 30))
+        last = timezone.make_aware(datetime(2027, 4, 2, 0, 30))
+        for period in ('daily', 'weekly', 'fortnightly', 'monthly', 'quarterly', 'yearly'):
+            with self.subTest(period=period):
+                expected = []
+                check_date = first
+                while True:
+                    bounds = get_period_bounds(period, check_date)
+                    expected.append(bounds)
+                    if bounds[1] > last:
+                        break
+                    check_date = bounds[1] + timedelta(seconds=1)
+                self.assertEqual(list(iter_period_bounds(period, first, last)), expected)
+
 
 class CommitmentProgressTests(TestCase):
     """Test the get_commitment_progress utility function."""
@@ -2424,6 +2443,44 @@ class CommitmentStreakTests(TestCase):
         self.assertTrue(day2_period['saved_by_bank'])
         self.assertFalse(day1_period['met'])
 
+    def test_streak_reads_ledger_rows_and_simulates_only_missing_periods(self):
+        """Closed ledger periods are not re-read; one query covers the rest."""
+        now = timezone.localtime(timezone.now())
+        commitment = Commitment.objects.create(
+            user=self.user,
+            project=self.project,
+            commitment_type='sessions',
+            period='daily',
+            target=1,
+        )
+        Commitment.objects.filter(pk=commitment.pk).update(
+            start_date=(now - timedelta(days=40)).date()
+        )
+        commitment.refresh_from_db()
+        for days_ago in range(1, 41, 2):
+            period_start, _ = get_period_bounds('daily', now - timedelta(days=days_ago))
+            Sessions.objects.create(
+                user=self.user,
+                project=self.project,
+                start_time=period_start + timedelta(hours=9),
+                end_time=period_start + timedelta(hours=10),
+                is_active=False,
+            )
+        legacy = calculate_commitment_streak(commitment, num_periods=50)
+
+        reconcile_commitment(commitment)
+        self.assertTrue(commitment.period_rows.exists())
+        with CaptureQueriesContext(connection) as queries:
+            replayed = calculate_commitment_streak(commitment, num_periods=50)
+
+        self.assertEqual(replayed, legacy)
+        self.assertEqual(len(replayed['periods']), 41)
+        session_queries = [
+            query for query in queries.captured_queries
+            if 'FROM "core_sessions"' in query['sql']
+        ]
+        self.assertEqual(len(session_queries), 1)
+
 
 class CommitmentComposableRulesTests(TestCase):
     def setUp(self):
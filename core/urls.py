@@ -11,6 +11,7 @@ from core.views import (
     restart_timer,
     remove_timer,
     active_timers_fragment,
+    active_timers_wait,
     update_timer_note,
     CreateProjectView,
     CreateSubProjectView,
@@ -55,6 +56,7 @@ urlpatterns = [
         active_timers_fragment,
         name="active_timers_fragment",
     ),
+    path("timers/active-wait/", active_timers_wait, name="active_timers_wait"),
     path("start_timer/", start_timer, name="start_timer"),
     path("stop_timer/<int:session_id>/", stop_timer, name="stop_timer"),
     path("timers/<int:session_id>/note/", update_timer_note, name="update_timer_note"),
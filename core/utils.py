@@ -2,6 +2,7 @@ import json
 import re
 import zlib
 import base64
+from django.conf import settings
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from collections import defaultdict
@@ -50,32 +51,29 @@ def parse_stop_after_duration(value) -> timedelta | None:
     return timedelta(minutes=minutes)
 
 
-def stop_expired_timers(user=None, now=None):
-    """Close active sessions whose optional auto-stop deadline has passed."""
-    now = now or timezone.now()
-    sessions = Sessions.objects.filter(
-        end_time__isnull=True,
-        auto_stop_at__isnull=False,
-        auto_stop_at__lte=now,
-    )
-    if user is not None:
-        sessions = sessions.filter(user=user)
+def stop_expired_timers(user=None, now=None, limit=None):
+    """Close active sessions whose optional auto-stop deadline has passed.
+
+    With ``TIMERS_BACKGROUND_AUTO_STOP`` the sweep belongs to
+    ``manage.py auto_stop_worker`` and per-user calls from request paths do
+    nothing; an unscoped call (the worker's) always sweeps.
+    """
+    if user is not None and settings.TIMERS_BACKGROUND_AUTO_STOP:
+        return []
 
     from core.services import SessionMutationService
 
-    stopped = []
-    for session in sessions.select_related("project"):
-        stopped.append(
-            SessionMutationService.mutate_session(
-                session.pk,
-                user=user,
-                end_time=session.auto_stop_at,
-                auto_stop_at=None,
-                is_active=False,
-            )
-        )
+    return SessionMutationService.stop_due_timers(user=user, now=now, limit=limit)
 
-    return stopped
+
+def next_auto_stop_at():
+    """The earliest pending ``auto_stop_at`` across all users, or None."""
+    return (
+        Sessions.objects.filter(end_time__isnull=True, auto_stop_at__isnull=False)
+        .order_by("auto_stop_at")
+        .values_list("auto_stop_at", flat=True)
+        .first()
+    )
 
 
 def build_exclude_project_meta(user) -> dict:
@@ -163,6 +161,65 @@ def filter_by_projects(
         return data
 
 
+class RequestContexts:
+    """
+    The user's contexts, loaded once per request and shared by every caller.
+
+    ``core.middleware.ActiveContextMiddleware`` attaches one to each request
+    as ``request.contexts_memo``; the context processor, the active-context
+    filters and the chart endpoints then resolve against the same list
+    instead of querying on every call.
+    """
+
+    def __init__(self, request: HttpRequest):
+        self.request = request
+        self._user_id = None
+        self._contexts = None
+
+    @property
+    def all(self) -> list[Context]:
+        """The user's contexts ordered by name (empty for anonymous users)."""
+        user_id = self.request.user.pk
+        # Reload if the request logs a different user in (or out).
+        if self._contexts is None or user_id != self._user_id:
+            self._contexts = (
+                list(Context.objects.filter(user_id=user_id).order_by("name"))
+                if user_id is not None
+                else []
+            )
+            self._user_id = user_id
+        return self._contexts
+
+    def resolve(self, context_id) -> tuple[Context | None, str]:
+        """``get_active_context`` for an explicit or session-stored value."""
+        if not context_id or str(context_id).lower() == "all":
+            return None, "all"
+
+        # Try ID first, then name.
+        try:
+            wanted_id = int(context_id)
+        except (ValueError, TypeError):
+            wanted_id = None
+        contexts = self.all
+        for context in contexts:
+            if context.id == wanted_id:
+                return context, "single"
+
+        wanted_name = str(context_id).strip().lower()
+        for context in contexts:
+            if context.name.lower() == wanted_name:
+                return context, "single"
+
+        # Invalid/missing context  treat as All
+        return None, "all"
+
+
+def request_contexts(request: HttpRequest) -> RequestContexts:
+    """The request's context memo, or a one-off one outside the middleware."""
+    memo = getattr(request, "contexts_memo", None)
+    return memo if memo is not None else RequestContexts(request)
+
+
 def get_active_context(
     request: HttpRequest, override_context_id: str | None = None
 ) -> tuple[Context | None, str]:
@@ -184,24 +241,7 @@ def get_active_context(
         # Fall back to session
         context_id = request.session.get(ACTIVE_CONTEXT_SESSION_KEY)
 
-    if not context_id or str(context_id).lower() == "all":
-        return None, "all"
-
-    # Try ID first, then name.
-    try:
-        context = Context.objects.get(id=int(context_id), user=request.user)
-        return context, "single"
-    except (Context.DoesNotExist, ValueError, TypeError):
-        pass
-
-    try:
-        context = Context.objects.get(
-            name__iexact=str(context_id).strip(), user=request.user
-        )
-        return context, "single"
-    except (Context.DoesNotExist, ValueError, TypeError):
-        # Invalid/missing context  treat as All
-        return None, "all"
+    return request_contexts(request).resolve(context_id)
 
 
 def set_active_context(request: HttpRequest, context_id: str | None) -> None:
@@ -296,6 +336,32 @@ def filter_sessions_by_params(
     return sessions
 
 
+def filter_projects_by_params(projects: QuerySet[Projects], params) -> QuerySet:
+    """The project-level half of ``filter_sessions_by_params``.
+
+    Dates and note snippets narrow individual sessions and are left to the
+    caller; everything else here selects whole projects, which is what lets
+    the chart reports answer from the day rollup instead of raw sessions.
+    """
+    project_name = params.get("project_name")
+    if project_name:
+        projects = projects.filter(name__icontains=project_name)
+
+    tags = _numeric_ids(_param_list(params, "tags"))
+    if tags:
+        projects = projects.filter(tags__id__in=tags).distinct()
+
+    include_ids = _numeric_ids(_param_list(params, "include_projects"))
+    if include_ids:
+        projects = projects.filter(id__in=include_ids)
+
+    exclude_ids = _numeric_ids(_param_list(params, "exclude_projects"))
+    if exclude_ids:
+        projects = projects.exclude(id__in=exclude_ids)
+
+    return projects
+
+
 #: Free-text search params, in the order their pills should read.
 _TEXT_FILTER_LABELS = (
     ("project_name", "Project"),
@@ -662,8 +728,10 @@ def build_project_json_from_sessions(sessions, autumn_compatible=False):
     return projects_data
 
 
+ZIPJSON_KEY = "base64(zip(o))"
+
+
 def json_compress(j):
-    ZIPJSON_KEY = "base64(zip(o))"
     j = {
         ZIPJSON_KEY: base64.b64encode(
             zlib.compress(json.dumps(j).encode("utf-8"))
@@ -674,8 +742,6 @@ def json_compress(j):
 
 
 def json_decompress(content: dict | str | bytes) -> dict:
-    ZIPJSON_KEY = "base64(zip(o))"
-
     # convert binary content to string
     if isinstance(content, bytes):
         content = content.decode("utf-8")
@@ -705,6 +771,13 @@ def json_decompress(content: dict | str | bytes) -> dict:
     return content
 
 
+def _fortnight_start(week_start):
+    # Odd ISO weeks start a new fortnight
+    if week_start.isocalendar()[1] % 2 == 0:
+        return week_start - timedelta(days=7)
+    return week_start
+
+
 def get_period_bounds(
     period: str, reference_date: datetime = None
 ) -> tuple[datetime, datetime]:
@@ -743,13 +816,7 @@ def get_period_bounds(
         # Two-week period starting on Monday
         # Use ISO week number to determine which fortnight
         days_since_monday = ref_date.weekday()
-        week_start = ref_date - timedelta(days=days_since_monday)
-        iso_week = week_start.isocalendar()[1]
-        # Odd weeks start a new fortnight
-        if iso_week % 2 == 0:
-            start_date = week_start - timedelta(days=7)
-        else:
-            start_date = week_start
+        start_date = _fortnight_start(ref_date - timedelta(days=days_since_monday))
         end_date = start_date + timedelta(days=14)
 
     elif period == "monthly":
@@ -776,6 +843,60 @@ def get_period_bounds(
 
     return start, end
 
+
+# Length of one period of each cadence as (days, months).
+PERIOD_STEPS = {
+    "daily": (1, 0),
+    "weekly": (7, 0),
+    "fortnightly": (14, 0),
+    "monthly": (0, 1),
+    "quarterly": (0, 3),
+    "yearly": (0, 12),
+}
+
+
+def iter_period_bounds(period: str, start: datetime, end: datetime, zone=None):
+    """
+    Yield the successive ``(start, end)`` bounds get_period_bounds returns when
+    walked from ``start``, each next reference being the previous period's end.
+
+    Begins with the period containing ``start`` and stops after the period
+    containing ``end`` (always yielding at least one). Only the first period is
+    resolved through get_period_bounds; later edges are stepped with plain date
+    arithmetic on local dates.
+
+    :param zone: Timezone whose midnights bound the periods (defaults to the active one)
+    """
+    zone = zone or timezone.get_current_timezone()
+    with timezone.override(zone):
+        period_start, _ = get_period_bounds(period, start)
+    start_date = timezone.localtime(period_start, zone).date()
+    days, months = PERIOD_STEPS[period]
+
+    while True:
+        if days:
+            end_date = start_date + timedelta(days=days)
+        else:
+            year, month = divmod(start_date.year * 12 + start_date.month - 1 + months, 12)
+            end_date = start_date.replace(year=year, month=month + 1)
+        period_end = timezone.make_aware(
+            datetime.combine(end_date, datetime.min.time()), zone
+        )
+        yield period_start, period_end
+        if period_end > end:
+            return
+        if period == "fortnightly":
+            # ISO years with 53 weeks restart the fortnight a week early.
+            start_date = _fortnight_start(end_date)
+            if start_date != end_date:
+                period_start = timezone.make_aware(
+                    datetime.combine(start_date, datetime.min.time()), zone
+                )
+                continue
+        start_date = end_date
+        period_start = period_end
+
+
 def get_commitment_sessions_queryset(commitment, period_start, period_end):
     from core.commitments import get_commitment_sessions_queryset as implementation
 
@@ -4,6 +4,7 @@ from core.views.timers import (
     restart_timer,
     remove_timer,
     active_timers_fragment,
+    active_timers_wait,
     update_timer_note,
     TimerListView,
     _timer_combo_key,
@@ -10,6 +10,7 @@ from django.views.generic import (
     UpdateView,
     DeleteView,
 )
+from core import generation
 from core.commitments import (
     build_commitment_scope_meta,
     get_commitment_progress,
@@ -182,6 +183,11 @@ class DeleteCommitmentView(LoginRequiredMixin, DeleteView):
         context["title"] = "Delete Commitment"
         return context
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        generation.bump(self.request.user.pk)
+        return response
+
     def get_success_url(self):
         messages.success(self.request, "Commitment deleted successfully")
         if self.object.aggregation_type == "project" and self.object.project_id:
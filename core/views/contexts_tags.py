@@ -18,6 +18,7 @@ from django.views.generic import (
     UpdateView,
     DeleteView,
 )
+from core import changelog, generation
 from core.commitments import (
     build_commitment_panel_items,
     commitment_applies_to_context,
@@ -80,12 +81,13 @@ def manage_contexts(request):
                 form.add_error("name", "You already have a context with this name.")
             else:
                 ctx.save()
+                generation.bump(request.user.pk)
                 messages.success(request, "Context created successfully")
                 return redirect("contexts")
     else:
         form = ContextForm()
 
-    contexts = Context.objects.filter(user=request.user).order_by("name")
+    contexts = request_contexts(request).all
 
     context = {
         "title": "Contexts",
@@ -110,6 +112,7 @@ def manage_tags(request):
                 form.add_error("name", "You already have a tag with this name.")
             else:
                 tag.save()
+                generation.bump(request.user.pk)
                 messages.success(request, "Tag created successfully")
                 return redirect("tags")
     else:
@@ -211,7 +214,13 @@ class UpdateContextView(LoginRequiredMixin, UpdateView):
         ):
             form.add_error("name", "You already have a context with this name.")
             return self.form_invalid(form)
-        form.save()
+        context = form.save()
+        generation.bump(self.request.user.pk)
+        if "name" in form.changed_data:
+            changelog.record(
+                self.request.user.pk,
+                projects=context.projects.values_list("pk", flat=True),
+            )
         messages.success(self.request, "Context updated successfully")
         return redirect("contexts")
 
@@ -332,7 +341,13 @@ class UpdateTagView(LoginRequiredMixin, UpdateView):
         ):
             form.add_error("name", "You already have a tag with this name.")
             return self.form_invalid(form)
-        form.save()
+        tag = form.save()
+        generation.bump(self.request.user.pk)
+        if "name" in form.changed_data:
+            changelog.record(
+                self.request.user.pk,
+                projects=tag.projects.values_list("pk", flat=True),
+            )
         messages.success(self.request, "Tag updated successfully")
         return redirect("tags")
 
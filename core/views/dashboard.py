@@ -9,11 +9,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import (
     TemplateView,
 )
-from core.commitments import (
-    calculate_commitment_streak,
-    get_commitment_progress,
-    reconcile_commitment,
-)
+from core.commitments import build_commitment_panel_items
 from core.models import Sessions, Commitment
 from core.timeline import DEFAULT_RANGE, build_timeline
 
@@ -151,7 +147,7 @@ def timeline_fragment(request):
     Like the active-timer fragment, this is rendered without context
     processors: the partial needs `timeline` and nothing else.
 
-    Deliberately no ``stop_expired_timers`` call: the five-second timer poll
+    Deliberately no ``stop_expired_timers`` call: the active-timer poll
     already runs it, and this endpoint should not write on a GET to repeat
     work that has just been done.
     """
@@ -181,27 +177,25 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         # 1. Daily activity streak (precompute 30 days for toggleable view)
         context["daily_streak"] = calculate_daily_activity_streak(user, days=30)
 
-        # 2. Get all active commitments with progress and streak data
-        commitments_data = []
-        commitments = Commitment.objects.filter(user=user, active=True).select_related(
-            "project", "subproject", "context", "tag"
-        )
-
-        for commitment in commitments:
-            # Reconcile past periods
-            reconcile_commitment(commitment)
-            # Get current progress
-            progress = get_commitment_progress(commitment)
-            # Get commitment streak
-            streak = calculate_commitment_streak(commitment)
-
-            commitments_data.append(
-                {
-                    "commitment": commitment,
-                    "progress": progress,
-                    "streak": streak,
-                }
+        # 2. Get all active commitments with progress and streak data, batched
+        # so the query count does not grow with the number of commitments
+        commitments = (
+            Commitment.objects.filter(user=user, active=True)
+            .select_related("project", "subproject", "context", "tag")
+            .prefetch_related(
+                "include_projects",
+                "exclude_projects",
+                "include_subprojects",
+                "exclude_subprojects",
+                "include_contexts",
+                "exclude_contexts",
+                "include_tags",
+                "exclude_tags",
             )
+        )
+        commitments_data = build_commitment_panel_items(
+            commitments, include_streak=True
+        )
 
         # Sort by urgency: lowest percentage first (most behind)
         commitments_data.sort(key=lambda x: x["progress"]["percentage"])
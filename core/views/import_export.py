@@ -1,6 +1,6 @@
 import json
 from core.forms import *
-from core.importer import iter_import
+from core.importer import iter_import_file
 from core.temp_uploads import discard_upload, store_upload
 from core.utils import *
 from core.models import Context
@@ -12,7 +12,7 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET
 from django.shortcuts import render
 from core.models import Sessions
-from core.export2 import build_format2_export
+from core.export2 import export_response, iter_format2_compressed, iter_format2_json
 
 
 def stream_response(message):
@@ -100,20 +100,11 @@ def import_stream(request):
         request.session.pop("import_data", None)
 
         try:
-            with open(file_path) as f:
-                try:
-                    data = json_decompress(f.read())
-                except RuntimeError:
-                    try:
-                        data = json.load(f)
-                    except json.JSONDecodeError:
-                        yield stream_response("Error: Invalid JSON file")
-                        return
-
-            # Stream progress live as the importer works through the file.
-            for message in iter_import(
+            # Stream progress live as the importer works through the file,
+            # which it reads incrementally rather than loading whole.
+            for message in iter_import_file(
                 user,
-                data,
+                file_path,
                 force=force,
                 merge=merge,
                 tolerance=tolerance,
@@ -123,6 +114,8 @@ def import_stream(request):
             ):
                 yield stream_response(message)
 
+        except json.JSONDecodeError:
+            yield stream_response("Error: Invalid JSON file")
         except Exception as e:
             yield stream_response(f"Error: {str(e)}")
         finally:
@@ -214,12 +207,14 @@ def export_view(request):
         # regardless of the query plan (historical order: ascending id).
         qs = qs.order_by("-end_time", "id")
 
+        if not legacy_format:
+            chunks = (
+                iter_format2_compressed(qs) if compress else iter_format2_json(qs, indent=4)
+            )
+            return export_response(request, chunks, filename=output_file)
+
         # build export dict
-        export_dict = (
-            build_project_json_from_sessions(qs, autumn_compatible)
-            if legacy_format
-            else build_format2_export(qs)
-        )
+        export_dict = build_project_json_from_sessions(qs, autumn_compatible)
 
         # finally serialize
         contents = (
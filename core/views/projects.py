@@ -13,12 +13,13 @@ from django.views.generic import (
     UpdateView,
     DeleteView,
 )
+from core import changelog
 from core.commitments import (
     build_commitment_panel_items,
     commitment_applies_to_project,
     commitment_applies_to_subproject,
     get_commitment_progress,
-    reconcile_commitment,
+    reconcile_for_read,
 )
 from core.models import Projects, SubProjects, Sessions, Commitment, status_choices
 from django.db.models import Prefetch
@@ -66,7 +67,7 @@ class ProjectsListView(LoginRequiredMixin, ListView):
                 commitment = project.commitment
                 if commitment and commitment.active:
                     # Reconcile past periods
-                    reconcile_commitment(commitment)
+                    reconcile_for_read(commitment)
                     # Get current progress
                     commitment_progress[project.id] = get_commitment_progress(
                         commitment
@@ -185,7 +186,8 @@ class CreateProjectView(LoginRequiredMixin, CreateView):
         ).exists():
             form.add_error("name", "You already have a project with this name.")
             return self.form_invalid(form)
-        form.save()
+        project = form.save()
+        changelog.record(self.request.user.pk, projects=[project.pk])
         messages.success(self.request, "Project created successfully")
         return redirect("projects")
 
@@ -216,7 +218,8 @@ class CreateSubProjectView(LoginRequiredMixin, CreateView):
         form.instance.user = (
             self.request.user
         )  # set the user field of the subproject to the current user
-        form.save()
+        subproject = form.save()
+        changelog.record(self.request.user.pk, subprojects=[subproject.pk])
         messages.success(self.request, "Subproject created successfully")
         return redirect("projects")
 
@@ -324,6 +327,8 @@ class UpdateProjectView(LoginRequiredMixin, UpdateView):
         if update_fields:
             project.save(update_fields=update_fields)
         form.save_m2m()
+        if form.changed_data:
+            changelog.record(self.request.user.pk, projects=[project.pk])
         messages.success(self.request, "Project updated successfully")
         return redirect("update_project", pk=self.kwargs["pk"])
 
@@ -417,6 +422,7 @@ class UpdateSubProjectView(LoginRequiredMixin, UpdateView):
         subproject = form.save(commit=False)
         if form.changed_data:
             subproject.save(update_fields=form.changed_data)
+            changelog.record(self.request.user.pk, subprojects=[subproject.pk])
         messages.success(self.request, "Subproject updated successfully")
         return redirect("update_subproject", pk=self.kwargs["pk"])
 
@@ -1,6 +1,10 @@
+import asyncio
+import hashlib
 from collections import Counter
+from asgiref.sync import sync_to_async
 from core.forms import *
 from core.utils import *
+from django.conf import settings
 from django.contrib import messages
 from django.db import transaction
 from django.db.models import Prefetch
@@ -16,11 +20,11 @@ from django.views.generic import (
 )
 from django.views.decorators.http import require_POST
 from core.commitments import (
+    build_commitment_panel_items,
     commitment_applies_to_project,
     commitment_applies_to_subproject,
-    get_commitment_progress,
-    reconcile_commitment,
 )
+from core import generation
 from core.models import Projects, SubProjects, Sessions, Commitment
 from core.services import SessionMutationService
 from core.views.allocations import parse_allocation_post
@@ -32,17 +36,30 @@ ACTIVE_TIMER_FRAGMENT_TEMPLATES = {
 }
 
 
-@login_required
-def active_timers_fragment(request):
-    """Render only the active-timer region used by the polling UI."""
-    surface = request.GET.get("surface", "timers")
-    template_name = ACTIVE_TIMER_FRAGMENT_TEMPLATES.get(surface)
-    if template_name is None:
-        return HttpResponseBadRequest("Unknown timer surface")
+def active_timer_state(user):
+    """Fingerprint of the user's running timers and the next auto-stop due.
 
-    stop_expired_timers(request.user)
+    The state changes whenever a timer starts, stops, is edited (every
+    session write bumps ``version``) or its project is renamed, so a client
+    holding the current state has nothing new to render.
+    """
+    rows = list(
+        Sessions.objects.filter(end_time__isnull=True, user=user)
+        .order_by("pk")
+        .values_list("pk", "version", "auto_stop_at", "project__name")
+    )
+    state = hashlib.sha256(repr(rows).encode()).hexdigest()[:16]
+    next_stop = min(
+        (auto_stop_at for _, _, auto_stop_at, _ in rows if auto_stop_at),
+        default=None,
+    )
+    return state, next_stop
+
+
+def _render_active_timers(request, user, surface):
+    stop_expired_timers(user)
     timers = (
-        Sessions.objects.filter(end_time__isnull=True, user=request.user)
+        Sessions.objects.filter(end_time__isnull=True, user=user)
         .select_related("project")
         .prefetch_related(
             Prefetch(
@@ -68,13 +85,88 @@ def active_timers_fragment(request):
         timers = timers[:5]
 
     # These partials do not need request context processors. Avoiding them keeps
-    # this five-second polling path limited to active-timer data.
-    html = render_to_string(template_name, {"timers": timers})
+    # this polling path limited to active-timer data.
+    html = render_to_string(
+        ACTIVE_TIMER_FRAGMENT_TEMPLATES[surface], {"timers": timers}
+    )
     response = HttpResponse(html)
     response["Cache-Control"] = "no-store"
+    response["X-Timer-State"] = active_timer_state(user)[0]
     return response
 
 
+@login_required
+def active_timers_fragment(request):
+    """Render only the active-timer region used by the polling UI."""
+    surface = request.GET.get("surface", "timers")
+    if surface not in ACTIVE_TIMER_FRAGMENT_TEMPLATES:
+        return HttpResponseBadRequest("Unknown timer surface")
+    return _render_active_timers(request, request.user, surface)
+
+
+def _check_timer_state(user, seen_generation, next_stop):
+    """One wait-loop step: expire due timers, then re-read state if written.
+
+    Returns ``(generation, state_or_None, next_stop)``; the state is only
+    recomputed when the user's data generation moved since the last step.
+    The first step (``seen_generation`` of ``None``) always sweeps, since no
+    deadline is known yet and a timer may already be overdue.
+    """
+    if seen_generation is None or (
+        next_stop is not None and next_stop <= timezone.now()
+    ):
+        # Stopping bumps the generation, so the state is re-read below. With
+        # the background sweeper this is a no-op and its bump wakes us later.
+        stop_expired_timers(user)
+    current = generation.current(user.pk)
+    if current == seen_generation:
+        return current, None, next_stop
+    state, next_stop = active_timer_state(user)
+    return current, state, next_stop
+
+
+@login_required
+async def active_timers_wait(request):
+    """Long-poll for the active-timer region.
+
+    The client sends the ``X-Timer-State`` it last rendered. While nothing
+    has changed the request is held for up to ``TIMER_WAIT_SECONDS``, waking
+    every ``TIMER_WAIT_CHECK_SECONDS`` for a one-row generation lookup and at
+    the next ``auto_stop_at`` to stop that timer. A change answers 200 with
+    the fragment; a quiet wait answers 204. With the default of 0 seconds
+    (WSGI workers, where a held request pins a thread) it is a cheap poll.
+    """
+    surface = request.GET.get("surface", "timers")
+    if surface not in ACTIVE_TIMER_FRAGMENT_TEMPLATES:
+        return HttpResponseBadRequest("Unknown timer surface")
+    known_state = request.GET.get("state", "")
+    user = await request.auser()
+
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + settings.TIMER_WAIT_SECONDS
+    seen_generation, state, next_stop = None, None, None
+    while True:
+        seen_generation, checked, next_stop = await sync_to_async(
+            _check_timer_state
+        )(user, seen_generation, next_stop)
+        if checked is not None:
+            state = checked
+        if state != known_state:
+            return await sync_to_async(_render_active_timers)(request, user, surface)
+
+        remaining = give_up_at - loop.time()
+        if remaining <= 0:
+            response = HttpResponse(status=204)
+            response["Cache-Control"] = "no-store"
+            response["X-Timer-State"] = state
+            return response
+        delay = min(settings.TIMER_WAIT_CHECK_SECONDS, remaining)
+        until_stop = next_stop and (next_stop - timezone.now()).total_seconds()
+        if until_stop and until_stop > 0:
+            delay = min(delay, until_stop)
+        await asyncio.sleep(delay)
+
+
 @login_required
 def start_timer(request):
     if request.method == "POST":
@@ -479,13 +571,11 @@ def _timer_commitment_suggestions(
         )
     )
 
-    commitment_items = []
-    for commitment in commitments:
-        reconcile_commitment(commitment)
-        progress = get_commitment_progress(commitment)
-        if progress["actual"] >= progress["target"]:
-            continue
-        commitment_items.append((commitment, progress))
+    commitment_items = [
+        (item["commitment"], item["progress"])
+        for item in build_commitment_panel_items(commitments)
+        if item["progress"]["actual"] < item["progress"]["target"]
+    ]
 
     commitment_items.sort(key=lambda item: item[1]["percentage"])
 